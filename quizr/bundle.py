@@ -0,0 +1,412 @@
+"""
+Packed quiz bundles for QUIZR - a single indexed file compiled from the exercises tree
+
+Layout (all integers little-endian):
+
+    header     magic 'QZRB', version, then count and offset of each table and
+               the answer normalization the accepted answers were folded with
+    strings    (offset u32, length u32) per string, into the string data
+    data       UTF-8 string data, each string stored once
+    folders    (path, first file, file count) per folder
+    files      (path, name, first question, question count) per quiz file,
+               grouped by folder
+    paths      file indices sorted by path, for binary search
+    questions  (id, prompt, answer, image, flags, alternatives, accepted)
+               per question; alternatives and normalized accepted answers
+               are stored as one string each, separated by SEPARATOR
+
+Strings in the tables are indices into the string table. The bundle is
+memory-mapped, so opening it costs nothing and any quiz or question is read
+on demand without parsing the rest.
+"""
+
+import glob
+import hashlib
+import mmap
+import os
+import struct
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .models import Question, Quiz
+from .storage import atomic_write_bytes, atomic_write_text
+
+
+MAGIC = b'QZRB'
+VERSION = 2
+NO_STRING = 0xFFFFFFFF
+FLAG_STRICT = 1
+SEPARATOR = '\x1f'
+
+# How long to wait for another process building the shared bundle, and when
+# to treat its lock as left behind by a crashed process
+SHARED_WAIT_SECONDS = 30
+SHARED_STALE_LOCK_SECONDS = 300
+
+HEADER = struct.Struct('<4sHH6I6Q')
+STRING_ENTRY = struct.Struct('<II')
+FOLDER_ENTRY = struct.Struct('<III')
+FILE_ENTRY = struct.Struct('<IIII')
+PATH_ENTRY = struct.Struct('<I')
+QUESTION_ENTRY = struct.Struct('<IIIIIII')
+
+
+class BundleError(Exception):
+    """Raised when a bundle file is missing, truncated or of an unknown format"""
+
+
+def write_bundle(output_path: str, quizzes: Iterable[Tuple[str, Quiz]],
+                 normalization: Optional[str] = None) -> Dict[str, int]:
+    """Compile quizzes into a bundle file
+
+    Args:
+        output_path: Path of the bundle to write
+        quizzes: (folder_path, quiz) pairs as laid out by discover_quizzes()
+        normalization: Signature of the AnswerNormalizer that computed the
+            questions' accepted answers, or None to leave them out
+
+    Returns:
+        Dictionary with counts of 'folders', 'files', 'questions' and 'bytes'
+    """
+    strings: List[bytes] = []
+    string_ids: Dict[str, int] = {}
+
+    def intern(value: Optional[str]) -> int:
+        if value is None:
+            return NO_STRING
+        value = str(value)
+        if value not in string_ids:
+            string_ids[value] = len(strings)
+            strings.append(value.encode('utf-8'))
+        return string_ids[value]
+
+    by_folder: Dict[str, List[Quiz]] = {}
+    for folder_path, quiz in quizzes:
+        by_folder.setdefault(folder_path, []).append(quiz)
+
+    folder_entries = []
+    file_entries = []
+    file_paths = []
+    question_entries = []
+    for folder_path in sorted(by_folder):
+        folder_entries.append((intern(folder_path), len(file_entries), len(by_folder[folder_path])))
+        for quiz in sorted(by_folder[folder_path], key=lambda q: q.filepath):
+            file_entries.append((intern(quiz.filepath), intern(quiz.name), len(question_entries), len(quiz.questions)))
+            file_paths.append(quiz.filepath)
+            for question in quiz.questions.values():
+                alternatives = SEPARATOR.join(map(str, question.alternatives)) if question.alternatives else None
+                accepted = (SEPARATOR.join(sorted(question.accepted))
+                            if normalization is not None and question.accepted is not None else None)
+                question_entries.append((
+                    intern(question.id), intern(question.prompt), intern(question.answer),
+                    intern(question.image), FLAG_STRICT if question.strict else 0,
+                    intern(alternatives), intern(accepted)
+                ))
+
+    path_order = sorted(range(len(file_paths)), key=lambda i: file_paths[i])
+    normalization_id = intern(normalization)
+
+    string_table = bytearray()
+    string_data = bytearray()
+    for encoded in strings:
+        string_table += STRING_ENTRY.pack(len(string_data), len(encoded))
+        string_data += encoded
+
+    sections = [
+        bytes(string_table),
+        bytes(string_data),
+        b''.join(FOLDER_ENTRY.pack(*entry) for entry in folder_entries),
+        b''.join(FILE_ENTRY.pack(*entry) for entry in file_entries),
+        b''.join(PATH_ENTRY.pack(i) for i in path_order),
+        b''.join(QUESTION_ENTRY.pack(*entry) for entry in question_entries),
+    ]
+    offsets = []
+    position = HEADER.size
+    for section in sections:
+        offsets.append(position)
+        position += len(section)
+
+    header = HEADER.pack(MAGIC, VERSION, 0, len(strings), len(string_data), len(folder_entries),
+                         len(file_entries), len(question_entries), normalization_id, *offsets)
+    atomic_write_bytes(output_path, header + b''.join(sections))
+
+    return {
+        'folders': len(folder_entries),
+        'files': len(file_entries),
+        'questions': len(question_entries),
+        'bytes': position,
+    }
+
+
+class QuizBundle:
+    """Read-only, memory-mapped view of a bundle file"""
+
+    def __init__(self, path: str):
+        """Open a bundle
+
+        Args:
+            path: Path of the bundle file
+
+        Raises:
+            BundleError: If the file cannot be opened or is not a valid bundle
+        """
+        self.path = path
+        try:
+            with open(path, 'rb') as file:
+                self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise BundleError(f"Cannot open bundle {path}: {e}")
+
+        if len(self._map) < HEADER.size:
+            self.close()
+            raise BundleError(f"Bundle {path} is truncated")
+
+        (magic, version, _, self.string_count, data_size, self.folder_count, self.file_count,
+         self.question_count, normalization_id, self._strings_at, self._data_at, self._folders_at,
+         self._files_at, self._paths_at, self._questions_at) = HEADER.unpack_from(self._map, 0)
+
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise BundleError(f"{path} is not a QUIZR bundle (version {VERSION})")
+        if self._questions_at + self.question_count * QUESTION_ENTRY.size > len(self._map):
+            self.close()
+            raise BundleError(f"Bundle {path} is truncated")
+
+        # Signature of the normalization the stored accepted answers used
+        self.normalization = self._string(normalization_id)
+
+    def close(self) -> None:
+        """Unmap the bundle"""
+        self._map.close()
+
+    def _string(self, index: int) -> Optional[str]:
+        """Read a string from the string table"""
+        if index == NO_STRING:
+            return None
+        offset, length = STRING_ENTRY.unpack_from(self._map, self._strings_at + index * STRING_ENTRY.size)
+        start = self._data_at + offset
+        return self._map[start:start + length].decode('utf-8')
+
+    def _file_entry(self, index: int) -> Tuple[int, int, int, int]:
+        """Read a row of the file table"""
+        return FILE_ENTRY.unpack_from(self._map, self._files_at + index * FILE_ENTRY.size)
+
+    def discover_quizzes(self) -> Dict[str, List[str]]:
+        """List folders and their quiz files, like DataManager.discover_quizzes()
+
+        Returns:
+            Dict mapping folder paths to lists of quiz file paths
+        """
+        quizzes = {}
+        for i in range(self.folder_count):
+            path_id, first_file, file_count = FOLDER_ENTRY.unpack_from(self._map, self._folders_at + i * FOLDER_ENTRY.size)
+            quizzes[self._string(path_id)] = [self._string(self._file_entry(f)[0])
+                                              for f in range(first_file, first_file + file_count)]
+        return quizzes
+
+    def find_file(self, filepath: str) -> Optional[int]:
+        """Find a quiz file's index by binary search over its path
+
+        Args:
+            filepath: Quiz file path relative to the exercises directory
+
+        Returns:
+            File index or None if the bundle has no such file
+        """
+        low, high = 0, self.file_count
+        while low < high:
+            middle = (low + high) // 2
+            file_index = PATH_ENTRY.unpack_from(self._map, self._paths_at + middle * PATH_ENTRY.size)[0]
+            path = self._string(self._file_entry(file_index)[0])
+            if path == filepath:
+                return file_index
+            if path < filepath:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def get_question(self, index: int) -> Question:
+        """Read any question by its position in the bundle
+
+        Args:
+            index: Question index, 0 to question_count - 1
+
+        Returns:
+            Question object
+        """
+        if not 0 <= index < self.question_count:
+            raise IndexError(f"Question index {index} out of range")
+        id_id, prompt_id, answer_id, image_id, flags, alternatives_id, accepted_id = QUESTION_ENTRY.unpack_from(
+            self._map, self._questions_at + index * QUESTION_ENTRY.size)
+        alternatives = self._string(alternatives_id)
+        accepted = self._string(accepted_id)
+        return Question(
+            id=self._string(id_id),
+            prompt=self._string(prompt_id),
+            answer=self._string(answer_id),
+            image=self._string(image_id),
+            strict=bool(flags & FLAG_STRICT),
+            alternatives=alternatives.split(SEPARATOR) if alternatives is not None else [],
+            accepted=frozenset(accepted.split(SEPARATOR)) if accepted is not None else None
+        )
+
+    def load_quiz(self, filepath: str) -> Optional[Quiz]:
+        """Load a single quiz from the bundle
+
+        Args:
+            filepath: Quiz file path relative to the exercises directory
+
+        Returns:
+            Quiz object or None if the bundle has no such file
+        """
+        file_index = self.find_file(filepath)
+        if file_index is None:
+            return None
+
+        _, name_id, first_question, question_count = self._file_entry(file_index)
+        questions = {}
+        for i in range(first_question, first_question + question_count):
+            question = self.get_question(i)
+            questions[question.id] = question
+        return Quiz(name=self._string(name_id), filepath=filepath, questions=questions)
+
+
+def pack_quizzes(data_manager, output_path: str, quiz_files: Optional[List[str]] = None,
+                 skip_failed: bool = True) -> Dict[str, int]:
+    """Compile quiz files from the YAML tree into a bundle
+
+    Args:
+        data_manager: DataManager reading the YAML tree
+        output_path: Path of the bundle to write
+        quiz_files: Quiz files to include (default: all discovered quizzes)
+        skip_failed: Whether to leave out files that fail to load; if False,
+            no bundle is written when any file fails
+
+    Returns:
+        Counts from write_bundle(), plus 'skipped' for files that failed to load
+
+    Raises:
+        BundleError: If a file failed to load and skip_failed is False
+    """
+    wanted = set(quiz_files) if quiz_files is not None else None
+    selected = []
+    failed = []
+    for folder_path, files in data_manager.discover_quizzes().items():
+        for quiz_file in files:
+            if wanted is not None and quiz_file not in wanted:
+                continue
+            quiz = data_manager.load_quiz(quiz_file)
+            if quiz is None:
+                failed.append(quiz_file)
+                continue
+            selected.append((folder_path, quiz))
+
+    if failed and not skip_failed:
+        listed = ', '.join(failed[:3]) + (f" and {len(failed) - 3} more" if len(failed) > 3 else '')
+        raise BundleError(f"{len(failed)} quiz file(s) failed to load ({listed}); run 'quizr check'")
+    counts = write_bundle(output_path, selected, data_manager.normalizer.signature)
+    counts['skipped'] = len(failed)
+    return counts
+
+
+def tree_signature(data_manager) -> str:
+    """Get a digest identifying the current state of the YAML exercises tree
+
+    It changes whenever a quiz file is added, removed, renamed or modified,
+    or the answer normalization settings change.
+
+    Args:
+        data_manager: DataManager reading the YAML tree
+
+    Returns:
+        Hex digest
+    """
+    exercises_dir = data_manager.config.get_exercises_dir()
+    digest = hashlib.sha256(data_manager.normalizer.signature.encode('utf-8'))
+    quiz_files = sorted(f for files in data_manager._walk_exercises().values() for f in files)
+    for quiz_file in quiz_files:
+        try:
+            stat = os.stat(os.path.join(exercises_dir, *quiz_file.split('/')))
+            entry = f"{quiz_file}\0{stat.st_mtime_ns}\0{stat.st_size}\n"
+        except OSError:
+            entry = f"{quiz_file}\0-\n"
+        digest.update(entry.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def ensure_shared_bundle(data_manager) -> str:
+    """Get the shared bundle of the exercises tree, building it if it is stale
+
+    The bundle lives in the cache directory under a name derived from
+    tree_signature(), so every process looking at the same tree maps the
+    same read-only file and the page cache holds one copy of it. The first
+    process to notice a change builds the new bundle under a lock file and
+    renames it into place; others wait for it instead of parsing the tree
+    themselves. Bundles of older trees are removed once the new one exists;
+    processes still mapping them keep reading the old contents.
+
+    A bundle missing some quizzes would make them vanish for every process
+    using it, so none is published while any quiz file fails to load. The
+    failure is recorded next to where the bundle would be, and later
+    processes give up at once until the tree changes.
+
+    Args:
+        data_manager: DataManager reading the YAML tree
+
+    Returns:
+        Path of the up-to-date bundle
+
+    Raises:
+        BundleError: If the bundle could not be built, a quiz file fails to
+            load or another process took too long to build it
+    """
+    cache_dir = data_manager.config.get_cache_dir()
+    path = os.path.join(cache_dir, f"bank-{tree_signature(data_manager)[:16]}.qzb")
+    lock_path = path + '.lock'
+    failed_path = path + '.failed'
+    deadline = time.monotonic() + SHARED_WAIT_SECONDS
+
+    while not os.path.exists(path):
+        if os.path.exists(failed_path):
+            with open(failed_path, 'r', encoding='utf-8') as file:
+                raise BundleError(file.read())
+        try:
+            lock = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_path) > SHARED_STALE_LOCK_SECONDS:
+                    os.remove(lock_path)
+                    continue
+            except OSError:
+                continue  # The builder just finished
+            if time.monotonic() > deadline:
+                raise BundleError(f"Timed out waiting for another process to build {path}")
+            time.sleep(0.05)
+            continue
+        except OSError as e:
+            raise BundleError(f"Cannot lock {lock_path}: {e}")
+
+        try:
+            if not os.path.exists(path):
+                pack_quizzes(data_manager, path, skip_failed=False)
+        except BundleError as e:
+            try:
+                atomic_write_text(failed_path, str(e))
+            except OSError:
+                pass
+            raise
+        except OSError as e:
+            raise BundleError(f"Cannot build shared bundle {path}: {e}")
+        finally:
+            os.close(lock)
+            os.remove(lock_path)
+
+        stale = glob.glob(os.path.join(cache_dir, 'bank-*.qzb')) + glob.glob(os.path.join(cache_dir, 'bank-*.failed'))
+        for old_path in stale:
+            if old_path != path:
+                try:
+                    os.remove(old_path)
+                except OSError:
+                    pass  # Still mapped on Windows; removed by a later build
+    return path
@@ -4,26 +4,46 @@ Command-line interface for QUIZR
 
 import click
 import os
+import sqlite3
+import sys
+import time
+import zipfile
 from typing import Dict, Any
 from collections import defaultdict
 
-from .config import Config
-from .data_manager import DataManager
-from .quiz_engine import QuizEngine
+from .config import Config, set_cli_override, set_cli_overrides
+from .models import MODES, PRACTICE_MODES
+from .names import complete_names, load_names, suggest_names
 
 
 class QuizrCLI:
     """Main CLI class for QUIZR"""
     
-    def __init__(self):
-        """Initialize CLI"""
+    def __init__(self, seed: int = None):
+        """Initialize CLI
+        
+        Args:
+            seed: Seed for random question selection
+        """
         self.config = Config()
+        self.seed = seed
         self._refresh()
     
     def _refresh(self):
         """Refresh data manager and quiz engine to ensure fresh data"""
+        # Imported here so that shell completion, which only needs the
+        # command definitions, starts without loading YAML
+        from .data_manager import DataManager
+        from .quiz_engine import QuizEngine
+        
         self.data_manager = DataManager(self.config)
-        self.quiz_engine = QuizEngine(self.config, self.data_manager)
+        self.quiz_engine = QuizEngine(self.config, self.data_manager, self.seed)
+    
+    def _suggest_targets(self, target: str) -> None:
+        """Print the quiz and folder names closest to a target that matched nothing"""
+        suggestions = suggest_names(load_names(self.config), target)
+        if suggestions:
+            print(f"Did you mean: {', '.join(suggestions)}?")
     
     def list_quizzes(self) -> None:
         """List all available quizzes in a hierarchical format"""
@@ -79,14 +99,12 @@ class QuizrCLI:
                     for quiz_file in sorted(content['__files__']):
                         quiz_name = os.path.splitext(os.path.basename(quiz_file))[0]
                         
-                        # Try to load quiz and get question count, but don't show errors
-                        try:
-                            quiz = self.data_manager.load_quiz(quiz_file)
-                            question_count = quiz.get_question_count() if quiz else 0
-                            print(f"{file_indent}├── {quiz_name} ({question_count} questions)")
-                        except:
-                            # Skip files that can't be loaded
-                            continue
+                        # Load quiz to get question count, flagging files that fail
+                        quiz = self.data_manager.load_quiz(quiz_file)
+                        question_count = quiz.get_question_count() if quiz else 0
+                        error = self.data_manager.load_errors.get(quiz_file)
+                        note = f" [!] {error}" if error else ""
+                        print(f"{file_indent}├── {quiz_name} ({question_count} questions){note}")
                 
                 # Then recursively print subfolders
                 print_tree(content, prefix + "  ", depth + 1, current_path)
@@ -94,9 +112,13 @@ class QuizrCLI:
         # Print the tree
         print_tree(tree)
         
+        if self.data_manager.load_errors:
+            print()
+            print(f"{len(self.data_manager.load_errors)} quiz file(s) have problems. Run 'quizr check' for details.")
+        
         print()
         print("Usage: start <folder_name> [mode]")
-        print("Modes: spaced (default), shuffle, quick")
+        print("Modes: spaced (default), shuffle, quick, weak, exam, leeches")
         print()
         print("Examples:")
         print("  start A+              - Start all quizzes in the A+ folder")
@@ -104,15 +126,17 @@ class QuizrCLI:
         print("  start Port_Numbers    - Start a specific quiz file")
         print("  start CompTIA        - Start all quizzes in the CompTIA folder and subfolders")
     
-    def start_quiz(self, target: str, mode: str = 'spaced') -> None:
+    def start_quiz(self, target: str, mode: str = 'spaced', record_path: str = None) -> None:
         """Start a quiz session
         
         Args:
-            target: Exact name of quiz file (without .yaml) or folder
-            mode: Quiz mode (spaced, shuffle, quick)
+            target: Exact name of quiz file (without .yaml) or folder, or
+                None for every quiz
+            mode: Quiz mode (spaced, shuffle, quick, weak, exam, leeches)
+            record_path: File to write an answer transcript to for replay
         """
         self._refresh()  # Ensure fresh data
-        valid_modes = ['spaced', 'shuffle', 'quick']
+        valid_modes = MODES
         if mode not in valid_modes:
             print(f"Invalid mode: {mode}")
             print(f"Valid modes: {', '.join(valid_modes)}")
@@ -121,14 +145,18 @@ class QuizrCLI:
         # Ensure directories exist
         self.config.create_missing_directories()
         
+        counts = self.data_manager.auto_compact_progress()
+        if counts:
+            print(f"Progress file compacted: dropped {counts['dropped']} orphaned entries, "
+                  f"saved {counts['bytes_before'] - counts['bytes_after']:,} bytes")
+        
         try:
-            # Find matching quizzes - only show debug if no matches found
-            quiz_files = self.data_manager.find_quizzes_by_path(target, debug=False)
+            # Find matching quizzes
+            quiz_files = self.data_manager.find_quizzes_by_path(target, debug=False) if target is not None else None
             
-            if not quiz_files:
-                # If no matches found, try again with debug output
+            if quiz_files == []:
                 print(f"\nNo quiz found with name: {target}")
-                quiz_files = self.data_manager.find_quizzes_by_path(target, debug=True)
+                self._suggest_targets(target)
                 print("\nPlease note:")
                 print("1. Names are case-sensitive (e.g., 'A+' is different from 'a+')")
                 print("2. Special characters must match exactly (including '+')")
@@ -140,7 +168,7 @@ class QuizrCLI:
                 return
             
             # Run the quiz session - error handling is done in quiz_engine
-            session_stats = self.quiz_engine.run_quiz_session(target, mode)
+            session_stats = self.quiz_engine.run_quiz_session(target, mode, record_path)
             return session_stats
             
         except ValueError as e:
@@ -150,6 +178,433 @@ class QuizrCLI:
             print("2. Use the exact quiz name if targeting a specific file")
             print("\nRun 'quizr list' to see the full folder structure.")
     
+    def resume_quiz(self) -> None:
+        """Continue the last aborted quiz session from its checkpoint"""
+        self.quiz_engine.resume_session()
+    
+    def search_questions(self, terms: list, limit: int = 20, start_mode: str = None) -> None:
+        """Search prompts and answers, optionally starting a session on the hits
+        
+        Args:
+            terms: Words that must all appear in a question
+            limit: Maximum number of hits
+            start_mode: Practice mode (see PRACTICE_MODES) to start a session
+                over the hits with, or None
+        """
+        from .search_index import SearchIndex
+        from .session import QuizSession
+        
+        self._refresh()  # Ensure fresh data
+        try:
+            index = SearchIndex(self.config, self.data_manager)
+        except RuntimeError as e:
+            print(f"Error: {e}")
+            return
+        
+        try:
+            index.update()
+            hits = index.search(terms, limit)
+        finally:
+            index.close()
+        
+        query = ' '.join(terms)
+        if not hits:
+            print(f"No questions match: {query}")
+            return
+        
+        print(f"Search: {query} ({len(hits)} hits)")
+        print("-" * 52)
+        for hit in hits:
+            quiz_name = os.path.splitext(hit.quiz_filepath)[0]
+            print(f"  {quiz_name} [{hit.question_id}]")
+            print(f"    {hit.prompt}")
+        print("-" * 52)
+        
+        if start_mode is None:
+            return
+        
+        # Map hits back to loaded questions, keeping relevance order
+        questions = []
+        quizzes = {}
+        for hit in hits:
+            if hit.quiz_filepath not in quizzes:
+                quizzes[hit.quiz_filepath] = self.data_manager.load_quiz(hit.quiz_filepath)
+            quiz = quizzes[hit.quiz_filepath]
+            if not quiz:
+                continue
+            for question_id, question in quiz.questions.items():
+                if str(question_id) == hit.question_id:
+                    questions.append((hit.quiz_filepath, question))
+                    break
+        
+        exercises = [quiz.name for quiz in quizzes.values() if quiz]
+        questions = self.quiz_engine.order_questions(questions, start_mode)
+        session = QuizSession(self.quiz_engine, questions, start_mode, exercises)
+        self.quiz_engine.run_session(session, f"search '{query}'")
+    
+    def find_duplicates(self, threshold: float = 0.8, output: str = None) -> None:
+        """Report duplicate and near-duplicate questions across all quizzes
+        
+        Args:
+            threshold: Minimum similarity for near-duplicates (0-1)
+            output: File to write the JSON report to, or '-' for stdout
+        """
+        import json
+        from .dedupe import find_duplicates, iter_bank_questions
+        
+        self._refresh()  # Ensure fresh data
+        report = find_duplicates(iter_bank_questions(self.data_manager), threshold)
+        
+        if output == '-':
+            print(json.dumps(report, indent=2))
+            return
+        
+        print("Duplicate Questions")
+        print("-" * 52)
+        print(f"Questions Checked     : {report['questions']}")
+        print(f"Exact Duplicates      : {len(report['exact'])} groups")
+        print(f"Conflicting Answers   : {len(report['conflicts'])} prompts")
+        print(f"Near Duplicates       : {len(report['near'])} pairs (>= {threshold:.0%} similar)")
+        print("-" * 52)
+        
+        for group in report['exact']:
+            print(f"Exact: {group['prompt']}")
+            for ref in group['questions']:
+                print(f"  {ref['quiz']} [{ref['id']}]")
+        for conflict in report['conflicts']:
+            print(f"Conflict: {conflict['prompt']}")
+            for answer, refs in conflict['answers'].items():
+                locations = ', '.join(f"{ref['quiz']} [{ref['id']}]" for ref in refs)
+                print(f"  '{answer}': {locations}")
+        for pair in report['near']:
+            print(f"Near ({pair['prompt_similarity']:.0%}): {pair['a']['quiz']} [{pair['a']['id']}] "
+                  f"~ {pair['b']['quiz']} [{pair['b']['id']}]")
+        
+        if output:
+            with open(output, 'w', encoding='utf-8') as file:
+                json.dump(report, file, indent=2)
+            print(f"\nReport written to: {output}")
+    
+    def check_quizzes(self, as_json: bool = False) -> bool:
+        """Validate every quiz file and report problems
+        
+        Args:
+            as_json: Print issues as JSON instead of a readable report
+            
+        Returns:
+            True if no errors were found
+        """
+        import json
+        from .validation import QuizValidator, issues_as_dicts
+        
+        self._refresh()  # Ensure fresh data
+        issues, counts = QuizValidator(self.config, self.data_manager).validate()
+        errors = [issue for issue in issues if issue.level == 'error']
+        
+        if as_json:
+            print(json.dumps({'counts': counts, 'issues': issues_as_dicts(issues)}, indent=2))
+            return not errors
+        
+        current_file = None
+        for issue in sorted(issues, key=lambda i: (i.quiz_filepath, i.question_id or '')):
+            if issue.quiz_filepath != current_file:
+                current_file = issue.quiz_filepath
+                print(current_file)
+            location = f"[{issue.question_id}] " if issue.question_id else ""
+            print(f"  {issue.level.upper():<8} {location}{issue.message}")
+        
+        if issues:
+            print()
+        print("Quiz Check")
+        print("-" * 52)
+        print(f"Files                 : {counts['files']} ({counts['checked']} checked, {counts['cached']} unchanged)")
+        print(f"Errors                : {len(errors)}")
+        print(f"Warnings              : {len(issues) - len(errors)}")
+        print("-" * 52)
+        return not errors
+    
+    def show_images(self, rebuild: bool = False) -> None:
+        """Bring the image manifest up to date and summarize it
+        
+        Args:
+            rebuild: Rehash every image instead of only new or changed ones
+        """
+        from .images import previews_available
+        
+        manifest = self.data_manager.get_image_manifest()
+        counts = manifest.refresh(rebuild=True) if rebuild else {'hashed': 0, 'removed': 0}
+        if self.config.get('image_previews'):
+            previews = f"{sum(1 for entry in manifest.entries.values() if entry.preview)} cached"
+            if not previews_available():
+                previews = "unavailable (pip install Pillow)"
+        else:
+            previews = "off (set image_previews: true)"
+        
+        print(f"Image Manifest: {manifest.images_dir}")
+        print("-" * 52)
+        print(f"Images                : {len(manifest)}")
+        print(f"Total Size            : {sum(entry.size for entry in manifest.entries.values()):,} bytes")
+        if rebuild:
+            print(f"Rehashed              : {counts['hashed']}")
+        print(f"Previews              : {previews}")
+        print("-" * 52)
+    
+    def show_doctor(self, perf: bool = False, command: tuple = (), profile_output: str = None) -> None:
+        """Show bank statistics, optionally with a timing breakdown of a command
+        
+        Args:
+            perf: Whether to run a command with instrumentation enabled
+            command: quizr command to profile (default: global progress)
+            profile_output: File to write cProfile statistics to
+        """
+        from .compaction import count_entries
+        from .profiling import profile_call, profiler
+        
+        if perf:
+            args = [*command] or ['progress']  # `list` is shadowed by the list command below
+            profiler.reset()
+            try:
+                _, wall_time = profile_call(lambda: main.main(args=args, standalone_mode=False, obj='doctor'),
+                                            profile_output)
+            except (click.ClickException, click.exceptions.Abort, SystemExit) as e:
+                print(f"Command failed: {e}")
+                return
+            print()
+            print(f"Performance: quizr {' '.join(args)}")
+            print("-" * 66)
+            for line in profiler.report(wall_time):
+                print(line)
+            print("-" * 66)
+            if profile_output:
+                print(f"cProfile statistics written to: {profile_output}")
+            print()
+        
+        self._refresh()  # Ensure fresh data
+        start = time.perf_counter()
+        quizzes = self.data_manager.discover_quizzes()
+        quiz_files = [quiz_file for files in quizzes.values() for quiz_file in files]
+        questions = 0
+        for quiz_file in quiz_files:
+            quiz = self.data_manager.load_quiz(quiz_file)
+            if quiz:
+                questions += len(quiz.questions)
+        load_time = time.perf_counter() - start
+        
+        progress_file = self.config.get_progress_file()
+        progress_size = os.path.getsize(progress_file) if os.path.exists(progress_file) else 0
+        
+        print("Question Bank")
+        print("-" * 52)
+        print(f"Source                : {self.data_manager.bundle.path if self.data_manager.bundle else self.config.get_exercises_dir()}")
+        print(f"Folders               : {len(quizzes)}")
+        print(f"Exercises             : {len(quiz_files)}")
+        print(f"Questions             : {questions}")
+        print(f"Failed to Load        : {len(self.data_manager.load_errors)}")
+        print(f"Full Load Time        : {load_time * 1000:.1f} ms")
+        print(f"Progress File Size    : {progress_size:,} bytes")
+        print(f"Progress Entries      : {count_entries(self.data_manager.progress_data)}")
+        print("-" * 52)
+    
+    def show_config(self) -> None:
+        """Show the effective configuration and the layer each setting came from"""
+        paths = self.config.get_file_paths()
+        
+        print("Configuration")
+        print("-" * 52)
+        for layer, path in paths.items():
+            status = "" if os.path.exists(path) else " (not found)"
+            print(f"{layer.capitalize() + ' File':<22}: {path}{status}")
+        print("-" * 52)
+        for key in sorted(self.config.SCHEMA):
+            source = self.config.sources.get(key, 'default')
+            note = "" if source == 'default' else f"  [{source}]"
+            print(f"{key:<30} = {self.config.get(key)!r}{note}")
+        print("-" * 52)
+        print("Override any setting with QUIZR_<SETTING> or `quizr --set setting=value`.")
+    
+    def import_bank(self, source: str, source_format: str = None, folder: str = 'Imported',
+                    quiz: str = None) -> bool:
+        """Import questions from a CSV, JSON or Anki file into the exercises tree
+        
+        Args:
+            source: File to import
+            source_format: File format (default: from the extension)
+            folder: Folder for questions that don't name one
+            quiz: Quiz name for questions that don't name one
+            
+        Returns:
+            True if the import succeeded
+        """
+        from .interchange import import_cards
+        
+        start = time.perf_counter()
+        try:
+            counts = import_cards(self.config, source, source_format, folder, quiz)
+        except (OSError, ValueError, zipfile.BadZipFile, sqlite3.Error) as e:
+            print(f"Error importing {source}: {e}")
+            return False
+        seconds = time.perf_counter() - start
+        
+        print(f"Imported: {source}")
+        print("-" * 52)
+        print(f"Questions Imported    : {counts['imported']}")
+        print(f"Already Present       : {counts['duplicates']}")
+        print(f"Quiz Files            : {len(counts['files'])} ({len(counts['created'])} new)")
+        print(f"Import Time           : {seconds:.2f} s"
+              + (f" ({(counts['imported'] + counts['duplicates']) / seconds:,.0f} questions/sec)" if seconds > 0 else ""))
+        print("-" * 52)
+        for quiz_file in counts['created'][:20]:
+            print(f"  + {quiz_file}")
+        if len(counts['created']) > 20:
+            print(f"  ... and {len(counts['created']) - 20} more")
+        return True
+    
+    def export_bank(self, output: str, target: str = None, output_format: str = None) -> bool:
+        """Export quizzes to a CSV or JSON file
+        
+        Args:
+            output: File to write
+            target: Only export this quiz or folder
+            output_format: File format (default: from the extension)
+            
+        Returns:
+            True if the export succeeded
+        """
+        from .interchange import export_cards
+        
+        self._refresh()  # Ensure fresh data
+        if target:
+            try:
+                quiz_files = self.data_manager.find_quizzes_by_path(target)
+            except ValueError as e:
+                print(f"\nError: {str(e)}")
+                return False
+            if not quiz_files:
+                print(f"No quizzes found for: {target}")
+                return False
+        else:
+            quiz_files = sorted(f for files in self.data_manager.discover_quizzes().values() for f in files)
+        
+        try:
+            count = export_cards(self.data_manager, output, quiz_files, output_format)
+        except (OSError, ValueError) as e:
+            print(f"Error exporting to {output}: {e}")
+            return False
+        
+        print(f"Exported {count} questions from {len(quiz_files)} quizzes to {output}")
+        for quiz_file, error in sorted(self.data_manager.load_errors.items()):
+            print(f"  Warning: skipped {quiz_file}: {error}")
+        return True
+    
+    def export_progress(self, output: str, stores: tuple = (), output_format: str = None,
+                        workers: int = 0) -> bool:
+        """Flatten progress stores into a Parquet or CSV table
+        
+        Args:
+            output: File to write
+            stores: Progress files to merge, one per profile (default: the
+                configured progress file)
+            output_format: 'parquet' or 'csv' (default: from the extension)
+            workers: Processes reading stores in parallel (0 = one per CPU)
+            
+        Returns:
+            True if every store was exported
+        """
+        from .progress_export import export_progress
+        
+        stores = [*stores] or [self.config.get_progress_file()]
+        try:
+            counts = export_progress(stores, output, output_format, workers)
+        except (OSError, ValueError) as e:
+            print(f"Error exporting to {output}: {e}")
+            return False
+        
+        for store, error in counts['errors']:
+            print(f"  Warning: skipped {store}: {error}")
+        if not counts['stores']:
+            print(f"Nothing exported; {output} was not written")
+            return False
+        
+        print(f"Exported: {output}")
+        print("-" * 52)
+        print(f"Profiles              : {counts['stores']}")
+        print(f"Questions             : {counts['questions']}")
+        print(f"Rows                  : {counts['rows']}")
+        print("-" * 52)
+        return not counts['errors']
+    
+    def pack_bank(self, output: str = None, target: str = None) -> None:
+        """Compile the YAML exercises tree into a packed bundle
+        
+        Args:
+            output: Bundle file to write (default: the configured bundle_file,
+                or Exercises.qzb in the base directory)
+            target: Only pack this quiz or folder
+        """
+        from .bundle import pack_quizzes
+        from .data_manager import DataManager
+        
+        # Always read the editable YAML tree, even if a bundle is mounted
+        source = DataManager(self.config, mount_bundle=False)
+        output = output or self.config.get_bundle_file() or os.path.join(self.config.base_dir, 'Exercises.qzb')
+        
+        quiz_files = None
+        if target:
+            try:
+                quiz_files = source.find_quizzes_by_path(target)
+            except ValueError as e:
+                print(f"\nError: {str(e)}")
+                return
+            if not quiz_files:
+                print(f"No quizzes found for: {target}")
+                return
+        
+        counts = pack_quizzes(source, output, quiz_files)
+        
+        print(f"Packed: {output}")
+        print("-" * 52)
+        print(f"Folders               : {counts['folders']}")
+        print(f"Exercises             : {counts['files']}")
+        print(f"Questions             : {counts['questions']}")
+        print(f"Bundle Size           : {counts['bytes']:,} bytes")
+        if counts['skipped']:
+            print(f"Skipped               : {counts['skipped']} (run 'quizr check')")
+        print("-" * 52)
+    
+    def replay_session(self, transcript_path: str) -> bool:
+        """Replay a recorded session transcript and report any divergence
+        
+        Args:
+            transcript_path: Transcript written by `start --record`
+            
+        Returns:
+            True if the replay matched the recording
+        """
+        from .quiz_engine import replay_transcript
+        from .session import load_transcript
+        
+        try:
+            transcript = load_transcript(transcript_path)
+        except (OSError, ValueError) as e:
+            print(f"Error: could not read transcript: {e}")
+            return False
+        
+        results = replay_transcript(self.config, transcript)
+        seconds = results['seconds']
+        
+        print(f"Replay: {transcript_path}")
+        print("-" * 52)
+        print(f"Target                : {transcript.get('target')} ({transcript['mode']}, seed {transcript['seed']})")
+        print(f"Answers Replayed      : {results['answers']}")
+        print(f"Correct Answers       : {results['correct']}")
+        print(f"Replay Time           : {seconds * 1000:.1f} ms"
+              + (f" ({results['answers'] / seconds:.0f} answers/sec)" if seconds > 0 else ""))
+        print(f"Mismatches            : {len(results['mismatches'])}")
+        print("-" * 52)
+        for mismatch in results['mismatches']:
+            print(f"  {mismatch}")
+        return not results['mismatches']
+    
     def show_progress(self, target: str = 'global') -> None:
         """Show progress statistics
         
@@ -162,6 +617,58 @@ class QuizrCLI:
         else:
             self._show_target_progress(target)
     
+    def show_progress_tree(self) -> None:
+        """Show mastery for every folder and quiz as an indented tree"""
+        self._refresh()  # Ensure fresh data
+        tree = self.data_manager.get_mastery_tree()
+        
+        if not tree.quizzes:
+            print("No quiz files found.")
+            return
+        
+        print("Mastery: All Topics")
+        print("-" * 72)
+        for path, depth, rollup in tree.walk():
+            name = path.rsplit('/', 1)[-1]
+            if name.endswith('.yaml'):
+                name = name[:-5]
+            else:
+                name += '/'
+            label = ('  ' * depth + name)[:30]
+            print(f"{label:<30} {self._mastery_bar(rollup.mastery)} {rollup.mastery * 100:>3.0f}%"
+                  f"  {rollup.seen}/{rollup.questions} seen")
+        print("-" * 72)
+        print(f"{'Overall':<30} {self._mastery_bar(tree.total.mastery)} {tree.total.mastery * 100:>3.0f}%"
+              f"  {tree.total.seen}/{tree.total.questions} seen")
+    
+    @staticmethod
+    def _mastery_bar(mastery: float, width: int = 20) -> str:
+        """Render a mastery fraction as a bar"""
+        filled = int(round(mastery * width))
+        return '█' * filled + '░' * (width - filled)
+    
+    def compact_progress(self) -> None:
+        """Drop orphaned progress entries and roll old activity into months"""
+        self._refresh()  # Ensure fresh data
+        try:
+            counts = self.data_manager.compact_progress()
+        except ValueError as e:
+            print(f"Error: {str(e)}")
+            return
+        self._print_compaction(counts)
+    
+    def _print_compaction(self, counts: dict) -> None:
+        """Print the results of a progress compaction"""
+        saved = counts['bytes_before'] - counts['bytes_after']
+        print(f"Compacted: {self.config.get_progress_file()}")
+        print("-" * 52)
+        print(f"Question Entries      : {counts['entries']}")
+        print(f"Orphans Dropped       : {counts['dropped']}")
+        print(f"Days Rolled Up        : {counts['days_rolled']}")
+        print(f"File Size             : {counts['bytes_before']:,} -> {counts['bytes_after']:,} bytes")
+        print(f"Bytes Saved           : {saved:,}")
+        print("-" * 52)
+    
     def _show_global_progress(self) -> None:
         """Show global progress statistics"""
         global_progress = self.data_manager.global_progress
@@ -171,23 +678,11 @@ class QuizrCLI:
         total_folders = len(all_quizzes)
         total_exercises = sum(len(files) for files in all_quizzes.values())
         
-        total_questions = 0
-        questions_seen = 0
-        correct_answers = 0
-        total_attempts = 0
-        
-        for folder_path, quiz_files in all_quizzes.items():
-            for quiz_file in quiz_files:
-                full_path = os.path.join(folder_path, quiz_file) if folder_path != 'root' else quiz_file
-                quiz = self.data_manager.load_quiz(full_path)
-                if quiz:
-                    for question_id in quiz.questions:
-                        progress = self.data_manager.get_question_progress(full_path, question_id)
-                        total_questions += 1
-                        if progress.attempts > 0:
-                            questions_seen += 1
-                            total_attempts += progress.attempts
-                            correct_answers += progress.correct
+        stats = self.data_manager.calculate_global_stats()
+        total_questions = stats['total_questions']
+        questions_seen = stats['questions_seen']
+        correct_answers = stats['correct_answers']
+        total_attempts = stats['total_attempts']
         
         print("Progress: All Topics")
         print("-" * 52)
@@ -205,8 +700,10 @@ class QuizrCLI:
         print("-" * 52)
         
         # Show recent activity
-        if global_progress.daily_log:
-            recent_days = sorted(global_progress.daily_log.items(), reverse=True)[:7]
+        # Older activity is rolled up into 'YYYY-MM' months; only list days
+        recent_days = sorted(((day, count) for day, count in global_progress.daily_log.items()
+                              if len(str(day)) == 10), reverse=True)[:7]
+        if recent_days:
             print("Recent Activity:")
             for date, count in recent_days:
                 print(f"  {date}: {count} questions")
@@ -221,6 +718,7 @@ class QuizrCLI:
         
         if not matching_files:
             print(f"No quizzes found for: {target}")
+            self._suggest_targets(target)
             return
         
         # Determine if this is a single quiz or multiple
@@ -281,6 +779,7 @@ class QuizrCLI:
         print(f"Questions Answered    : {stats['questions_seen']} ({stats['completion_rate']:.1f}%)")
         print(f"Correct Answers       : {stats['correct_answers']}")
         print(f"Accuracy Rate         : {stats['accuracy_rate']:.1f}%" if stats['total_attempts'] > 0 else "Accuracy Rate         : N/A")
+        print(f"Mastery               : {stats['mastery']:.1f}%")
         print("-" * 52)
         
         print("Exercises:")
@@ -322,20 +821,68 @@ class QuizrCLI:
 
 
 # CLI command definitions
+def complete_target(ctx, param, incomplete):
+    """Complete quiz and folder names from the name index, without reading any quiz"""
+    # Warnings about bad settings would land in the middle of the command line
+    return complete_names(load_names(Config(quiet=True)), incomplete)
+
+
+def complete_mode(ctx, param, incomplete):
+    """Complete quiz modes"""
+    return [mode for mode in MODES if mode.startswith(incomplete.lower())]
+
+
 @click.group(invoke_without_command=True)
+@click.option('--profile', is_flag=True, help='Print a timing breakdown to stderr (same as QUIZR_PROFILE=1)')
+@click.option('--set', 'settings', multiple=True, metavar='KEY=VALUE',
+              help='Override a configuration setting for this run (repeatable)')
 @click.pass_context
-def main(ctx):
+def main(ctx, profile, settings):
     """QUIZR - Command-line quiz tool with spaced repetition"""
+    from .profiling import profiler
+    
+    try:
+        set_cli_overrides(settings)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='--set')
+    
+    # `doctor --perf` runs commands through main and prints its own report
+    if (profile or profiler.enabled) and ctx.obj != 'doctor':
+        profiler.enabled = True
+        start = time.perf_counter()
+        
+        def print_report():
+            for line in profiler.report(time.perf_counter() - start):
+                print(line, file=sys.stderr)
+        ctx.call_on_close(print_report)
+    
     if ctx.invoked_subcommand is None:
         print("QUIZR - Command-line quiz tool with spaced repetition")
         print()
         print("Available commands:")
         print("  list                    - List all available quizzes")
         print("  start <target> [mode]   - Start a quiz session")
+        print("  start --resume          - Continue the last aborted session")
+        print("  start --leeches         - Drill the questions you keep missing")
         print("  progress [target]       - Show progress statistics")
+        print("  progress --tree         - Show mastery across all folders")
+        print("  progress --compact      - Prune orphaned progress entries")
+        print("  check                   - Validate quiz files")
+        print("  images [--rebuild]      - Update the manifest of images/")
+        print("  pack [output]           - Compile quizzes into a bundle file")
+        print("  import <file>           - Import questions from CSV, JSON or Anki")
+        print("  export <file> [target]  - Export questions to CSV or JSON")
+        print("  export-progress <file>  - Export progress to Parquet or CSV")
+        print("  replay <transcript>     - Replay a recorded session")
+        print("  search <terms>          - Search questions by content")
+        print("  dedupe                  - Find duplicate questions")
+        print("  serve                   - Run the headless JSON-lines server")
+        print("  doctor [--perf]         - Show bank statistics and timings")
+        print("  config                  - Show the effective configuration")
+        print("  completion <shell>      - Print the tab completion script")
         print("  quit                    - Exit the program")
         print()
-        print("Modes: spaced (default), shuffle, quick")
+        print("Modes: spaced (default), shuffle, quick, weak, exam, leeches")
         print("Examples:")
         print("  quizr list")
         print("  quizr start network+ spaced")
@@ -351,20 +898,213 @@ def list():
 
 
 @main.command()
-@click.argument('target')
-@click.argument('mode', default='spaced')
-def start(target, mode):
+@click.argument('target', required=False, shell_complete=complete_target)
+@click.argument('mode', default='spaced', shell_complete=complete_mode)
+@click.option('--seed', type=int, default=None, help='Seed for random question selection')
+@click.option('--record', 'record_path', default=None, help='Write an answer transcript for `replay`')
+@click.option('--count', type=int, default=None, help='Number of questions in exam mode')
+@click.option('--minutes', type=float, default=None, help='Time limit in exam mode (0 = untimed)')
+@click.option('--choices', is_flag=True, help='Answer by picking from numbered options')
+@click.option('--resume', is_flag=True, help='Continue the last aborted session')
+@click.option('--leeches', is_flag=True, help='Drill the most-missed questions (of TARGET, or of every quiz)')
+def start(target, mode, seed, record_path, count, minutes, choices, resume, leeches):
     """Start a quiz session"""
+    if not target and not resume and not leeches:
+        raise click.UsageError("Missing argument 'TARGET'.")
+    if leeches:
+        mode = 'leeches'
+    overrides = [('--choices', 'multiple_choice', True if choices else None),
+                 ('--count', 'exam_question_count', count),
+                 ('--minutes', 'exam_time_limit', minutes)]
+    for option, key, value in overrides:
+        if value is None:
+            continue
+        try:
+            set_cli_override(key, value)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint=option)
+    cli = QuizrCLI(seed)
+    if resume:
+        cli.resume_quiz()
+    else:
+        cli.start_quiz(target, mode, record_path)
+
+
+@main.command()
+@click.argument('transcript')
+def replay(transcript):
+    """Replay a recorded session without changing progress"""
     cli = QuizrCLI()
-    cli.start_quiz(target, mode)
+    if not cli.replay_session(transcript):
+        raise SystemExit(1)
 
 
 @main.command()
-@click.argument('target', default='global')
-def progress(target):
+@click.argument('target', default='global', shell_complete=complete_target)
+@click.option('--compact', is_flag=True, help='Drop orphaned entries and roll old activity into months')
+@click.option('--tree', is_flag=True, help='Show mastery for every folder and quiz')
+def progress(target, compact, tree):
     """Show progress statistics"""
     cli = QuizrCLI()
-    cli.show_progress(target)
+    if compact:
+        cli.compact_progress()
+    elif tree:
+        cli.show_progress_tree()
+    else:
+        cli.show_progress(target)
+
+
+@main.command()
+@click.option('--json', 'as_json', is_flag=True, help='Print issues as JSON')
+def check(as_json):
+    """Validate all quiz files"""
+    cli = QuizrCLI()
+    if not cli.check_quizzes(as_json):
+        raise SystemExit(1)
+
+
+@main.command()
+@click.option('--rebuild', is_flag=True, help='Rehash every image, not just new or changed ones')
+def images(rebuild):
+    """Update and summarize the manifest of the images directory"""
+    cli = QuizrCLI()
+    cli.show_images(rebuild)
+
+
+@main.command(name='export-progress')
+@click.argument('output')
+@click.argument('stores', nargs=-1)
+@click.option('--format', 'output_format', type=click.Choice(['parquet', 'csv']),
+              help='Output format (default: from the extension, or Parquet if pyarrow is installed and CSV if not)')
+@click.option('--workers', type=int, default=0, help='Processes reading stores in parallel (0 = one per CPU)')
+def export_progress(output, stores, output_format, workers):
+    """Flatten progress stores into a Parquet or CSV table for analysis"""
+    cli = QuizrCLI()
+    if not cli.export_progress(output, stores, output_format, workers):
+        raise SystemExit(1)
+
+
+@main.command()
+@click.argument('output', required=False)
+@click.option('--target', default=None, shell_complete=complete_target, help='Only pack this quiz or folder')
+def pack(output, target):
+    """Compile the exercises tree into a single bundle file"""
+    cli = QuizrCLI()
+    cli.pack_bank(output, target)
+
+
+@main.command(name='import')
+@click.argument('source')
+@click.option('--format', 'source_format', type=click.Choice(['csv', 'tsv', 'json', 'jsonl', 'apkg']),
+              help='Source format (default: from the file extension)')
+@click.option('--folder', default='Imported', help='Folder for questions that do not name one')
+@click.option('--quiz', default=None, help='Quiz name for questions that do not name one')
+def import_(source, source_format, folder, quiz):
+    """Import questions from CSV, JSON or an Anki .apkg deck"""
+    cli = QuizrCLI()
+    if not cli.import_bank(source, source_format, folder, quiz):
+        raise SystemExit(1)
+
+
+@main.command()
+@click.argument('output')
+@click.argument('target', required=False, shell_complete=complete_target)
+@click.option('--format', 'output_format', type=click.Choice(['csv', 'tsv', 'json', 'jsonl']),
+              help='Output format (default: from the file extension)')
+def export(output, target, output_format):
+    """Export quizzes to CSV or JSON"""
+    cli = QuizrCLI()
+    if not cli.export_bank(output, target, output_format):
+        raise SystemExit(1)
+
+
+@main.command()
+@click.argument('terms', nargs=-1, required=True)
+@click.option('--limit', default=20, help='Maximum number of hits')
+@click.option('--start', 'start_mode', type=click.Choice(PRACTICE_MODES), default=None,
+              help='Start a practice session over the hits in this mode')
+def search(terms, limit, start_mode):
+    """Search questions by prompt and answer text"""
+    cli = QuizrCLI()
+    cli.search_questions(terms, limit, start_mode)
+
+
+@main.command()
+@click.option('--threshold', default=0.8, type=click.FloatRange(0.0, 1.0),
+              help='Minimum word overlap for near-duplicates (0-1)')
+@click.option('--output', '-o', default=None, help="Write the JSON report to a file ('-' for stdout)")
+def dedupe(threshold, output):
+    """Find duplicate and near-duplicate questions"""
+    cli = QuizrCLI()
+    cli.find_duplicates(threshold, output)
+
+
+@main.command()
+@click.option('--host', default='127.0.0.1', help='TCP host to bind')
+@click.option('--port', default=8765, help='TCP port to bind')
+@click.option('--socket', 'socket_path', default=None, help='Unix socket path to bind instead of TCP')
+def serve(host, port, socket_path):
+    """Run the headless JSON-lines quiz server"""
+    from .server import serve as run_server
+    run_server(Config(), host, port, socket_path)
+
+
+@main.command()
+@click.argument('target', shell_complete=complete_target)
+@click.option('--mode', default='quick', shell_complete=complete_mode, help='Quiz mode each client uses')
+@click.option('--clients', default=50, help='Number of concurrent clients')
+@click.option('--duration', default=10.0, help='Test length in seconds')
+@click.option('--host', default=None, help='Host of a running server (default: start one in-process)')
+@click.option('--port', default=8765, help='Port of a running server')
+@click.option('--socket', 'socket_path', default=None, help='Unix socket of a running server')
+def loadtest(target, mode, clients, duration, host, port, socket_path):
+    """Measure server throughput and latency with concurrent clients"""
+    import asyncio
+    from .loadtest import run_load_test
+    
+    # Without an explicit server address, test an in-process server
+    config = None if (host or socket_path) else Config()
+    results = asyncio.run(run_load_test(target, mode, clients, duration, host or '127.0.0.1',
+                                        port, socket_path, config))
+    
+    print("Load Test Results")
+    print("-" * 52)
+    print(f"Clients               : {results['clients']}")
+    print(f"Requests              : {results['requests']}")
+    print(f"Errors                : {results['errors']}")
+    print(f"Requests/sec          : {results['requests_per_second']:.0f}")
+    print(f"Latency p50           : {results['p50_ms']:.2f} ms")
+    print(f"Latency p95           : {results['p95_ms']:.2f} ms")
+    print(f"Latency p99           : {results['p99_ms']:.2f} ms")
+    print(f"Latency max           : {results['max_ms']:.2f} ms")
+    print("-" * 52)
+
+
+@main.command(context_settings={'ignore_unknown_options': True})
+@click.option('--perf', is_flag=True, help='Profile a command and show where its time went')
+@click.option('--profile-out', 'profile_output', help='Write cProfile statistics to this file')
+@click.argument('command', nargs=-1, type=click.UNPROCESSED)
+def doctor(perf, profile_output, command):
+    """Show bank statistics and, with --perf, a timing breakdown of COMMAND"""
+    cli = QuizrCLI()
+    cli.show_doctor(perf or bool(profile_output), command, profile_output)
+
+
+@main.command()
+def config():
+    """Show the effective configuration and where each setting comes from"""
+    cli = QuizrCLI()
+    cli.show_config()
+
+
+@main.command()
+@click.argument('shell', type=click.Choice(['bash', 'zsh', 'fish']))
+def completion(shell):
+    """Print the script that enables tab completion in SHELL"""
+    from click.shell_completion import get_completion_class
+    
+    completer = get_completion_class(shell)(main, {}, 'quizr', '_QUIZR_COMPLETE')
+    click.echo(completer.source())
 
 
 @main.command()
@@ -0,0 +1,118 @@
+"""
+Progress compaction for QUIZR - prunes dead entries and old history from the progress store
+"""
+
+from datetime import date, timedelta
+from typing import Any, Dict, Iterator, Optional, Set, Tuple
+
+
+def _is_quiz_file(key: str) -> bool:
+    """Check if a progress key names a quiz file rather than a folder"""
+    return key.endswith(('.yaml', '.yml'))
+
+
+def has_attempts(progress: Any) -> bool:
+    """Check if a question progress entry records anything"""
+    return isinstance(progress, dict) and bool(progress.get('attempts'))
+
+
+def iter_entries(progress_data: Dict[str, Any], prefix: str = '') -> Iterator[Tuple[str, Any, Any]]:
+    """Walk the question entries of a progress tree
+
+    Args:
+        progress_data: Nested folder -> quiz file -> question id mapping
+        prefix: Path of progress_data within the full tree
+
+    Yields:
+        Tuples of (quiz file path, question id, progress entry)
+    """
+    for key, value in progress_data.items():
+        if not isinstance(value, dict):
+            continue
+        path = prefix + str(key)
+        if _is_quiz_file(path):
+            for question_id, progress in value.items():
+                yield path, question_id, progress
+        else:
+            yield from iter_entries(value, path + '/')
+
+
+def count_entries(progress_data: Dict[str, Any], answered: bool = False) -> int:
+    """Count question entries in a progress tree
+
+    Args:
+        progress_data: Nested folder -> quiz file -> question id mapping
+        answered: Only count entries with at least one attempt
+
+    Returns:
+        Number of question entries
+    """
+    return sum(1 for _, _, progress in iter_entries(progress_data) if not answered or has_attempts(progress))
+
+
+def prune_progress(progress_data: Dict[str, Any], live: Dict[str, Optional[Set[str]]],
+                   prefix: str = '') -> Tuple[Dict[str, Any], int]:
+    """Drop progress entries for quizzes and questions that no longer exist
+
+    Entries that were never answered are dropped too; they are created as a
+    side effect of looking up progress and carry no information.
+
+    Args:
+        progress_data: Nested folder -> quiz file -> question id mapping
+        live: Quiz file paths mapped to their question ids, or to None for
+            quizzes that failed to load (their entries are kept as they are)
+        prefix: Path of progress_data within the full tree
+
+    Returns:
+        Tuple of (pruned tree, number of question entries dropped)
+    """
+    pruned = {}
+    dropped = 0
+    for key, value in progress_data.items():
+        path = prefix + str(key)
+        if not isinstance(value, dict):
+            continue
+
+        if _is_quiz_file(path) and path in live:
+            question_ids = live[path]
+            kept = {question_id: progress for question_id, progress in value.items()
+                    if has_attempts(progress) and (question_ids is None or str(question_id) in question_ids)}
+            dropped += len(value) - len(kept)
+            if kept:
+                pruned[key] = kept
+        elif _is_quiz_file(path):
+            dropped += len(value)
+        else:
+            subtree, subtree_dropped = prune_progress(value, live, path + '/')
+            dropped += subtree_dropped
+            if subtree:
+                pruned[key] = subtree
+    return pruned, dropped
+
+
+def roll_up_daily_log(daily_log: Dict[str, int], keep_days: int, today: date) -> Tuple[Dict[str, int], int]:
+    """Merge daily activity older than keep_days into monthly totals
+
+    Days are keyed 'YYYY-MM-DD' and months 'YYYY-MM', so the log still sorts
+    chronologically.
+
+    Args:
+        daily_log: Activity log mapping dates to questions reviewed
+        keep_days: Number of most recent days to keep individually
+        today: Current date
+
+    Returns:
+        Tuple of (new log, number of days rolled into months)
+    """
+    cutoff = (today - timedelta(days=keep_days)).isoformat()
+    rolled = {}
+    days_rolled = 0
+    for day, count in daily_log.items():
+        day = str(day)
+        if len(day) == 10 and day < cutoff:
+            month = day[:7]
+            rolled[month] = rolled.get(month, 0) + count
+            days_rolled += 1
+        else:
+            rolled[day] = rolled.get(day, 0) + count
+    return dict(sorted(rolled.items())), days_rolled
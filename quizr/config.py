@@ -1,30 +1,186 @@
 """
 Configuration management for QUIZR
+
+Settings are layered, later layers overriding earlier ones:
+
+1. Built-in defaults (Config.DEFAULT_CONFIG)
+2. System file: /etc/quizr/config.yaml (QUIZR_SYSTEM_CONFIG overrides the path)
+3. User file: ~/.config/quizr/config.yaml (QUIZR_CONFIG overrides the path)
+4. Environment variables: QUIZR_<SETTING>, e.g. QUIZR_FUZZY_THRESHOLD=85
+5. Command-line flags: quizr --set fuzzy_threshold=85
+
+Every value is checked against Config.SCHEMA. The merged file layers are
+cached in the user cache directory, keyed by the files' modification times,
+so the YAML is only parsed again after a file changes.
 """
 
+import json
 import os
 import sys
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 from pathlib import Path
 
 
+# Overrides from the command line, applied on top of every other layer
+CLI_OVERRIDES: Dict[str, Any] = {}
+
+# Bump when the cached form changes so stale caches are ignored
+CACHE_VERSION = 1
+
+# Spellings accepted for boolean settings given as text
+BOOL_VALUES = {'true': True, 'yes': True, 'on': True, '1': True,
+               'false': False, 'no': False, 'off': False, '0': False}
+
+
+def _system_config_path() -> str:
+    """Get the path of the system-wide configuration file"""
+    if os.environ.get('QUIZR_SYSTEM_CONFIG'):
+        return os.environ['QUIZR_SYSTEM_CONFIG']
+    if sys.platform.startswith('win'):
+        return os.path.join(os.environ.get('PROGRAMDATA', 'C:\\ProgramData'), 'quizr', 'config.yaml')
+    return '/etc/quizr/config.yaml'
+
+
+def _user_config_path() -> str:
+    """Get the path of the user's configuration file"""
+    if os.environ.get('QUIZR_CONFIG'):
+        return os.environ['QUIZR_CONFIG']
+    if sys.platform.startswith('win') and os.environ.get('APPDATA'):
+        return os.path.join(os.environ['APPDATA'], 'quizr', 'config.yaml')
+    config_home = os.environ.get('XDG_CONFIG_HOME') or os.path.join(str(Path.home()), '.config')
+    return os.path.join(config_home, 'quizr', 'config.yaml')
+
+
+def _compiled_cache_path() -> str:
+    """Get the path of the compiled configuration cache"""
+    if sys.platform.startswith('win') and os.environ.get('LOCALAPPDATA'):
+        cache_home = os.environ['LOCALAPPDATA']
+    else:
+        cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(str(Path.home()), '.cache')
+    return os.path.join(cache_home, 'quizr', 'config.json')
+
+
+def _file_signature(path: str) -> List[Any]:
+    """Get [path, mtime_ns, size] of a file, with None for a missing file"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return [path, None, None]
+    return [path, stat.st_mtime_ns, stat.st_size]
+
+
+def set_cli_overrides(assignments: List[str]) -> None:
+    """Record KEY=VALUE settings given on the command line
+    
+    Args:
+        assignments: Strings of the form 'key=value'
+    
+    Raises:
+        ValueError: If an assignment has no '='
+    """
+    for assignment in assignments:
+        key, sep, value = assignment.partition('=')
+        if not sep or not key.strip():
+            raise ValueError(f"Expected KEY=VALUE, got '{assignment}'")
+        CLI_OVERRIDES[key.strip()] = value.strip()
+
+
+def set_cli_override(key: str, value: Any) -> None:
+    """Record a setting given by a dedicated command-line option
+    
+    Unlike --set assignments, an invalid value is rejected right away
+    instead of being skipped with a warning.
+    
+    Args:
+        key: Setting name
+        value: Value from the option
+    
+    Raises:
+        ValueError: If the setting is unknown or the value is invalid
+    """
+    CLI_OVERRIDES[key] = Config.validate(key, value)
+
+
 class Config:
     """Configuration settings for QUIZR"""
     
     # Default configuration values
     DEFAULT_CONFIG = {
         'fuzzy_threshold': 90,  # Percentage for fuzzy matching
+        'answer_normalization': ['nfkc', 'casefold', 'punctuation', 'acronyms', 'whitespace'],  # Steps run on answers before grading
+        'answer_acronyms': {},  # Words expanded before grading, e.g. {'CPU': 'Central Processing Unit'}
         'images_dir': 'images',  # Directory for images
+        'image_previews': False,  # Show images as cached terminal previews instead of opening a viewer (needs Pillow)
+        'image_preview_width': 48,  # Width of image previews in characters
         'exercises_dir': 'Exercises',  # Directory for exercise files
         'progress_file': 'progress.yaml',  # Progress tracking file
+        'checkpoint_file': 'session.json',  # Remaining queue of the last unfinished session, for `start --resume`
         'quick_mode_count': 10,  # Number of questions in quick mode
+        'multiple_choice': False,  # Offer numbered choices instead of free-text answers
+        'choice_count': 4,  # Options shown per multiple-choice question, the right one included
+        'exam_question_count': 90,  # Number of questions in exam mode
+        'exam_time_limit': 90,  # Minutes allowed for an exam (0 = untimed)
+        'exam_weights': {},  # Share of exam questions per domain, e.g. {'Hardware': 25}; others by size
+        'weak_error_weight': 3.0,  # How strongly weak mode favours often-missed questions
+        'weak_staleness_days': 7,  # Days for a question's staleness in weak mode to reach half
+        'mastery_half_life_days': 30,  # Days for the weight of past answers in mastery to halve
+        'leech_min_attempts': 4,  # Attempts before a question can count as a leech
+        'leech_max_accuracy': 0.6,  # Accuracy below which a question with enough attempts is a leech
+        'progress_backups': 3,  # Rotating progress snapshots kept for recovery
+        'progress_save_interval': 2.0,  # Minimum seconds between progress writes during a session
+        'progress_log_days': 90,  # Days of activity kept individually before rolling into months
+        'progress_compact_threshold': 0.2,  # Fraction of answered progress entries for deleted questions that triggers compaction
+        'progress_compact_interval_days': 7,  # Days between automatic compaction checks
+        'cache_dir': '.quizr_cache',  # Directory for indexes and other rebuildable caches
+        'check_workers': 0,  # Processes used by `check` (0 = one per CPU)
+        'bundle_file': '',  # Packed bank to read quizzes from instead of the exercises tree
+        'shared_cache': False,  # Map a bundle rebuilt automatically in cache_dir, shared by all processes
+        'server_session_timeout': 3600.0,  # Seconds before `serve` drops a session with no requests (0 = never)
     }
     
-    def __init__(self, base_dir: str = None):
+    # Type and allowed values of every setting
+    SCHEMA = {
+        'fuzzy_threshold': {'type': int, 'min': 0, 'max': 100},
+        'answer_normalization': {'type': list, 'items': ['nfkc', 'casefold', 'punctuation', 'acronyms', 'whitespace']},
+        'answer_acronyms': {'type': dict},
+        'images_dir': {'type': str},
+        'image_previews': {'type': bool},
+        'image_preview_width': {'type': int, 'min': 8, 'max': 400},
+        'exercises_dir': {'type': str},
+        'progress_file': {'type': str},
+        'checkpoint_file': {'type': str},
+        'quick_mode_count': {'type': int, 'min': 1},
+        'multiple_choice': {'type': bool},
+        'choice_count': {'type': int, 'min': 2, 'max': 10},
+        'exam_question_count': {'type': int, 'min': 1},
+        'exam_time_limit': {'type': float, 'min': 0},
+        'exam_weights': {'type': dict, 'values': float, 'min_value': 0},
+        'weak_error_weight': {'type': float, 'min': 0},
+        'weak_staleness_days': {'type': float, 'min': 0.01},
+        'mastery_half_life_days': {'type': float, 'min': 0},
+        'leech_min_attempts': {'type': int, 'min': 1},
+        'leech_max_accuracy': {'type': float, 'min': 0, 'max': 1},
+        'progress_backups': {'type': int, 'min': 0},
+        'progress_save_interval': {'type': float, 'min': 0},
+        'progress_log_days': {'type': int, 'min': 0},
+        'progress_compact_threshold': {'type': float, 'min': 0, 'max': 1},
+        'progress_compact_interval_days': {'type': float, 'min': 0},
+        'cache_dir': {'type': str},
+        'check_workers': {'type': int, 'min': 0},
+        'bundle_file': {'type': str},
+        'shared_cache': {'type': bool},
+        'server_session_timeout': {'type': float, 'min': 0},
+    }
+    
+    def __init__(self, base_dir: str = None, load_files: bool = True, quiet: bool = False):
         """Initialize configuration
         
         Args:
             base_dir: Base directory for quiz data (defaults to package directory)
+            load_files: Whether to apply the configuration files, environment
+                variables and command-line overrides on top of the defaults
+            quiet: Keep warnings about invalid settings in self.warnings
+                instead of printing them, e.g. while completing in a shell
         """
         if base_dir:
             self.base_dir = base_dir
@@ -34,6 +190,161 @@ class Config:
             self.base_dir = package_dir
             
         self.config = self.DEFAULT_CONFIG.copy()
+        self.sources = {key: 'default' for key in self.config}  # Setting -> layer it came from
+        self.warnings: List[str] = []
+        self.quiet = quiet
+        
+        if load_files:
+            self._load_layers()
+    
+    def _load_layers(self) -> None:
+        """Apply the file, environment and command-line layers"""
+        values, sources, warnings = self._load_file_layers()
+        self.config.update(values)
+        self.sources.update(sources)
+        self.warnings.extend(warnings)
+        
+        for key in self.SCHEMA:
+            env_name = 'QUIZR_' + key.upper()
+            if env_name in os.environ:
+                self._apply(key, os.environ[env_name], env_name)
+        
+        for key, value in CLI_OVERRIDES.items():
+            self._apply(key, value, '--set')
+        
+        if not self.quiet:
+            for warning in self.warnings:
+                print(f"Warning: {warning}", file=sys.stderr)
+    
+    def _apply(self, key: str, value: Any, source: str) -> None:
+        """Validate a setting from one layer and apply it if it is valid"""
+        try:
+            self.config[key] = self.validate(key, value)
+            self.sources[key] = source
+        except ValueError as e:
+            self.warnings.append(f"{source}: {e}")
+    
+    def _load_file_layers(self) -> Tuple[Dict[str, Any], Dict[str, str], List[str]]:
+        """Get the merged settings of the system and user files
+        
+        The result is cached by the files' signatures, so unchanged files are
+        not parsed again.
+        
+        Returns:
+            Tuple of (settings, setting -> source file, warnings)
+        """
+        paths = [_system_config_path(), _user_config_path()]
+        signatures = [_file_signature(path) for path in paths]
+        if all(signature[1] is None for signature in signatures):
+            return {}, {}, []
+        
+        cache_path = _compiled_cache_path()
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as file:
+                cached = json.load(file)
+            if cached.get('version') == CACHE_VERSION and cached.get('sources') == signatures:
+                return cached['values'], cached['origins'], cached['warnings']
+        except (OSError, ValueError, AttributeError, KeyError):
+            pass
+        
+        values, origins, warnings = {}, {}, []
+        for path, signature in zip(paths, signatures):
+            if signature[1] is None:
+                continue
+            for key, value in self._read_file(path, warnings).items():
+                try:
+                    values[key] = self.validate(key, value)
+                    origins[key] = path
+                except ValueError as e:
+                    warnings.append(f"{path}: {e}")
+        
+        try:
+            from .storage import atomic_write_text
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            atomic_write_text(cache_path, json.dumps({
+                'version': CACHE_VERSION,
+                'sources': signatures,
+                'values': values,
+                'origins': origins,
+                'warnings': warnings,
+            }))
+        except OSError:
+            pass  # The cache only saves time; run without it
+        return values, origins, warnings
+    
+    @staticmethod
+    def _read_file(path: str, warnings: List[str]) -> Dict[str, Any]:
+        """Parse a configuration file, recording problems in warnings"""
+        import yaml
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                data = yaml.safe_load(file) or {}
+        except (OSError, yaml.YAMLError) as e:
+            warnings.append(f"{path}: could not be read ({e})")
+            return {}
+        if not isinstance(data, dict):
+            warnings.append(f"{path}: expected a mapping of settings")
+            return {}
+        return data
+    
+    @classmethod
+    def validate(cls, key: str, value: Any) -> Any:
+        """Check a setting against the schema
+        
+        Strings (from environment variables or the command line) are
+        converted to the setting's type first.
+        
+        Args:
+            key: Setting name
+            value: Value to check
+        
+        Returns:
+            The value, converted to the setting's type
+        
+        Raises:
+            ValueError: If the setting is unknown or the value is invalid
+        """
+        rule = cls.SCHEMA.get(key)
+        if rule is None:
+            raise ValueError(f"unknown setting '{key}'")
+        expected = rule['type']
+        
+        if isinstance(value, str) and expected is not str:
+            try:
+                if expected is dict:
+                    import yaml
+                    value = yaml.safe_load(value) or {}
+                elif expected is list:
+                    value = [item.strip() for item in value.split(',') if item.strip()]
+                elif expected is bool:
+                    value = BOOL_VALUES[value.strip().lower()]
+                else:
+                    value = expected(value.strip())
+            except Exception:
+                raise ValueError(f"{key}: '{value}' is not a valid {expected.__name__}")
+        
+        valid_type = (int, float) if expected is float else expected
+        if isinstance(value, bool) != (expected is bool) or not isinstance(value, valid_type):
+            raise ValueError(f"{key}: expected {expected.__name__}, got {type(value).__name__}")
+        
+        if 'items' in rule:
+            unknown = [item for item in value if item not in rule['items']]
+            if unknown:
+                raise ValueError(f"{key}: unknown item(s) {', '.join(map(str, unknown))}; "
+                                 f"use {', '.join(rule['items'])}")
+        if 'values' in rule:
+            item_type = (int, float) if rule['values'] is float else rule['values']
+            for name, item in value.items():
+                if isinstance(item, bool) or not isinstance(item, item_type):
+                    raise ValueError(f"{key}: '{name}' expected {rule['values'].__name__}, "
+                                     f"got {type(item).__name__}")
+                if item < rule['min_value']:
+                    raise ValueError(f"{key}: '{name}' must be at least {rule['min_value']}")
+        if 'min' in rule and value < rule['min']:
+            raise ValueError(f"{key}: must be at least {rule['min']}")
+        if 'max' in rule and value > rule['max']:
+            raise ValueError(f"{key}: must be at most {rule['max']}")
+        return value
     
     def get(self, key: str, default: Any = None) -> Any:
         """Get configuration value"""
@@ -55,6 +366,27 @@ class Config:
         """Get full path to progress file"""
         return os.path.join(self.base_dir, self.get('progress_file'))
     
+    def get_checkpoint_file(self) -> str:
+        """Get full path to the session checkpoint file"""
+        return os.path.join(self.base_dir, self.get('checkpoint_file'))
+    
+    def get_bundle_file(self) -> Optional[str]:
+        """Get full path to the packed bank, or None if quizzes are read from YAML"""
+        bundle_file = self.get('bundle_file')
+        if not bundle_file:
+            return None
+        return os.path.join(self.base_dir, bundle_file)
+    
+    def get_cache_dir(self) -> str:
+        """Get full path to cache directory, creating it if needed"""
+        cache_dir = os.path.join(self.base_dir, self.get('cache_dir'))
+        os.makedirs(cache_dir, exist_ok=True)
+        return cache_dir
+    
+    def get_file_paths(self) -> Dict[str, str]:
+        """Get the paths of the configuration files, by layer"""
+        return {'system': _system_config_path(), 'user': _user_config_path()}
+    
     def validate_directories(self) -> Dict[str, bool]:
         """Validate that required directories exist
         
@@ -84,4 +416,4 @@ class Config:
             
         exercises_dir = self.get_exercises_dir()
         if not os.path.exists(exercises_dir):
-            os.makedirs(exercises_dir, exist_ok=True) 
\ No newline at end of file
+            os.makedirs(exercises_dir, exist_ok=True)
@@ -3,31 +3,119 @@ Data management for QUIZR - handles loading quizzes and progress tracking
 """
 
 import os
+import time
 import yaml
+from datetime import date, datetime
 from typing import Dict, List, Optional, Tuple, Any
 from pathlib import Path
 
 from .models import Question, Quiz, QuestionProgress, GlobalProgress
 from .config import Config
+from .bundle import BundleError, QuizBundle, ensure_shared_bundle
+from .compaction import count_entries, has_attempts, prune_progress, roll_up_daily_log
+from .identity import FingerprintIndex
+from .images import ImageManifest
+from .leeches import LeechIndex
+from .names import save_names, target_names
+from .profiling import profiler, timed
+from .mastery import MasteryTree, Rollup
+from .normalization import AnswerNormalizer
+from .storage import load_newest_valid, rotate_backups, write_snapshot
+
+
+_PROGRESS_DUMPER = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)  # libyaml's emitter when available
+
+
+def format_load_error(error: Exception) -> str:
+    """Describe a quiz loading error on a single line"""
+    mark = getattr(error, 'problem_mark', None)
+    problem = getattr(error, 'problem', None)
+    if isinstance(error, yaml.YAMLError) and mark is not None and problem:
+        return f"Invalid YAML: {problem} (line {mark.line + 1}, column {mark.column + 1})"
+    return f"{type(error).__name__}: {' '.join(str(error).split())}"
 
 
 class DataManager:
     """Manages loading and saving quiz data and progress"""
     
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, mount_bundle: bool = True, load_progress: bool = True):
         """Initialize data manager
         
         Args:
             config: Configuration object
+            mount_bundle: Whether to read quizzes from the configured packed
+                bank instead of the YAML tree
+            load_progress: Whether to read the progress file. Without it the
+                manager starts with empty progress and never touches the
+                file, not even to set a damaged one aside.
         """
         self.config = config
+        self.bundle: Optional[QuizBundle] = None
         self.progress_data: Dict[str, Any] = {}
         self.global_progress: GlobalProgress = GlobalProgress()
-        self._load_progress()
+        self.load_errors: Dict[str, str] = {}  # Quiz file -> why it failed to load fully
+        self._last_save = float('-inf')
+        self._unsaved_changes = False
+        self._backups_rotated = False
+        self._discovered: Optional[set] = None  # Quiz files seen by the last discovery
+        self._saved_names: Optional[List[str]] = None  # Name index last written by discover_quizzes()
+        self._file_fingerprints: Dict[str, Dict[Any, str]] = {}  # Quiz file -> question id -> fingerprint
+        self.fingerprints = FingerprintIndex()
+        self.mastery: Optional[MasteryTree] = None  # Built on first use by get_mastery_tree()
+        self.leeches: Optional[LeechIndex] = None  # Built on first use by get_leech_index()
+        self.images: Optional[ImageManifest] = None  # Loaded on first use by get_image_manifest()
+        self.normalizer = AnswerNormalizer.from_config(config)
+        if load_progress:
+            self._load_progress()
+        
+        bundle_file = config.get_bundle_file()
+        if mount_bundle and bundle_file:
+            try:
+                self.mount_bundle(bundle_file)
+            except BundleError as e:
+                print(f"Warning: {e}; reading quizzes from {config.get_exercises_dir()}")
+        elif mount_bundle and config.get('shared_cache'):
+            try:
+                self.mount_bundle(ensure_shared_bundle(self))
+            except BundleError as e:
+                print(f"Warning: {e}; reading quizzes from {config.get_exercises_dir()}")
     
+    def mount_bundle(self, bundle_file: str) -> None:
+        """Read quizzes from a packed bank instead of the YAML tree
+        
+        Args:
+            bundle_file: Path to a bundle written by `quizr pack`
+            
+        Raises:
+            BundleError: If the bundle cannot be opened
+        """
+        if self.bundle:
+            self.bundle.close()
+        self.bundle = QuizBundle(bundle_file)
+    
+    @timed('discover_quizzes')
     def discover_quizzes(self) -> Dict[str, List[str]]:
         """Discover all quiz files in the directory structure
         
+        Returns:
+            Dict mapping folder paths to lists of quiz filenames
+        """
+        if self.bundle:
+            quizzes = self.bundle.discover_quizzes()
+        else:
+            quizzes = self._walk_exercises()
+        self._discovered = {quiz_file for files in quizzes.values() for quiz_file in files}
+        
+        # Keep the name index used by shell completion current
+        names = target_names(quizzes)
+        if names != self._saved_names:
+            save_names(self.config, names)
+            self._saved_names = names
+        return quizzes
+    
+    def _walk_exercises(self) -> Dict[str, List[str]]:
+        """Find quiz files in the exercises directory tree
+        
         Returns:
             Dict mapping folder paths to lists of quiz filenames
         """
@@ -51,20 +139,52 @@ class DataManager:
                     # Convert Windows path separators to forward slashes
                     rel_path = rel_path.replace('\\', '/')
                 
-                # Store full relative paths for files in this directory only
-                quizzes[rel_path] = [os.path.join(rel_path, f).replace('\\', '/') for f in yaml_files]
+                # Store full relative paths for files in this directory only;
+                # files directly in the exercises directory are their own path
+                quizzes[rel_path] = [f if rel_path == 'root' else f"{rel_path}/{f}" for f in yaml_files]
         
         return quizzes
     
+    @timed('load_quiz')
     def load_quiz(self, filepath: str) -> Optional[Quiz]:
         """Load a single quiz from a YAML file
         
+        Progress for questions that were moved, renamed or renumbered since
+        it was recorded is re-linked to them by content fingerprint.
+        
         Args:
             filepath: Path to the YAML file relative to exercises directory
             
         Returns:
-            Quiz object or None if loading fails
+            Quiz object or None if loading fails. The reason for a failure,
+            or for skipped entries, is recorded in ``load_errors``.
         """
+        quiz = self._read_quiz(filepath)
+        if quiz:
+            profiler.count('quiz files loaded')
+            profiler.count('questions loaded', len(quiz.questions))
+            self._file_fingerprints[quiz.filepath] = {question_id: question.fingerprint
+                                                      for question_id, question in quiz.questions.items()}
+            for question in quiz.questions.values():
+                if question.accepted is None:
+                    question.accepted = self.normalizer.accepted_forms(question.answer, question.alternatives)
+            self._relink_progress(quiz)
+        return quiz
+    
+    def _read_quiz(self, filepath: str) -> Optional[Quiz]:
+        """Read a quiz from the bundle or the YAML tree; see load_quiz()"""
+        self.load_errors.pop(filepath.replace('\\', '/'), None)
+        if self.bundle:
+            filepath = filepath.replace('\\', '/')
+            quiz = self.bundle.load_quiz(filepath)
+            if quiz is None:
+                self.load_errors[filepath] = f"Not in bundle {self.bundle.path}"
+            elif self.bundle.normalization != self.normalizer.signature:
+                # Packed with different normalization settings; fold the answers again
+                for question in quiz.questions.values():
+                    question.accepted = None
+            return quiz
+        
         try:
             # Normalize path separators
             filepath = filepath.replace('\\', '/')
@@ -78,23 +198,33 @@ class DataManager:
                 full_path = os.path.abspath(full_path)
                 exercises_path = os.path.abspath(self.config.get_exercises_dir())
                 if not full_path.startswith(exercises_path):
+                    self.load_errors[filepath] = "Path is outside the exercises directory"
                     return None
             except:
+                self.load_errors[filepath] = "Invalid path"
                 return None
             
             # Check if file exists before trying to open it
             if not os.path.isfile(full_path):
+                self.load_errors[filepath] = "File not found"
                 return None
             
             with open(full_path, 'r', encoding='utf-8') as file:
                 data = yaml.safe_load(file)
             
             if not data:
+                self.load_errors[filepath] = "File has no questions"
+                return None
+            
+            if not isinstance(data, dict):
+                self.load_errors[filepath] = "Top level is not a mapping of question ids"
                 return None
                 
             questions = {}
+            skipped = []
             for question_id, question_data in data.items():
                 if not isinstance(question_data, dict):
+                    skipped.append(str(question_id))
                     continue
                     
                 questions[question_id] = Question(
@@ -102,17 +232,33 @@ class DataManager:
                     prompt=question_data.get('prompt', ''),
                     answer=question_data.get('answer', ''),
                     image=question_data.get('image'),
-                    strict=question_data.get('strict', False)
+                    strict=question_data.get('strict', False),
+                    alternatives=self._parse_alternatives(question_data.get('alternatives'))
                 )
             
+            if skipped:
+                self.load_errors[filepath] = f"Skipped malformed entries: {', '.join(skipped)}"
+            
             quiz_name = os.path.splitext(os.path.basename(filepath))[0]
             return Quiz(name=quiz_name, filepath=filepath, questions=questions)
             
         except Exception as e:
-            # Don't print errors, just return None
+            # Don't print errors here; callers report load_errors
+            self.load_errors[filepath] = format_load_error(e)
             return None
     
-    def find_quizzes_by_path(self, target_name: str, debug: bool = False) -> List[str]:
+    @staticmethod
+    def _parse_alternatives(value: Any) -> List[str]:
+        """Read a question's alternative answers: a list, or a single answer"""
+        if value is None:
+            return []
+        if isinstance(value, list):
+            return [str(item) for item in value if item is not None]
+        return [str(value)]
+    
+    @timed('find_quizzes_by_path')
+    def find_quizzes_by_path(self, target_name: str, debug: bool = False,
+                             all_quizzes: Optional[Dict[str, List[str]]] = None) -> List[str]:
         """Find quiz files by exact name match
         
         This method has two modes of operation:
@@ -125,6 +271,8 @@ class DataManager:
         Args:
             target_name: The exact name of the quiz file or folder to find
             debug: Whether to show debug output
+            all_quizzes: Result of discover_quizzes() to search instead of
+                walking the exercises directory again
             
         Returns:
             List of matching quiz file paths
@@ -133,11 +281,12 @@ class DataManager:
             ValueError: If both a file and folder match the target name
         """
         # Normalize path separators and remove .yaml if present
-        target_name = target_name.replace('\\', '/').rstrip('.yaml')
+        target_name = target_name.replace('\\', '/').rstrip('/')
         if target_name.endswith('.yaml'):
             target_name = target_name[:-5]
             
-        all_quizzes = self.discover_quizzes()
+        if all_quizzes is None:
+            all_quizzes = self.discover_quizzes()
         matching_files = []
         
         if debug:
@@ -160,7 +309,7 @@ class DataManager:
                     folder_match = '/'.join(path_parts[:idx + 1])
                     # Add all quiz files from this folder and its subfolders
                     for quiz_folder, quiz_files in all_quizzes.items():
-                        if quiz_folder.startswith(folder_match):
+                        if quiz_folder == folder_match or quiz_folder.startswith(folder_match + '/'):
                             matching_files.extend(quiz_files)
                     break
             if folder_match:
@@ -189,8 +338,8 @@ class DataManager:
                 f"Please use a more specific path to disambiguate."
             )
         
-        if not matching_files:
-            # Show debug output when no matches are found
+        if not matching_files and debug:
+            # Callers suggest close names themselves; see names.suggest_names()
             print("\nDebug - Available folders:")
             for folder_path in sorted(all_quizzes.keys()):
                 print(f"  '{folder_path}' (parts: {folder_path.split('/')})")
@@ -225,35 +374,40 @@ class DataManager:
         
         return matching_files
     
-    def get_question_progress(self, quiz_filepath: str, question_id: str) -> QuestionProgress:
-        """Get progress for a specific question
+    def _progress_node(self, quiz_filepath: str, create: bool = False) -> Optional[Dict[Any, Any]]:
+        """Get the progress mapping of a quiz file
         
         Args:
             quiz_filepath: Path to the quiz file
-            question_id: ID of the question
+            create: Whether to create missing folders and the file mapping
             
         Returns:
-            QuestionProgress object
+            Dict mapping question IDs to progress dictionaries, or None if
+            it doesn't exist and create is False
         """
-        # Navigate to the question progress in the nested structure
-        parts = quiz_filepath.replace('\\', '/').split('/')
         current = self.progress_data
-        
-        # Navigate through folder structure
-        for part in parts[:-1]:  # All but the filename
-            if part not in current:
+        for part in quiz_filepath.replace('\\', '/').split('/'):
+            if not isinstance(current.get(part), dict):
+                if not create:
+                    return None
                 current[part] = {}
             current = current[part]
+        return current
+    
+    def get_question_progress(self, quiz_filepath: str, question_id: str) -> QuestionProgress:
+        """Get progress for a specific question
         
-        # Get the filename without extension
-        filename = parts[-1]
-        if filename not in current:
-            current[filename] = {}
-        
-        if question_id not in current[filename]:
-            current[filename][question_id] = {}
-        
-        progress_dict = current[filename][question_id]
+        Args:
+            quiz_filepath: Path to the quiz file
+            question_id: ID of the question
+            
+        Returns:
+            QuestionProgress object (empty if the question was never answered)
+        """
+        node = self._progress_node(quiz_filepath)
+        progress_dict = node.get(question_id) if node else None
+        if not isinstance(progress_dict, dict):
+            return QuestionProgress()
         return QuestionProgress(
             attempts=progress_dict.get('attempts', 0),
             correct=progress_dict.get('correct', 0),
@@ -261,71 +415,236 @@ class DataManager:
             last_correct=progress_dict.get('last_correct')
         )
     
-    def update_question_progress(self, quiz_filepath: str, question_id: str, progress: QuestionProgress) -> None:
+    def update_question_progress(self, quiz_filepath: str, question_id: str, progress: QuestionProgress,
+                                 fingerprint: Optional[str] = None) -> None:
         """Update progress for a specific question
         
         Args:
             quiz_filepath: Path to the quiz file
             question_id: ID of the question
             progress: Updated progress object
+            fingerprint: Content fingerprint of the question (keeps the
+                stored one if omitted)
         """
-        # Navigate to the question progress in the nested structure
-        parts = quiz_filepath.replace('\\', '/').split('/')
-        current = self.progress_data
-        
-        # Navigate through folder structure
-        for part in parts[:-1]:  # All but the filename
-            if part not in current:
-                current[part] = {}
-            current = current[part]
-        
-        # Get the filename
-        filename = parts[-1]
-        if filename not in current:
-            current[filename] = {}
-        
-        if question_id not in current[filename]:
-            current[filename][question_id] = {}
+        node = self._progress_node(quiz_filepath, create=True)
+        previous = node.get(question_id)
+        if fingerprint is None and isinstance(previous, dict):
+            fingerprint = previous.get('fingerprint')
         
-        current[filename][question_id] = {
+        node[question_id] = {
             'attempts': progress.attempts,
             'correct': progress.correct,
             'last_review': progress.last_review,
             'last_correct': progress.last_correct
         }
+        if fingerprint:
+            node[question_id]['fingerprint'] = fingerprint
+            self.fingerprints.add(fingerprint, quiz_filepath.replace('\\', '/'), question_id)
+        if self.mastery is not None:
+            self.mastery.record(quiz_filepath.replace('\\', '/'), question_id, progress)
+        if self.leeches is not None:
+            self.leeches.record(quiz_filepath.replace('\\', '/'), question_id, progress)
+    
+    def _is_orphaned(self, quiz_filepath: str, question_id: Any, fingerprint: str) -> bool:
+        """Check if no current question owns the progress stored at a location
+        
+        Args:
+            quiz_filepath: Quiz file the progress is stored under
+            question_id: Question ID the progress is stored under
+            fingerprint: Fingerprint recorded with the progress
+            
+        Returns:
+            True if the file is gone or now holds different content there
+        """
+        if self._discovered is None:
+            self.discover_quizzes()
+        if quiz_filepath not in self._discovered:
+            return True
+        
+        if quiz_filepath not in self._file_fingerprints:
+            quiz = self._read_quiz(quiz_filepath)
+            if quiz is None:
+                return False  # Can't tell; leave the progress where it is
+            self._file_fingerprints[quiz_filepath] = {qid: question.fingerprint
+                                                      for qid, question in quiz.questions.items()}
+        return self._file_fingerprints[quiz_filepath].get(question_id) != fingerprint
+    
+    def _relink_progress(self, quiz: Quiz) -> None:
+        """Move progress recorded elsewhere for this quiz's questions onto them
+        
+        Each question's stored progress is checked against its fingerprint.
+        Questions without matching progress look their fingerprint up in the
+        index, and take over the record if no current question owns it.
+        Entries recorded before fingerprints existed are stamped with the
+        fingerprint of the question now at their location.
+        
+        Args:
+            quiz: Freshly loaded quiz
+        """
+        node = self._progress_node(quiz.filepath) or {}
+        fingerprints = self._file_fingerprints[quiz.filepath]
+        
+        claims = []
+        for question_id in quiz.questions:
+            fingerprint = fingerprints[question_id]
+            entry = node.get(question_id)
+            if has_attempts(entry):
+                if not entry.get('fingerprint'):
+                    entry['fingerprint'] = fingerprint
+                    self.fingerprints.add(fingerprint, quiz.filepath, question_id)
+                if entry['fingerprint'] == fingerprint:
+                    continue
+            
+            location = self.fingerprints.get(fingerprint)
+            if location is None or location == (quiz.filepath, question_id):
+                continue
+            source_node = self._progress_node(location[0])
+            source = source_node.get(location[1]) if source_node else None
+            if (has_attempts(source) and source.get('fingerprint') == fingerprint
+                    and self._is_orphaned(location[0], location[1], fingerprint)):
+                claims.append((question_id, fingerprint, location))
+        
+        if not claims:
+            return
+        
+        # Never overwrite a record unless it is moving elsewhere itself, and
+        # let only one of several identical questions take a record
+        vacated = {location for _, _, location in claims}
+        claimed = set()
+        moves = []
+        for question_id, fingerprint, location in claims:
+            if location in claimed:
+                continue
+            if has_attempts(node.get(question_id)) and (quiz.filepath, question_id) not in vacated:
+                continue
+            claimed.add(location)
+            moves.append((question_id, fingerprint, location))
+        if not moves:
+            return
+        
+        records = {location: self._progress_node(location[0]).pop(location[1]) for _, _, location in moves}
+        node = self._progress_node(quiz.filepath, create=True)
+        for question_id, fingerprint, location in moves:
+            node[question_id] = records[location]
+            self.fingerprints.add(fingerprint, quiz.filepath, question_id)
+        self._unsaved_changes = True
+        self.mastery = None  # Rollups no longer match where progress lives
+        self.leeches = None
     
+    def get_quiz_progress(self, quiz_filepath: str) -> Dict[str, Any]:
+        """Get a copy of the stored progress for every question of a quiz
+        
+        Unlike get_question_progress, this never creates empty entries.
+        
+        Args:
+            quiz_filepath: Path to the quiz file
+            
+        Returns:
+            Dict mapping question IDs to progress dictionaries
+        """
+        current = self.progress_data
+        for part in quiz_filepath.replace('\\', '/').split('/'):
+            if not isinstance(current, dict) or part not in current:
+                return {}
+            current = current[part]
+        if not isinstance(current, dict):
+            return {}
+        return {question_id: dict(progress) for question_id, progress in current.items()
+                if isinstance(progress, dict)}
+    
+    def set_quiz_progress(self, quiz_filepath: str, quiz_progress: Dict[str, Any]) -> None:
+        """Replace the stored progress for every question of a quiz
+        
+        Args:
+            quiz_filepath: Path to the quiz file
+            quiz_progress: Dict mapping question IDs to progress dictionaries
+        """
+        parts = quiz_filepath.replace('\\', '/').split('/')
+        current = self.progress_data
+        for part in parts[:-1]:
+            if part not in current:
+                current[part] = {}
+            current = current[part]
+        current[parts[-1]] = {question_id: dict(progress) for question_id, progress in quiz_progress.items()}
+        for question_id, progress in quiz_progress.items():
+            if progress.get('fingerprint'):
+                self.fingerprints.add(progress['fingerprint'], '/'.join(parts), question_id)
+        self.leeches = None
+    
+    @timed('_load_progress')
     def _load_progress(self) -> None:
-        """Load progress data from file"""
+        """Load progress data from file, recovering from a backup snapshot if needed"""
         progress_file = self.config.get_progress_file()
+        backups = self.config.get('progress_backups', 3)
+        
+        self.progress_data = {}
+        self.global_progress = GlobalProgress()
+        
+        data, source, errors = load_newest_valid(progress_file, backups, self._parse_progress)
+        for error in errors:
+            print(f"Error loading progress: {error}")
+        
+        if source and source != progress_file:
+            print(f"Recovered progress from backup: {source}")
+            # Keep the damaged file aside instead of rotating it into the backups
+            if os.path.exists(progress_file):
+                os.replace(progress_file, progress_file + '.corrupt')
+                print(f"Damaged progress file moved to: {progress_file}.corrupt")
+        elif errors and not source:
+            print("No valid progress snapshot found; starting with empty progress")
+        
+        if data is None:
+            return
+        
+        # Extract global metadata
+        meta = data.get('__meta__', {})
+        self.global_progress = GlobalProgress(
+            total_questions_seen=meta.get('total_questions_seen', 0),
+            total_reviews=meta.get('total_reviews', 0),
+            first_use=meta.get('first_use'),
+            last_session=meta.get('last_session'),
+            daily_log=meta.get('daily_log', {}),
+            last_compaction=meta.get('last_compaction')
+        )
         
-        if os.path.exists(progress_file):
-            try:
-                with open(progress_file, 'r', encoding='utf-8') as file:
-                    data = yaml.safe_load(file) or {}
-                
-                # Extract global metadata
-                meta = data.get('__meta__', {})
-                self.global_progress = GlobalProgress(
-                    total_questions_seen=meta.get('total_questions_seen', 0),
-                    total_reviews=meta.get('total_reviews', 0),
-                    first_use=meta.get('first_use'),
-                    last_session=meta.get('last_session'),
-                    daily_log=meta.get('daily_log', {})
-                )
-                
-                # Store the rest as progress data
-                self.progress_data = {k: v for k, v in data.items() if k != '__meta__'}
-                
-            except Exception as e:
-                print(f"Error loading progress: {e}")
-                self.progress_data = {}
-                self.global_progress = GlobalProgress()
-        else:
-            self.progress_data = {}
-            self.global_progress = GlobalProgress()
+        # Store the rest as progress data
+        self.progress_data = {k: v for k, v in data.items() if k != '__meta__'}
+        self.fingerprints = FingerprintIndex.build(self.progress_data)
+        self.leeches = None
+    
+    @staticmethod
+    def _parse_progress(body: str) -> Dict[str, Any]:
+        """Parse a progress snapshot body
+        
+        Raises:
+            ValueError: If the snapshot is not a mapping
+        """
+        data = yaml.safe_load(body) or {}
+        if not isinstance(data, dict):
+            raise ValueError("progress data is not a mapping")
+        return data
     
-    def save_progress(self) -> None:
-        """Save progress data to file"""
+    @timed('save_progress')
+    def save_progress(self, force: bool = True) -> bool:
+        """Save progress data to file
+        
+        Writes are atomic: the snapshot goes to a temporary file which is
+        fsynced and renamed over the progress file. The first write of each
+        run rotates the previous file into the backup slots.
+        
+        Args:
+            force: If False, skip the write when the last one finished less
+                than ``progress_save_interval`` seconds ago. The skipped
+                changes are written by the next forced save.
+            
+        Returns:
+            True if the progress file was written
+        """
+        interval = self.config.get('progress_save_interval', 0)
+        if not force and time.monotonic() - self._last_save < interval:
+            self._unsaved_changes = True
+            return False
+        
         progress_file = self.config.get_progress_file()
         
         # Combine global metadata with progress data
@@ -335,16 +654,171 @@ class DataManager:
                 'total_reviews': self.global_progress.total_reviews,
                 'first_use': self.global_progress.first_use,
                 'last_session': self.global_progress.last_session,
-                'daily_log': self.global_progress.daily_log
+                'daily_log': self.global_progress.daily_log,
+                'last_compaction': self.global_progress.last_compaction
             }
         }
         data.update(self.progress_data)
         
         try:
-            with open(progress_file, 'w', encoding='utf-8') as file:
-                yaml.dump(data, file, default_flow_style=False, sort_keys=False)
+            body = yaml.dump(data, Dumper=_PROGRESS_DUMPER, default_flow_style=False, sort_keys=False)
+            if not self._backups_rotated:
+                rotate_backups(progress_file, self.config.get('progress_backups', 3))
+                self._backups_rotated = True
+            write_snapshot(progress_file, body)
+            profiler.count('progress bytes written', len(body.encode('utf-8')))
+            # Count the interval from the end of the write, which on a large
+            # store can take longer than the interval itself
+            self._last_save = time.monotonic()
+            self._unsaved_changes = False
+            return True
         except Exception as e:
             print(f"Error saving progress: {e}")
+            return False
+    
+    def flush_progress(self) -> None:
+        """Write any progress changes skipped by unforced saves"""
+        if self._unsaved_changes:
+            self.save_progress()
+    
+    def _live_questions(self) -> Dict[str, Optional[set]]:
+        """Map every quiz file in the exercises tree to its question ids
+        
+        The YAML tree is read even when a bundle is mounted: a bundle packed
+        with `pack --target` holds only part of the bank, and progress for
+        everything outside it would look orphaned.
+        
+        Returns:
+            Dict of quiz file paths to sets of question ids, or to None for
+            quizzes that failed to load
+        """
+        source = DataManager(self.config, mount_bundle=False, load_progress=False) if self.bundle else self
+        live = {}
+        for quiz_files in source.discover_quizzes().values():
+            for quiz_file in quiz_files:
+                quiz = source.load_quiz(quiz_file)
+                live[quiz_file] = {str(question_id) for question_id in quiz.questions} if quiz else None
+        return live
+    
+    def compact_progress(self, today: Optional[date] = None) -> Dict[str, int]:
+        """Drop orphaned progress entries and roll old activity into months
+        
+        Args:
+            today: Current date for the activity roll-up (defaults to today)
+            
+        Returns:
+            Dictionary with counts of 'entries', 'dropped', 'days_rolled',
+            'bytes_before' and 'bytes_after'
+            
+        Raises:
+            ValueError: If no quizzes are found, since every entry would
+                look orphaned
+        """
+        live = self._live_questions()
+        if not live:
+            raise ValueError(f"No quizzes found in {self.config.get_exercises_dir()}; refusing to compact")
+        
+        today = today or date.today()
+        progress_file = self.config.get_progress_file()
+        bytes_before = os.path.getsize(progress_file) if os.path.exists(progress_file) else 0
+        
+        entries = count_entries(self.progress_data)
+        self.progress_data, dropped = prune_progress(self.progress_data, live)
+        self.fingerprints = FingerprintIndex.build(self.progress_data)
+        self.leeches = None
+        self.global_progress.daily_log, days_rolled = roll_up_daily_log(
+            self.global_progress.daily_log, self.config.get('progress_log_days', 90), today)
+        self.global_progress.last_compaction = today.isoformat()
+        self.save_progress()
+        
+        return {
+            'entries': entries,
+            'dropped': dropped,
+            'days_rolled': days_rolled,
+            'bytes_before': bytes_before,
+            'bytes_after': os.path.getsize(progress_file) if os.path.exists(progress_file) else 0
+        }
+    
+    def auto_compact_progress(self, today: Optional[date] = None) -> Optional[Dict[str, int]]:
+        """Compact progress if enough of it is dead
+        
+        Only answered entries count: compaction is triggered when the share
+        of answers recorded for questions that no longer exist reaches
+        ``progress_compact_threshold``. The check reads every quiz, so it
+        runs at most once every ``progress_compact_interval_days`` days.
+        
+        Args:
+            today: Current date (defaults to today)
+            
+        Returns:
+            Counts from compact_progress(), or None if nothing was compacted
+        """
+        today = today or date.today()
+        interval = self.config.get('progress_compact_interval_days', 7)
+        last = self.global_progress.last_compaction
+        if last and (today - datetime.strptime(last, '%Y-%m-%d').date()).days < interval:
+            return None
+        
+        answered = count_entries(self.progress_data, answered=True)
+        live = self._live_questions()
+        if not live or not answered:
+            return None
+        pruned, _ = prune_progress(self.progress_data, live)
+        orphaned = answered - count_entries(pruned)
+        
+        if orphaned / answered < self.config.get('progress_compact_threshold', 0.2):
+            # Remember the check so it isn't repeated on every start
+            self.global_progress.last_compaction = today.isoformat()
+            self.save_progress()
+            return None
+        return self.compact_progress(today)
+    
+    def get_mastery_tree(self) -> MasteryTree:
+        """Get mastery rollups for every quiz and folder, building them on first use
+        
+        Once built, the tree is kept up to date as question progress changes.
+        
+        Returns:
+            MasteryTree object
+        """
+        if self.mastery is None:
+            self.mastery = MasteryTree(self.config, self).build()
+        return self.mastery
+    
+    def get_leech_index(self) -> LeechIndex:
+        """Get the index of leeches, building it from the progress store on first use
+        
+        Once built, the index is kept up to date as question progress changes.
+        
+        Returns:
+            LeechIndex object
+        """
+        if self.leeches is None:
+            self.leeches = LeechIndex.build(self.config, self.progress_data)
+        return self.leeches
+    
+    def get_image_manifest(self) -> ImageManifest:
+        """Get the manifest of the images directory, loading it on first use
+        
+        Every call brings the manifest up to date, which costs one stat per
+        image directory unless something in it changed.
+        
+        Returns:
+            ImageManifest object
+        """
+        if self.images is None:
+            self.images = ImageManifest.load(self.config)
+        else:
+            self.images.refresh()
+        return self.images
+    
+    def calculate_global_stats(self) -> Dict[str, Any]:
+        """Calculate statistics for every discovered quiz
+        
+        Returns:
+            Dictionary with the same statistics as calculate_folder_stats()
+        """
+        return self._stats_summary(self.get_mastery_tree().total)
     
     def calculate_folder_stats(self, folder_path: str) -> Dict[str, Any]:
         """Calculate statistics for a folder
@@ -356,31 +830,24 @@ class DataManager:
             Dictionary with folder statistics
         """
         quiz_files = self.find_quizzes_by_path(folder_path)
+        tree = self.get_mastery_tree()
         
-        total_questions = 0
-        questions_seen = 0
-        correct_answers = 0
-        total_attempts = 0
-        
+        stats = Rollup()
         for quiz_file in quiz_files:
-            quiz = self.load_quiz(quiz_file)
-            if not quiz:
-                continue
-                
-            for question_id in quiz.questions:
-                progress = self.get_question_progress(quiz_file, question_id)
-                total_questions += 1
-                
-                if progress.attempts > 0:
-                    questions_seen += 1
-                    total_attempts += progress.attempts
-                    correct_answers += progress.correct
-        
+            rollup = tree.quizzes.get(quiz_file)
+            if rollup:
+                stats.add(rollup)
+        return self._stats_summary(stats)
+    
+    @staticmethod
+    def _stats_summary(stats: Rollup) -> Dict[str, Any]:
+        """Describe a rollup as a statistics dictionary"""
         return {
-            'total_questions': total_questions,
-            'questions_seen': questions_seen,
-            'correct_answers': correct_answers,
-            'total_attempts': total_attempts,
-            'completion_rate': (questions_seen / total_questions * 100) if total_questions > 0 else 0,
-            'accuracy_rate': (correct_answers / total_attempts * 100) if total_attempts > 0 else 0
-        } 
\ No newline at end of file
+            'total_questions': stats.questions,
+            'questions_seen': stats.seen,
+            'correct_answers': stats.correct,
+            'total_attempts': stats.attempts,
+            'completion_rate': stats.completion_rate,
+            'accuracy_rate': stats.accuracy_rate,
+            'mastery': stats.mastery * 100
+        }
@@ -0,0 +1,150 @@
+"""
+Duplicate detection for QUIZR - finds exact and near-duplicate questions across quiz files
+"""
+
+import math
+from collections import Counter, defaultdict
+from typing import Any, Dict, FrozenSet, Iterable, List, Tuple
+
+from .data_manager import DataManager
+from .identity import normalize_text
+
+
+def word_set(text: str) -> FrozenSet[str]:
+    """Get the set of words of already normalized text"""
+    return frozenset(text.split())
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """Get the Jaccard similarity of two sets"""
+    if not a and not b:
+        return 1.0
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+
+def similar_pairs(sets: List[FrozenSet[str]], threshold: float) -> List[Tuple[int, int, float]]:
+    """Find all pairs of sets with Jaccard similarity at or above a threshold
+
+    Uses prefix filtering: tokens are ordered rarest first, and two sets can
+    only reach the threshold if they share a token within a short prefix of
+    each. Only those candidate pairs are compared, so the work grows with the
+    number of genuinely similar pairs rather than quadratically.
+
+    Args:
+        sets: Token sets to compare
+        threshold: Minimum Jaccard similarity, between 0 and 1
+
+    Returns:
+        List of (index_a, index_b, similarity) with index_a < index_b
+    """
+    frequency = Counter(token for token_set in sets for token in token_set)
+    ordered = [sorted(token_set, key=lambda token: (frequency[token], token)) for token_set in sets]
+
+    # Visit sets from smallest to largest so the length filter only looks back
+    order = sorted(range(len(sets)), key=lambda i: len(sets[i]))
+    index: Dict[str, List[int]] = defaultdict(list)
+    pairs = []
+
+    for i in order:
+        size = len(ordered[i])
+        if size == 0:
+            continue
+        prefix = size - math.ceil(threshold * size - 1e-9) + 1
+        min_size = threshold * size
+
+        candidates = set()
+        for token in ordered[i][:prefix]:
+            for j in index[token]:
+                if len(sets[j]) >= min_size:
+                    candidates.add(j)
+            index[token].append(i)
+
+        for j in candidates:
+            similarity = jaccard(sets[i], sets[j])
+            if similarity >= threshold:
+                pairs.append((min(i, j), max(i, j), similarity))
+
+    return pairs
+
+
+def find_duplicates(questions: Iterable[Tuple[str, str, str, str]], threshold: float = 0.8) -> Dict[str, Any]:
+    """Find exact duplicates, conflicting answers and near-duplicates
+
+    Prompts and answers are compared after normalize_text(). Exact
+    duplicates share both; conflicts share a prompt but not an answer;
+    near-duplicates have prompts and answers whose word sets reach the
+    Jaccard threshold.
+
+    Args:
+        questions: (quiz_filepath, question_id, prompt, answer) tuples
+        threshold: Minimum prompt and answer similarity for near-duplicates
+
+    Returns:
+        Report dictionary with 'questions', 'exact', 'conflicts' and 'near'
+        entries, ready to be written as JSON
+    """
+    # Group questions by normalized prompt; near matching runs on unique prompts
+    by_prompt: Dict[str, List[Tuple[str, str, str]]] = defaultdict(list)
+    count = 0
+    for quiz_filepath, question_id, prompt, answer in questions:
+        by_prompt[normalize_text(prompt)].append((quiz_filepath, str(question_id), normalize_text(answer)))
+        count += 1
+
+    def ref(item: Tuple[str, str, str]) -> Dict[str, str]:
+        return {'quiz': item[0], 'id': item[1]}
+
+    exact = []
+    conflicts = []
+    for prompt, items in by_prompt.items():
+        if len(items) < 2:
+            continue
+        by_answer = defaultdict(list)
+        for item in items:
+            by_answer[item[2]].append(item)
+        for group in by_answer.values():
+            if len(group) > 1:
+                exact.append({'prompt': prompt, 'questions': [ref(item) for item in group]})
+        if len(by_answer) > 1:
+            conflicts.append({
+                'prompt': prompt,
+                'answers': {answer: [ref(item) for item in group] for answer, group in by_answer.items()}
+            })
+
+    prompts = list(by_prompt)
+    answer_words: Dict[str, FrozenSet[str]] = {}
+    near = []
+    for i, j, prompt_similarity in similar_pairs([word_set(p) for p in prompts], threshold):
+        for a in by_prompt[prompts[i]]:
+            for b in by_prompt[prompts[j]]:
+                for answer in (a[2], b[2]):
+                    if answer not in answer_words:
+                        answer_words[answer] = word_set(answer)
+                answer_similarity = jaccard(answer_words[a[2]], answer_words[b[2]])
+                if answer_similarity >= threshold:
+                    near.append({
+                        'a': ref(a),
+                        'b': ref(b),
+                        'prompt_similarity': round(prompt_similarity, 3),
+                        'answer_similarity': round(answer_similarity, 3),
+                    })
+
+    near.sort(key=lambda pair: (-pair['prompt_similarity'], pair['a']['quiz'], pair['a']['id']))
+    return {
+        'questions': count,
+        'threshold': threshold,
+        'exact': exact,
+        'conflicts': conflicts,
+        'near': near,
+    }
+
+
+def iter_bank_questions(data_manager: DataManager) -> Iterable[Tuple[str, str, str, str]]:
+    """Yield (quiz_filepath, question_id, prompt, answer) for every question in the bank"""
+    for quiz_files in data_manager.discover_quizzes().values():
+        for quiz_file in quiz_files:
+            quiz = data_manager.load_quiz(quiz_file)
+            if not quiz:
+                continue
+            for question in quiz.questions.values():
+                yield quiz_file, question.id, question.prompt, question.answer
@@ -0,0 +1,183 @@
+"""
+Distractor selection for QUIZR - plausible wrong answers for multiple-choice questions
+
+Wrong answers are drawn from the answers of other questions in the same
+folder, ranked by how similar they look to the right answer. Similarity is
+the cosine of character trigram vectors, scored through an inverted index
+so a lookup only touches answers sharing a trigram with the right one.
+"""
+
+import math
+import random
+from collections import Counter
+from typing import Dict, List
+
+from .config import Config
+from .file_cache import QuizFileCache
+from .mastery import folders_of
+from .models import Question
+from .profiling import timed
+
+
+NGRAM = 3
+
+# Answers with the most shared trigrams that are ranked by cosine similarity
+SHORTLIST = 50
+
+# Trigrams in more than this share of a large folder's answers (the 'ion' of
+# every protocol name) are left out of scoring; they say little about
+# similarity and their posting lists are the longest
+COMMON_SHARE = 0.1
+COMMON_MIN = 1000
+
+
+def ngrams(form: str) -> Counter:
+    """Count the character trigrams of a normalized answer, padded at the ends"""
+    padded = f" {form} "
+    return Counter(padded[i:i + NGRAM] for i in range(max(len(padded) - NGRAM + 1, 1)))
+
+
+def shape_distance(form: str, other: str) -> tuple:
+    """Compare how two normalized answers look: numeric or not, then length"""
+    return (form.isdigit() != other.isdigit(), abs(len(form) - len(other)))
+
+
+class _NgramIndex:
+    """Inverted trigram index over the distinct answers of one folder"""
+
+    def __init__(self, answers: List[str], forms: List[str]):
+        self.answers = answers
+        self.forms = forms
+        self.norms: List[float] = []
+        # trigram -> answer indices, repeated as often as the answer has the trigram,
+        # so Counter.update() sums the dot products in C
+        self.postings: Dict[str, List[int]] = {}
+        for index, form in enumerate(forms):
+            vector = ngrams(form)
+            self.norms.append(math.sqrt(sum(count * count for count in vector.values())))
+            for gram, count in vector.items():
+                entries = self.postings.setdefault(gram, [])
+                entries.extend([index] * count)
+        self.common_limit = max(int(COMMON_SHARE * len(forms)), COMMON_MIN)
+
+    def ranked(self, form: str, limit: int) -> List[int]:
+        """Rank answers by similarity to a normalized answer, most similar first
+
+        Args:
+            form: Normalized answer
+            limit: Maximum number of answers to return
+
+        Returns:
+            Indices of the most similar answers; answers sharing no trigram
+            with form are left out
+        """
+        shared = [(count, self.postings[gram]) for gram, count in ngrams(form).items() if gram in self.postings]
+        # Score by the distinctive trigrams, unless form has nothing but common ones
+        shared = [item for item in shared if len(item[1]) <= self.common_limit] or shared
+        scores: Counter = Counter()
+        for count, entries in shared:
+            for _ in range(count):
+                scores.update(entries)
+        # Shortlist by shared trigrams, then order the shortlist by cosine
+        shortlist = scores.most_common(max(4 * limit, SHORTLIST))
+        shortlist.sort(key=lambda item: -item[1] / self.norms[item[0]])
+        return [index for index, _ in shortlist[:limit]]
+
+
+class DistractorIndex:
+    """Answers of the whole bank, grouped by folder, for drawing distractors
+
+    The answers of each quiz file are cached in the cache directory by file
+    signature, so only changed files are parsed again. A folder's trigram
+    index is built the first time a question from it needs distractors.
+    """
+
+    CACHE_FILE = 'answers.json'
+
+    def __init__(self, config: Config, data_manager):
+        """Initialize distractor index
+
+        Args:
+            config: Configuration object
+            data_manager: Data manager holding quizzes
+        """
+        self.config = config
+        self.data_manager = data_manager
+        self.normalizer = data_manager.normalizer
+        self.cache = QuizFileCache(config, data_manager, self.CACHE_FILE)
+        self._folder_answers: Dict[str, List[str]] = {}  # Folder -> answers of every quiz below it
+        self._indexes: Dict[str, _NgramIndex] = {}
+
+    @timed('build distractor index')
+    def build(self) -> 'DistractorIndex':
+        """Collect the answers of every discovered quiz
+
+        Returns:
+            This index, for chaining
+        """
+        self._folder_answers.clear()
+        self._indexes.clear()
+
+        answers_by_file = self.cache.collect(lambda quiz: [str(question.answer) for question in quiz.questions.values()])
+        for quiz_file, answers in answers_by_file.items():
+            for folder in ['', *folders_of(quiz_file)]:
+                self._folder_answers.setdefault(folder, []).extend(answers)
+        return self
+
+    def _index(self, folder: str) -> _NgramIndex:
+        """Get the trigram index of a folder, building it on first use"""
+        if folder not in self._indexes:
+            distinct: Dict[str, str] = {}
+            for answer in self._folder_answers.get(folder, []):
+                form = self.normalizer.normalize_answer(answer)
+                if form and form not in distinct:
+                    distinct[form] = answer
+            self._indexes[folder] = _NgramIndex(list(distinct.values()), list(distinct))
+        return self._indexes[folder]
+
+    def candidates(self, quiz_file: str, question: Question, rng: random.Random, limit: int = 12) -> List[str]:
+        """Get wrong answers for a question, the most plausible first
+
+        Answers come from the question's own folder. If it has too few, the
+        search widens to the enclosing folders and finally the whole bank.
+        Answers with no trigram in common with the right one are drawn at
+        random after the similar ones, preferring ones of a similar shape.
+
+        Args:
+            quiz_file: Quiz file the question belongs to
+            question: Question to find distractors for
+            rng: Random generator used to order unrelated answers
+            limit: Maximum number of candidates
+
+        Returns:
+            Distinct candidate answers, none of them an accepted answer
+        """
+        accepted = question.accepted
+        if accepted is None:
+            accepted = self.normalizer.accepted_forms(question.answer, question.alternatives)
+        form = self.normalizer.normalize_answer(question.answer)
+
+        picked: List[str] = []
+        seen = set(accepted)
+
+        def take(index: _NgramIndex, order: List[int]) -> bool:
+            for i in order:
+                if index.forms[i] not in seen:
+                    seen.add(index.forms[i])
+                    picked.append(index.answers[i])
+                    if len(picked) >= limit:
+                        return True
+            return False
+
+        for folder in reversed(['', *folders_of(quiz_file)]):
+            index = self._index(folder)
+            wanted = limit - len(picked)
+            if take(index, index.ranked(form, wanted + len(seen))):
+                break
+            # Then a random handful of the rest, those shaped like the
+            # answer (a port number for a port number) first
+            unrelated = rng.sample(range(len(index.answers)), min(len(index.answers), max(4 * wanted, SHORTLIST)))
+            unrelated.sort(key=lambda i: shape_distance(form, index.forms[i]))
+            if take(index, unrelated):
+                break
+        return picked
@@ -0,0 +1,108 @@
+"""
+Derived-data caches for QUIZR - JSON files in the cache directory that spare re-parsing quizzes
+"""
+
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+from .config import Config
+from .models import Quiz
+from .storage import atomic_write_text
+
+
+def load_json_cache(path: str) -> Dict[str, Any]:
+    """Load a JSON cache, treating a missing or damaged file as empty
+
+    Args:
+        path: Cache file
+
+    Returns:
+        Cached mapping
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            cache = json.load(file)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_json_cache(path: str, cache: Dict[str, Any]) -> None:
+    """Atomically write a JSON cache, ignoring failures
+
+    A cache that cannot be written is simply rebuilt next time.
+
+    Args:
+        path: Cache file
+        cache: Mapping to store
+    """
+    try:
+        atomic_write_text(path, json.dumps(cache))
+    except OSError:
+        pass
+
+
+class QuizFileCache:
+    """A value derived from each quiz file, cached until the file changes
+
+    Entries are keyed by quiz file and stamped with the (mtime_ns, size) of
+    the file the quiz is read from: its YAML file, or the mounted bundle.
+    """
+
+    def __init__(self, config: Config, data_manager, filename: str):
+        """Initialize cache
+
+        Args:
+            config: Configuration object
+            data_manager: Data manager holding quizzes
+            filename: Cache file name inside the cache directory
+        """
+        self.config = config
+        self.data_manager = data_manager
+        self.path = os.path.join(config.get_cache_dir(), filename)
+
+    def signature(self, quiz_file: str) -> Optional[List[int]]:
+        """Get the (mtime_ns, size) of the file a quiz is read from"""
+        bundle = self.data_manager.bundle
+        source = bundle.path if bundle else os.path.join(self.config.get_exercises_dir(), *quiz_file.split('/'))
+        try:
+            stat = os.stat(source)
+        except OSError:
+            return None
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def collect(self, derive: Callable[[Quiz], Any]) -> Dict[str, Any]:
+        """Get the derived value of every discovered quiz
+
+        Quizzes whose file is unchanged since the last call are not loaded.
+        Quizzes that fail to load are left out.
+
+        Args:
+            derive: Function computing the JSON-serializable value of a quiz
+
+        Returns:
+            Values keyed by quiz file, in discovery order
+        """
+        cache = load_json_cache(self.path)
+        fresh_cache = {}
+        values = {}
+        for quiz_files in self.data_manager.discover_quizzes().values():
+            for quiz_file in quiz_files:
+                signature = self.signature(quiz_file)
+                cached = cache.get(quiz_file)
+                if (signature is not None and isinstance(cached, dict) and 'value' in cached
+                        and cached.get('signature') == signature):
+                    value = cached['value']
+                else:
+                    quiz = self.data_manager.load_quiz(quiz_file)
+                    if quiz is None:
+                        continue
+                    value = derive(quiz)
+                if signature is not None:
+                    fresh_cache[quiz_file] = {'signature': signature, 'value': value}
+                values[quiz_file] = value
+
+        if fresh_cache != cache:
+            save_json_cache(self.path, fresh_cache)
+        return values
@@ -0,0 +1,73 @@
+"""
+Question identity for QUIZR - content fingerprints that follow questions across renames
+"""
+
+import hashlib
+import re
+import unicodedata
+from typing import Any, Dict, Optional, Tuple
+
+from .compaction import iter_entries
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text for comparison: case, punctuation and whitespace folded"""
+    text = unicodedata.normalize('NFKC', str(text)).lower()
+    text = re.sub(r'[^\w\s]', ' ', text)
+    return ' '.join(text.split())
+
+
+def fingerprint(prompt: str, answer: str) -> str:
+    """Get a content fingerprint for a question
+
+    Questions with the same prompt and answer, up to case, punctuation and
+    whitespace, share a fingerprint wherever they live.
+
+    Args:
+        prompt: Question prompt
+        answer: Expected answer
+
+    Returns:
+        16 hex digit digest
+    """
+    content = normalize_text(prompt) + '\x1f' + normalize_text(answer)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()[:16]
+
+
+class FingerprintIndex:
+    """Maps question fingerprints to where their progress is stored
+
+    Lookups are a single dictionary access, so re-linking stays linear in the
+    number of questions. Locations may go stale as progress moves; callers
+    check the record at a location before trusting it.
+    """
+
+    def __init__(self):
+        self._locations: Dict[str, Tuple[str, Any]] = {}
+
+    @classmethod
+    def build(cls, progress_data: Dict[str, Any]) -> 'FingerprintIndex':
+        """Index every progress entry that carries a fingerprint
+
+        Args:
+            progress_data: Nested folder -> quiz file -> question id mapping
+
+        Returns:
+            New index
+        """
+        index = cls()
+        for quiz_filepath, question_id, progress in iter_entries(progress_data):
+            if isinstance(progress, dict) and progress.get('fingerprint'):
+                index.add(progress['fingerprint'], quiz_filepath, question_id)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def add(self, question_fingerprint: str, quiz_filepath: str, question_id: Any) -> None:
+        """Record where a fingerprint's progress is stored"""
+        self._locations[question_fingerprint] = (quiz_filepath, question_id)
+
+    def get(self, question_fingerprint: str) -> Optional[Tuple[str, Any]]:
+        """Get the (quiz file, question id) a fingerprint was last stored at"""
+        return self._locations.get(question_fingerprint)
@@ -0,0 +1,312 @@
+"""
+Image manifest for QUIZR - sizes, hashes and previews of the files in images/
+
+The manifest is kept in the cache directory and records every image's size,
+modification time and SHA-256, so checking whether a question's image
+exists is a dictionary lookup. Keeping the manifest current costs one stat
+per directory: adding, removing or renaming a file changes the modification
+time of its directory, and only such directories are rescanned. Files whose
+size and modification time are unchanged keep their hash, so a rescan only
+reads new or changed images. A file overwritten in place, without a rename,
+can go unnoticed until `quizr images --rebuild`.
+
+With `image_previews` enabled and Pillow installed, a small terminal
+rendering of each image is cached in images/.previews/ and shown in place
+of opening an image viewer.
+"""
+
+import hashlib
+import importlib.util
+import json
+import os
+import posixpath
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional
+
+from .config import Config
+from .storage import atomic_write_text
+
+
+MANIFEST_FILE = 'images.json'
+PREVIEW_DIR = '.previews'
+MANIFEST_VERSION = 1
+
+
+@dataclass
+class ImageEntry:
+    """What the manifest knows about one image file"""
+    size: int
+    mtime_ns: int
+    sha256: str
+    preview: Optional[str] = None  # File name in images/.previews/
+
+
+def normalize_image_name(name: str) -> str:
+    """Get the manifest key of an image name as written in a quiz file"""
+    return posixpath.normpath(str(name).strip().replace('\\', '/'))
+
+
+def _hash_file(path: str) -> str:
+    """Get the hex SHA-256 digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def previews_available() -> bool:
+    """Check if Pillow, needed for previews, is installed
+
+    Pillow is only imported to render a preview; importing it on every start
+    would slow down every command.
+    """
+    return importlib.util.find_spec('PIL') is not None
+
+
+def render_preview(path: str, width: int) -> str:
+    """Render an image as rows of coloured half blocks for a truecolor terminal
+
+    Each character cell shows two pixels: the upper one as the foreground of
+    '▀' and the lower one as the background.
+
+    Args:
+        path: Image file
+        width: Width of the rendering in characters
+
+    Returns:
+        Rendering with ANSI colour codes, one line per row of cells
+
+    Raises:
+        RuntimeError: If Pillow is not installed
+        OSError: If the image cannot be read
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        raise RuntimeError("Image previews need Pillow (pip install Pillow)")
+    with Image.open(path) as image:
+        image = image.convert('RGB')
+        width = max(1, min(width, image.width))
+        rows = max(1, round(image.height * width / image.width / 2))
+        pixels = image.resize((width, rows * 2)).load()
+
+    lines = []
+    for row in range(rows):
+        cells = []
+        for column in range(width):
+            top, bottom = pixels[column, 2 * row], pixels[column, 2 * row + 1]
+            cells.append("\x1b[38;2;{};{};{}m\x1b[48;2;{};{};{}m▀".format(*top, *bottom))
+        lines.append(''.join(cells) + "\x1b[0m")
+    return '\n'.join(lines)
+
+
+class ImageManifest:
+    """Every file in the images directory, kept current by directory modification times"""
+
+    def __init__(self, images_dir: str, manifest_path: str, previews: bool = False, preview_width: int = 48):
+        """Initialize an empty manifest
+
+        Args:
+            images_dir: Directory holding the images
+            manifest_path: File the manifest is saved to
+            previews: Whether to render terminal previews of new images
+            preview_width: Width of the previews in characters
+        """
+        self.images_dir = images_dir
+        self.previews = previews and previews_available()
+        self.preview_width = preview_width
+        self.path = manifest_path
+        self.preview_dir = os.path.join(images_dir, PREVIEW_DIR)
+        self.entries: Dict[str, ImageEntry] = {}  # Image name relative to images_dir -> entry
+        self.directories: Dict[str, int] = {}  # Directory relative to images_dir -> mtime_ns when scanned
+
+    @classmethod
+    def load(cls, config: Config) -> 'ImageManifest':
+        """Load the saved manifest of the configured images directory and bring it up to date
+
+        Args:
+            config: Configuration object
+
+        Returns:
+            Current manifest
+        """
+        manifest = cls(config.get_images_dir(), os.path.join(config.get_cache_dir(), MANIFEST_FILE),
+                       bool(config.get('image_previews')), config.get('image_preview_width', 48))
+        manifest._read()
+        manifest.refresh()
+        return manifest
+
+    def _read(self) -> None:
+        """Read the saved manifest, leaving this one empty if it is missing or unusable"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            if data.get('version') != MANIFEST_VERSION or data.get('previews') != self.previews:
+                return
+            entries = {name: ImageEntry(**entry) for name, entry in data['images'].items()}
+            directories = {name: int(mtime_ns) for name, mtime_ns in data['directories'].items()}
+        except (OSError, ValueError, TypeError, KeyError, AttributeError):
+            return
+        self.entries, self.directories = entries, directories
+
+    def save(self) -> None:
+        """Write the manifest; failing to just means rescanning next time"""
+        data = {
+            'version': MANIFEST_VERSION,
+            'previews': self.previews,
+            'directories': self.directories,
+            'images': {name: asdict(entry) for name, entry in sorted(self.entries.items())},
+        }
+        try:
+            atomic_write_text(self.path, json.dumps(data, separators=(',', ':')))
+        except OSError:
+            pass
+
+    def _full_path(self, name: str) -> str:
+        """Get the full path of a file or directory named relative to images_dir"""
+        return os.path.join(self.images_dir, *name.split('/')) if name else self.images_dir
+
+    def _directory_mtime(self, directory: str) -> Optional[int]:
+        """Get the modification time of a directory under images_dir, or None if it is gone"""
+        try:
+            return os.stat(self._full_path(directory)).st_mtime_ns
+        except OSError:
+            return None
+
+    def is_current(self) -> bool:
+        """Check whether no directory has changed since the manifest was built"""
+        if not self.directories:
+            return not os.path.isdir(self.images_dir)
+        return all(self._directory_mtime(directory) == mtime_ns for directory, mtime_ns in self.directories.items())
+
+    def refresh(self, rebuild: bool = False) -> Dict[str, int]:
+        """Rescan the images directory if anything in it changed
+
+        Args:
+            rebuild: Rehash every image, even unchanged ones
+
+        Returns:
+            Counts of 'images', 'hashed' (new or changed) and 'removed' images
+        """
+        counts = {'images': len(self.entries), 'hashed': 0, 'removed': 0}
+        if not rebuild and self.is_current():
+            return counts
+
+        old_entries = {} if rebuild else self.entries
+        old_files: Dict[str, List[str]] = {}  # Directory -> names of the images it held
+        old_subdirectories: Dict[str, List[str]] = {}
+        if not rebuild:
+            for name in self.entries:
+                old_files.setdefault(posixpath.dirname(name), []).append(name)
+            for directory in self.directories:
+                if directory:
+                    old_subdirectories.setdefault(posixpath.dirname(directory), []).append(directory)
+
+        entries: Dict[str, ImageEntry] = {}
+        directories: Dict[str, int] = {}
+        if self.previews:
+            # Created before the scan so that it doesn't change the directory's modification time later
+            try:
+                os.makedirs(self.preview_dir, exist_ok=True)
+            except OSError:
+                pass
+        pending = [''] if os.path.isdir(self.images_dir) else []
+        while pending:
+            directory = pending.pop()
+            full_dir = self._full_path(directory)
+            try:
+                directories[directory] = os.stat(full_dir).st_mtime_ns
+                if not rebuild and self.directories.get(directory) == directories[directory]:
+                    # Nothing was added, removed or renamed here
+                    entries.update((name, old_entries[name]) for name in old_files.get(directory, []))
+                    pending.extend(old_subdirectories.get(directory, []))
+                    continue
+                with os.scandir(full_dir) as scan:
+                    found = list(scan)
+            except OSError:
+                continue
+            for item in found:
+                if item.name.startswith('.'):
+                    continue  # The manifest, previews and other hidden files
+                name = f"{directory}/{item.name}" if directory else item.name
+                if item.is_dir():
+                    pending.append(name)
+                    continue
+                try:
+                    stat = item.stat()
+                except OSError:
+                    continue
+                old = old_entries.get(name)
+                if old is not None and old.size == stat.st_size and old.mtime_ns == stat.st_mtime_ns:
+                    entries[name] = old
+                    continue
+                try:
+                    entries[name] = self._describe(item.path, stat.st_size, stat.st_mtime_ns)
+                except OSError:
+                    continue
+                counts['hashed'] += 1
+
+        counts['images'] = len(entries)
+        counts['removed'] = len(set(self.entries) - set(entries))
+        self.entries, self.directories = entries, directories
+        self._prune_previews()
+        self.save()
+        return counts
+
+    def _describe(self, path: str, size: int, mtime_ns: int) -> ImageEntry:
+        """Hash an image and render its preview if previews are enabled"""
+        entry = ImageEntry(size=size, mtime_ns=mtime_ns, sha256=_hash_file(path))
+        if self.previews:
+            preview = f"{entry.sha256[:16]}-{self.preview_width}.ans"
+            preview_path = os.path.join(self.preview_dir, preview)
+            if not os.path.exists(preview_path):
+                try:
+                    atomic_write_text(preview_path, render_preview(path, self.preview_width))
+                except (OSError, ValueError):
+                    return entry  # Not an image Pillow can read
+            entry.preview = preview
+        return entry
+
+    def _prune_previews(self) -> None:
+        """Delete cached previews no image uses any more"""
+        try:
+            cached = os.listdir(self.preview_dir)
+        except OSError:
+            return
+        used = {entry.preview for entry in self.entries.values()}
+        for preview in cached:
+            if preview not in used:
+                try:
+                    os.remove(os.path.join(self.preview_dir, preview))
+                except OSError:
+                    pass
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, name: str) -> bool:
+        return normalize_image_name(name) in self.entries
+
+    def get(self, name: str) -> Optional[ImageEntry]:
+        """Get the entry of an image, or None if no such file exists"""
+        return self.entries.get(normalize_image_name(name))
+
+    def get_path(self, name: str) -> str:
+        """Get the full path of an image"""
+        return self._full_path(normalize_image_name(name))
+
+    def missing(self, names: Iterable[str]) -> List[str]:
+        """Get the names that have no image file, in first-seen order without repeats"""
+        return list(dict.fromkeys(name for name in names if normalize_image_name(name) not in self.entries))
+
+    def read_preview(self, name: str) -> Optional[str]:
+        """Get the cached terminal preview of an image, or None if it has none"""
+        entry = self.get(name)
+        if entry is None or not entry.preview:
+            return None
+        try:
+            with open(os.path.join(self.preview_dir, entry.preview), 'r', encoding='utf-8') as file:
+                return file.read()
+        except OSError:
+            return None
@@ -0,0 +1,549 @@
+"""
+Import and export for QUIZR - streams CSV, JSON and Anki decks into and out of the exercises tree
+
+Records are read, converted and written one at a time, so memory use does
+not grow with the size of the source. Only the fingerprints of the
+questions in each target file are kept, to skip questions already there.
+"""
+
+import csv
+import html
+import itertools
+import json
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import zipfile
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, IO, Iterator, List, Optional
+
+import yaml
+
+from .config import Config
+from .identity import fingerprint
+
+
+FORMATS = ['csv', 'tsv', 'json', 'jsonl', 'apkg']
+
+# Column names accepted for each field, lowercase
+COLUMN_ALIASES = {
+    'prompt': ('prompt', 'question', 'front'),
+    'answer': ('answer', 'back'),
+    'folder': ('folder', 'deck', 'path'),
+    'quiz': ('quiz', 'file', 'topic'),
+    'id': ('id',),
+    'image': ('image',),
+    'strict': ('strict',),
+    'alternatives': ('alternatives', 'alternative', 'also'),
+}
+
+EXPORT_FIELDS = ['folder', 'quiz', 'id', 'prompt', 'answer', 'image', 'strict', 'alternatives']
+
+# Separates alternative answers within one spreadsheet cell
+ALTERNATIVES_SEPARATOR = '|'
+
+ID_PATTERN = re.compile(r'^q_(\d+):', re.MULTILINE)
+
+
+@dataclass
+class Card:
+    """A question on its way into or out of the exercises tree"""
+    folder: str
+    quiz: str
+    prompt: str
+    answer: str
+    id: Optional[str] = None
+    image: Optional[str] = None
+    strict: bool = False
+    alternatives: List[str] = field(default_factory=list)
+
+
+def detect_format(path: str) -> str:
+    """Guess a file format from its extension
+
+    Raises:
+        ValueError: If the extension is not a supported format
+    """
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    if extension not in FORMATS:
+        raise ValueError(f"Unknown format '.{extension}'; use one of: {', '.join(FORMATS)}")
+    return extension
+
+
+def safe_name(name: str) -> str:
+    """Turn a deck or topic name into a file or folder name"""
+    name = re.sub(r'[\\/:*?"<>|]+', '_', str(name).strip())
+    name = re.sub(r'\s+', '_', name).strip('._')
+    return name or 'Untitled'
+
+
+def _parse_strict(value: Any) -> bool:
+    """Read a strict flag from a spreadsheet cell or JSON value"""
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'y', 'x')
+
+
+def _parse_alternatives(value: Any) -> List[str]:
+    """Read alternative answers from a JSON list or a '|'-separated cell"""
+    if isinstance(value, list):
+        items = value
+    else:
+        items = str(value).split(ALTERNATIVES_SEPARATOR)
+    return [str(item).strip() for item in items if item is not None and str(item).strip()]
+
+
+def _card_from_mapping(row: Dict[str, Any], default_folder: str, default_quiz: str) -> Optional[Card]:
+    """Build a card from a CSV row or JSON object, or None if it has no prompt"""
+    fields = {}
+    lowered = {str(key).strip().lower(): value for key, value in row.items() if key is not None}
+    for field, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            value = lowered.get(alias)
+            if value not in (None, ''):
+                fields[field] = value
+                break
+
+    prompt = str(fields.get('prompt', '')).strip()
+    if not prompt:
+        return None
+    folder = str(fields.get('folder', default_folder)).replace('::', '/')
+    return Card(
+        folder='/'.join(safe_name(part) for part in folder.split('/') if part.strip()),
+        quiz=safe_name(fields.get('quiz', default_quiz)),
+        prompt=prompt,
+        answer=str(fields.get('answer', '')).strip(),
+        id=str(fields['id']).strip() if 'id' in fields else None,
+        image=str(fields['image']).strip() if 'image' in fields else None,
+        strict=_parse_strict(fields.get('strict', False)),
+        alternatives=_parse_alternatives(fields.get('alternatives', []))
+    )
+
+
+def read_csv(path: str, default_folder: str, default_quiz: str, delimiter: str = ',') -> Iterator[Card]:
+    """Stream cards from a CSV or TSV file
+
+    The first row is used as a header if it names a prompt column
+    (prompt, question or front); otherwise the columns are prompt, answer.
+    """
+    with open(path, 'r', encoding='utf-8-sig', newline='') as file:
+        reader = csv.reader(file, delimiter=delimiter)
+        header = next(reader, None)
+        if header is None:
+            return
+        names = [column.strip().lower() for column in header]
+        rows = reader
+        if not set(names) & set(COLUMN_ALIASES['prompt']):
+            names = ['prompt', 'answer']
+            rows = itertools.chain([header], reader)
+
+        for row in rows:
+            card = _card_from_mapping(dict(zip(names, row)), default_folder, default_quiz)
+            if card:
+                yield card
+
+
+def _iter_json_array(file: IO[str], chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array without reading it all"""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    started = False
+    exhausted = False
+
+    while True:
+        # Skip whitespace and separators up to the next element
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position < len(buffer) or exhausted:
+                break
+            chunk = file.read(chunk_size)
+            buffer, position = buffer[position:] + chunk, 0
+            exhausted = not chunk
+
+        if position >= len(buffer):
+            raise ValueError("JSON array is not closed")
+        if not started:
+            if buffer[position] != '[':
+                raise ValueError("JSON import expects an array of objects")
+            started = True
+            position += 1
+            continue
+        if buffer[position] == ']':
+            return
+
+        try:
+            value, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if exhausted:
+                raise
+            chunk = file.read(chunk_size)
+            buffer, position = buffer[position:] + chunk, 0
+            exhausted = not chunk
+            continue
+        # A number at the end of the buffer may continue in the next chunk
+        if end == len(buffer) and not exhausted:
+            chunk = file.read(chunk_size)
+            buffer, position = buffer[position:] + chunk, 0
+            exhausted = not chunk
+            continue
+        yield value
+        position = end
+
+
+def read_json(path: str, default_folder: str, default_quiz: str) -> Iterator[Card]:
+    """Stream cards from a JSON array of objects or a JSON-lines file"""
+    with open(path, 'r', encoding='utf-8-sig') as file:
+        if path.lower().endswith('.jsonl'):
+            items = (json.loads(line) for line in file if line.strip())
+        else:
+            items = _iter_json_array(file)
+        for item in items:
+            if isinstance(item, dict):
+                card = _card_from_mapping(item, default_folder, default_quiz)
+                if card:
+                    yield card
+
+
+IMAGE_PATTERN = re.compile(r'<img[^>]*\bsrc=["\']([^"\']+)["\']', re.IGNORECASE)
+TAG_PATTERN = re.compile(r'<[^>]+>')
+BREAK_PATTERN = re.compile(r'<br\s*/?>|</div>|</p>', re.IGNORECASE)
+
+
+def _anki_text(field: str) -> str:
+    """Convert an Anki note field from HTML to plain text"""
+    text = BREAK_PATTERN.sub(' ', field)
+    text = TAG_PATTERN.sub('', text)
+    text = re.sub(r'\[sound:[^\]]*\]', '', text)
+    return ' '.join(html.unescape(text).split())
+
+
+def _anki_decks(connection: sqlite3.Connection) -> Dict[int, str]:
+    """Map Anki deck ids to names, for old and new collection schemas"""
+    try:
+        rows = connection.execute('SELECT id, name FROM decks').fetchall()
+        if rows:
+            return {deck_id: name.replace('\x1f', '::') for deck_id, name in rows}
+    except sqlite3.OperationalError:
+        pass
+    row = connection.execute('SELECT decks FROM col').fetchone()
+    decks = json.loads(row[0]) if row and row[0] else {}
+    return {int(deck_id): deck.get('name', 'Default') for deck_id, deck in decks.items()}
+
+
+def read_apkg(path: str, default_folder: str, images_dir: Optional[str] = None) -> Iterator[Card]:
+    """Stream cards from an Anki deck package
+
+    The first field of each note is the prompt and the second the answer.
+    Sub-decks ('A+::Hardware::CPU') become folders with the last level as
+    the quiz. Images on the front of a card are copied into images_dir.
+
+    Raises:
+        ValueError: If the package has no collection QUIZR can read
+    """
+    with zipfile.ZipFile(path) as package:
+        names = set(package.namelist())
+        collection = next((name for name in ('collection.anki21', 'collection.anki2') if name in names), None)
+        if collection is None:
+            raise ValueError("Package has no readable collection; in Anki, export with "
+                             "'Support older Anki versions' enabled")
+
+        try:
+            media = json.loads(package.read('media')) if 'media' in names else {}
+            media_files = {filename: number for number, filename in media.items()}
+        except (ValueError, UnicodeDecodeError):
+            media_files = {}  # Newer packages use a binary media list
+
+        fd, db_path = tempfile.mkstemp(suffix='.anki2')
+        try:
+            with os.fdopen(fd, 'wb') as target, package.open(collection) as source:
+                shutil.copyfileobj(source, target)
+
+            connection = sqlite3.connect(db_path)
+            try:
+                decks = _anki_decks(connection)
+                rows = connection.execute(
+                    'SELECT notes.flds, cards.did FROM notes JOIN cards ON cards.nid = notes.id '
+                    'WHERE cards.ord = 0 ORDER BY cards.did, notes.id'
+                )
+                for fields, deck_id in rows:
+                    parts = fields.split('\x1f')
+                    prompt = _anki_text(parts[0])
+                    answer = _anki_text(parts[1]) if len(parts) > 1 else ''
+
+                    image = None
+                    found = IMAGE_PATTERN.search(parts[0])
+                    if found:
+                        image = html.unescape(found.group(1))
+                        if images_dir and image in media_files:
+                            destination = os.path.join(images_dir, os.path.basename(image))
+                            if not os.path.exists(destination):
+                                with package.open(media_files[image]) as source, open(destination, 'wb') as target:
+                                    shutil.copyfileobj(source, target)
+                        image = os.path.basename(image)
+                    if not prompt and image:
+                        prompt = "What is shown in the image?"
+                    if not prompt:
+                        continue
+
+                    deck = [safe_name(part) for part in decks.get(deck_id, 'Default').split('::')]
+                    folder = '/'.join([safe_name(part) for part in default_folder.split('/') if part] + deck[:-1])
+                    yield Card(folder=folder, quiz=deck[-1], prompt=prompt, answer=answer, image=image)
+            finally:
+                connection.close()
+        finally:
+            os.remove(db_path)
+
+
+def _quote(text: str) -> str:
+    """Write a string as a double-quoted YAML scalar"""
+    out = []
+    for char in text:
+        code = ord(char)
+        if char == '\\':
+            out.append('\\\\')
+        elif char == '"':
+            out.append('\\"')
+        elif char == '\n':
+            out.append('\\n')
+        elif char == '\t':
+            out.append('\\t')
+        elif code < 0x20 or 0x7F <= code < 0xA0 or code in (0x2028, 0x2029, 0xFEFF) or 0xD800 <= code < 0xE000:
+            out.append(f'\\x{code:02x}' if code < 0x100 else f'\\u{code:04x}')
+        else:
+            out.append(char)
+    return '"' + ''.join(out) + '"'
+
+
+def format_question(question_id: str, card: Card) -> str:
+    """Format a card as a quiz file entry, in the layout of the bundled quizzes"""
+    lines = [f"{question_id}:"]
+    if card.image:
+        lines.append(f"  image: {_quote(card.image)}")
+    lines.append(f"  prompt: {_quote(card.prompt)}")
+    lines.append(f"  answer: {_quote(card.answer)}")
+    if card.alternatives:
+        lines.append(f"  alternatives: [{', '.join(_quote(alternative) for alternative in card.alternatives)}]")
+    if card.strict:
+        lines.append("  strict: true")
+    return '\n'.join(lines) + '\n\n'
+
+
+class _QuizFileWriter:
+    """Appends questions to one quiz file, assigning ids"""
+
+    def __init__(self, full_path: str, name: str, source: str):
+        self.full_path = full_path
+        self.file: Optional[IO[str]] = None
+        self.next_number = 0
+        self.ids = set()
+        self.fingerprints = set()
+        self.created = not os.path.exists(full_path)
+
+        if self.created:
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, 'w', encoding='utf-8') as file:
+                file.write(f"# {name}.yaml\n# Imported from {os.path.basename(source)}\n\n")
+            return
+
+        with open(full_path, 'r', encoding='utf-8') as file:
+            text = file.read()
+        self.next_number = max((int(number) + 1 for number in ID_PATTERN.findall(text)), default=0)
+        try:
+            existing = yaml.safe_load(text) or {}
+        except yaml.YAMLError:
+            existing = {}
+        if isinstance(existing, dict):
+            for question_id, question in existing.items():
+                self.ids.add(str(question_id))
+                if isinstance(question, dict):
+                    self.fingerprints.add(fingerprint(question.get('prompt', ''), question.get('answer', '')))
+        if text and not text.endswith('\n\n'):
+            with open(full_path, 'a', encoding='utf-8') as file:
+                file.write('\n' if text.endswith('\n') else '\n\n')
+
+    def open(self) -> None:
+        """Open the file for appending if it isn't already"""
+        if self.file is None:
+            self.file = open(self.full_path, 'a', encoding='utf-8')
+
+    def close(self) -> None:
+        """Close the file until the next question for it arrives"""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def add(self, card: Card) -> bool:
+        """Append a card; returns False if the file already has the question"""
+        card_fingerprint = fingerprint(card.prompt, card.answer)
+        if card_fingerprint in self.fingerprints:
+            return False
+        self.fingerprints.add(card_fingerprint)
+
+        question_id = card.id if card.id and card.id not in self.ids and re.match(r'^[\w.-]+$', card.id) else None
+        while question_id is None or question_id in self.ids:
+            question_id = f"q_{self.next_number:03d}"
+            self.next_number += 1
+        self.ids.add(question_id)
+
+        self.open()
+        self.file.write(format_question(question_id, card))
+        return True
+
+
+class QuizTreeWriter:
+    """Writes cards into quiz files under the exercises directory
+
+    Many quiz files can be filled at once from an unsorted source; only the
+    most recently used handles are kept open.
+    """
+
+    def __init__(self, exercises_dir: str, source: str, max_open: int = 32):
+        self.exercises_dir = exercises_dir
+        self.source = source
+        self.max_open = max_open
+        self.writers: Dict[str, _QuizFileWriter] = {}
+        self._open: 'OrderedDict[str, None]' = OrderedDict()
+        self.counts = {'imported': 0, 'duplicates': 0}
+
+    def write(self, card: Card) -> None:
+        """Add a card to the quiz file its folder and quiz name map to"""
+        quiz_file = f"{card.folder}/{card.quiz}.yaml" if card.folder else f"{card.quiz}.yaml"
+        writer = self.writers.get(quiz_file)
+        if writer is None:
+            full_path = os.path.join(self.exercises_dir, *quiz_file.split('/'))
+            writer = self.writers[quiz_file] = _QuizFileWriter(full_path, card.quiz, self.source)
+
+        if writer.add(card):
+            self.counts['imported'] += 1
+        else:
+            self.counts['duplicates'] += 1
+
+        self._open[quiz_file] = None
+        self._open.move_to_end(quiz_file)
+        while len(self._open) > self.max_open:
+            oldest, _ = self._open.popitem(last=False)
+            self.writers[oldest].close()
+
+    def close(self) -> None:
+        """Close every open quiz file"""
+        for writer in self.writers.values():
+            writer.close()
+        self._open.clear()
+
+    @property
+    def files_created(self) -> List[str]:
+        """Quiz files that did not exist before the import"""
+        return sorted(path for path, writer in self.writers.items() if writer.created)
+
+
+def read_cards(config: Config, source: str, source_format: Optional[str] = None,
+               folder: str = 'Imported', quiz: Optional[str] = None) -> Iterator[Card]:
+    """Stream cards from a source file
+
+    Args:
+        config: Configuration object
+        source: File to import
+        source_format: One of FORMATS (default: from the file extension)
+        folder: Folder under the exercises directory for cards that don't
+            name one, and the parent folder of Anki decks
+        quiz: Quiz name for cards that don't name one (default: the source
+            file name)
+
+    Raises:
+        ValueError: If the format is unknown or the file can't be read
+    """
+    source_format = source_format or detect_format(source)
+    quiz = quiz or os.path.splitext(os.path.basename(source))[0]
+    if source_format in ('csv', 'tsv'):
+        return read_csv(source, folder, quiz, '\t' if source_format == 'tsv' else ',')
+    if source_format in ('json', 'jsonl'):
+        return read_json(source, folder, quiz)
+    if source_format == 'apkg':
+        return read_apkg(source, folder, config.get_images_dir())
+    raise ValueError(f"Cannot import format '{source_format}'")
+
+
+def import_cards(config: Config, source: str, source_format: Optional[str] = None,
+                 folder: str = 'Imported', quiz: Optional[str] = None) -> Dict[str, Any]:
+    """Import a CSV, JSON or Anki file into the exercises tree
+
+    Arguments are as for read_cards().
+
+    Returns:
+        Dictionary with counts of 'imported' and 'duplicates' (questions
+        already in their target file), and the 'files' written to
+    """
+    writer = QuizTreeWriter(config.get_exercises_dir(), source)
+    try:
+        for card in read_cards(config, source, source_format, folder, quiz):
+            writer.write(card)
+    finally:
+        writer.close()
+    return dict(writer.counts, files=sorted(writer.writers), created=writer.files_created)
+
+
+def iter_cards(data_manager, quiz_files: List[str]) -> Iterator[Card]:
+    """Stream the questions of quiz files as cards, one file loaded at a time"""
+    for quiz_file in quiz_files:
+        quiz = data_manager.load_quiz(quiz_file)
+        if quiz is None:
+            continue
+        folder = quiz_file.rsplit('/', 1)[0] if '/' in quiz_file else ''
+        for question_id, question in quiz.questions.items():
+            yield Card(folder=folder, quiz=quiz.name, prompt=str(question.prompt), answer=str(question.answer),
+                       id=str(question_id), image=question.image, strict=bool(question.strict),
+                       alternatives=list(question.alternatives))
+
+
+def export_cards(data_manager, output: str, quiz_files: List[str], output_format: Optional[str] = None) -> int:
+    """Export quiz files to CSV, TSV, JSON or JSON lines
+
+    Args:
+        data_manager: Data manager used to load quizzes
+        output: File to write
+        quiz_files: Quiz files to export
+        output_format: One of FORMATS except apkg (default: from the extension)
+
+    Returns:
+        Number of questions exported
+
+    Raises:
+        ValueError: If the format can't be exported
+    """
+    output_format = output_format or detect_format(output)
+    if output_format == 'apkg':
+        raise ValueError("Exporting Anki packages is not supported; export CSV and import it in Anki")
+
+    count = 0
+    tmp_path = output + '.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as file:
+            if output_format in ('csv', 'tsv'):
+                writer = csv.DictWriter(file, EXPORT_FIELDS, delimiter='\t' if output_format == 'tsv' else ',')
+                writer.writeheader()
+                for card in iter_cards(data_manager, quiz_files):
+                    row = {name: getattr(card, name) for name in EXPORT_FIELDS}
+                    row['alternatives'] = ALTERNATIVES_SEPARATOR.join(card.alternatives)
+                    writer.writerow(row)
+                    count += 1
+            elif output_format == 'jsonl':
+                for card in iter_cards(data_manager, quiz_files):
+                    file.write(json.dumps({name: getattr(card, name) for name in EXPORT_FIELDS}, ensure_ascii=False) + '\n')
+                    count += 1
+            else:
+                file.write('[')
+                for card in iter_cards(data_manager, quiz_files):
+                    file.write((',\n ' if count else '\n ') +
+                               json.dumps({name: getattr(card, name) for name in EXPORT_FIELDS}, ensure_ascii=False))
+                    count += 1
+                file.write('\n]\n')
+        os.replace(tmp_path, output)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return count
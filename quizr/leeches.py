@@ -0,0 +1,134 @@
+"""
+Leech detection for QUIZR - an index of the questions that keep being missed
+
+A leech is a question answered at least `leech_min_attempts` times with an
+accuracy below `leech_max_accuracy`. Leeches are ranked by how often they
+were missed, with a bonus when the latest answer was wrong. The ranking is
+a heap kept up to date as answers are recorded, so finding the worst
+leeches never scans the progress store.
+"""
+
+import heapq
+import itertools
+from typing import Any, Collection, Dict, List, Optional, Tuple
+
+from .compaction import iter_entries
+from .config import Config
+from .models import QuestionProgress
+
+# Added to a leech's score when its latest answer was wrong
+RECENT_FAILURE_WEIGHT = 2.0
+
+
+class LeechIndex:
+    """Questions with poor accuracy over many attempts, worst first
+
+    Recording an answer pushes the question's new score onto the heap in
+    O(log n). Superseded heap entries are discarded when they reach the top.
+    """
+
+    def __init__(self, min_attempts: int = 4, max_accuracy: float = 0.6):
+        """Initialize an empty index
+
+        Args:
+            min_attempts: Attempts needed before a question can be a leech
+            max_accuracy: Accuracy (0 to 1) a leech stays below
+        """
+        self.min_attempts = min_attempts
+        self.max_accuracy = max_accuracy
+        self._heap: List[Tuple[float, int, str, Any]] = []  # (-score, -sequence, quiz file, question id)
+        self._current: Dict[Tuple[str, str], Tuple[int, float, Any]] = {}  # (quiz file, id) -> (sequence, score, id)
+        self._sequence = itertools.count()
+
+    @classmethod
+    def build(cls, config: Config, progress_data: Dict[str, Any]) -> 'LeechIndex':
+        """Index every leech in a progress tree
+
+        Args:
+            config: Configuration object
+            progress_data: Nested folder -> quiz file -> question id mapping
+
+        Returns:
+            New index
+        """
+        index = cls(config.get('leech_min_attempts', 4), config.get('leech_max_accuracy', 0.6))
+        for quiz_filepath, question_id, progress in iter_entries(progress_data):
+            if isinstance(progress, dict):
+                score = index.score(progress.get('attempts', 0), progress.get('correct', 0),
+                                    progress.get('last_review'), progress.get('last_correct'))
+                if score is not None:
+                    index._heap.append(index._entry(quiz_filepath, question_id, score))
+        heapq.heapify(index._heap)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._current)
+
+    def score(self, attempts: int, correct: int, last_review: Optional[str],
+              last_correct: Optional[str]) -> Optional[float]:
+        """Score a question's progress as a leech
+
+        Returns:
+            Misses, plus RECENT_FAILURE_WEIGHT if the latest answer was
+            wrong; None if the question is not a leech
+        """
+        if not attempts or attempts < self.min_attempts or correct / attempts >= self.max_accuracy:
+            return None
+        missed_last = bool(last_review) and (not last_correct or str(last_review) > str(last_correct))
+        return (attempts - correct) + (RECENT_FAILURE_WEIGHT if missed_last else 0.0)
+
+    def _entry(self, quiz_filepath: str, question_id: Any, score: float) -> Tuple[float, int, str, Any]:
+        """Make a heap entry for a question, superseding any earlier one"""
+        sequence = next(self._sequence)
+        self._current[(quiz_filepath, str(question_id))] = (sequence, score, question_id)
+        return (-score, -sequence, quiz_filepath, question_id)
+
+    def record(self, quiz_filepath: str, question_id: Any, progress: QuestionProgress) -> None:
+        """Update a question whose progress changed
+
+        Args:
+            quiz_filepath: Quiz file path
+            question_id: ID of the question
+            progress: New progress of the question
+        """
+        score = self.score(progress.attempts, progress.correct, progress.last_review, progress.last_correct)
+        if score is None:
+            # Its heap entry goes stale and is dropped when it surfaces
+            self._current.pop((quiz_filepath, str(question_id)), None)
+        else:
+            heapq.heappush(self._heap, self._entry(quiz_filepath, question_id, score))
+
+        if len(self._heap) > 2 * len(self._current) + 64:
+            # Mostly stale entries; rebuild from the live ones
+            self._heap = [(-live_score, -sequence, quiz_file, qid)
+                          for (quiz_file, _), (sequence, live_score, qid) in self._current.items()]
+            heapq.heapify(self._heap)
+
+    def get(self, quiz_filepath: str, question_id: Any) -> Optional[float]:
+        """Get a question's leech score, or None if it is not a leech"""
+        current = self._current.get((quiz_filepath, str(question_id)))
+        return current[1] if current else None
+
+    def top(self, count: int, quiz_files: Optional[Collection[str]] = None) -> List[Tuple[str, Any, float]]:
+        """Get the worst leeches
+
+        Args:
+            count: Maximum number of leeches
+            quiz_files: Only consider these quiz files (default: all)
+
+        Returns:
+            List of (quiz file, question id, score), worst first
+        """
+        found = []
+        live = []
+        while self._heap and len(found) < count:
+            entry = heapq.heappop(self._heap)
+            negative_score, negative_sequence, quiz_filepath, question_id = entry
+            if self._current.get((quiz_filepath, str(question_id)), (None,))[0] != -negative_sequence:
+                continue  # Superseded or no longer a leech
+            live.append(entry)
+            if quiz_files is None or quiz_filepath in quiz_files:
+                found.append((quiz_filepath, question_id, -negative_score))
+        for entry in live:
+            heapq.heappush(self._heap, entry)
+        return found
@@ -0,0 +1,118 @@
+"""
+Load-test harness for the QUIZR JSON-lines server
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+from .config import Config
+from .server import QuizServer
+
+
+class LoadTestClient:
+    """A single simulated learner holding one connection"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, latencies: List[float]):
+        self.reader = reader
+        self.writer = writer
+        self.latencies = latencies
+        self.errors = 0
+
+    async def request(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Send a request and record its round-trip latency"""
+        started = time.perf_counter()
+        self.writer.write(json.dumps(payload).encode('utf-8') + b'\n')
+        await self.writer.drain()
+        response = json.loads(await self.reader.readline())
+        self.latencies.append(time.perf_counter() - started)
+        if not response.get('ok'):
+            self.errors += 1
+        return response
+
+    async def run(self, target: str, mode: str, deadline: float) -> None:
+        """Run sessions back to back until the deadline passes"""
+        while time.perf_counter() < deadline:
+            started = await self.request({'op': 'start', 'target': target, 'mode': mode})
+            if not started.get('ok'):
+                return
+            session = started['session']
+            while time.perf_counter() < deadline:
+                question = await self.request({'op': 'next', 'session': session})
+                if question.get('done', True):
+                    break
+                await self.request({'op': 'answer', 'session': session, 'answer': 'load test'})
+            await self.request({'op': 'end', 'session': session})
+        self.writer.close()
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    """Get a percentile from an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run_load_test(target: str, mode: str = 'quick', clients: int = 50, duration: float = 10.0,
+                        host: str = '127.0.0.1', port: int = 8765, socket_path: Optional[str] = None,
+                        config: Optional[Config] = None) -> Dict[str, Any]:
+    """Drive a server with concurrent clients and measure throughput
+
+    If a config is given, an in-process server is started on an ephemeral
+    port with progress persistence disabled; otherwise the clients connect to
+    an already running server at host/port or socket_path.
+
+    Args:
+        target: Quiz or folder name each client starts
+        mode: Quiz mode each client uses
+        clients: Number of concurrent connections
+        duration: Test length in seconds
+        host: Server host
+        port: Server port
+        socket_path: Server Unix socket path
+        config: Configuration for an in-process server
+
+    Returns:
+        Dictionary with request count, errors, requests per second and
+        latency percentiles in milliseconds
+    """
+    server = None
+    if config is not None:
+        quiz_server = QuizServer(config, persist=False)
+        server = await quiz_server.start(host, 0, socket_path)
+        if not socket_path:
+            host, port = server.sockets[0].getsockname()[:2]
+
+    latencies: List[float] = []
+    load_clients = []
+    for _ in range(clients):
+        if socket_path:
+            reader, writer = await asyncio.open_unix_connection(socket_path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        load_clients.append(LoadTestClient(reader, writer, latencies))
+
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(client.run(target, mode, deadline) for client in load_clients))
+    elapsed = time.perf_counter() - started
+
+    if server is not None:
+        server.close()
+        await server.wait_closed()
+        quiz_server.close()
+
+    latencies.sort()
+    return {
+        'clients': clients,
+        'requests': len(latencies),
+        'errors': sum(client.errors for client in load_clients),
+        'seconds': elapsed,
+        'requests_per_second': len(latencies) / elapsed if elapsed > 0 else 0.0,
+        'p50_ms': _percentile(latencies, 0.50) * 1000,
+        'p95_ms': _percentile(latencies, 0.95) * 1000,
+        'p99_ms': _percentile(latencies, 0.99) * 1000,
+        'max_ms': (latencies[-1] * 1000) if latencies else 0.0,
+    }
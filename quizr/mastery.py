@@ -0,0 +1,178 @@
+"""
+Topic mastery for QUIZR - per-question mastery rolled up through the folder hierarchy
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import Config
+from .file_cache import QuizFileCache
+from .models import QuestionProgress
+
+
+@dataclass
+class Rollup:
+    """Aggregated progress for a quiz file or a folder"""
+    questions: int = 0
+    seen: int = 0
+    attempts: int = 0
+    correct: int = 0
+    mastery_sum: float = 0.0
+
+    def add(self, other: 'Rollup', sign: int = 1) -> None:
+        """Add (or with sign=-1, subtract) another rollup into this one"""
+        self.questions += sign * other.questions
+        self.seen += sign * other.seen
+        self.attempts += sign * other.attempts
+        self.correct += sign * other.correct
+        self.mastery_sum += sign * other.mastery_sum
+
+    @property
+    def mastery(self) -> float:
+        """Mean mastery over all questions, from 0 to 1"""
+        return self.mastery_sum / self.questions if self.questions else 0.0
+
+    @property
+    def completion_rate(self) -> float:
+        """Percentage of questions answered at least once"""
+        return self.seen / self.questions * 100 if self.questions else 0.0
+
+    @property
+    def accuracy_rate(self) -> float:
+        """Percentage of attempts answered correctly"""
+        return self.correct / self.attempts * 100 if self.attempts else 0.0
+
+
+def folders_of(quiz_filepath: str) -> List[str]:
+    """Get every folder containing a quiz file, outermost first
+
+    'CompTIA/A+/Hardware.yaml' gives ['CompTIA', 'CompTIA/A+'].
+    """
+    parts = quiz_filepath.split('/')[:-1]
+    return ['/'.join(parts[:i]) for i in range(1, len(parts) + 1)]
+
+
+class MasteryTree:
+    """Mastery rollups for every quiz file and folder
+
+    Building the tree needs each quiz's question ids. They are cached in the
+    cache directory by file signature, so only quiz files that changed are
+    parsed again. After that, recording an answer updates its quiz and every
+    folder above it in place.
+
+    The rollups themselves are deliberately not cached. They change with
+    every answer, and mastery fades with the time since each question's last
+    review, so a stored rollup would be stale by the next run. Summing them
+    from the progress store is one pass over the cached ids.
+    """
+
+    CACHE_FILE = 'mastery.json'
+
+    def __init__(self, config: Config, data_manager, now: Optional[datetime] = None):
+        """Initialize mastery tree
+
+        Args:
+            config: Configuration object
+            data_manager: Data manager holding quizzes and progress
+            now: Time mastery is estimated at (defaults to the current time)
+        """
+        self.config = config
+        self.data_manager = data_manager
+        self.now = now or datetime.now()
+        self.half_life_days = config.get('mastery_half_life_days', 30)
+        self.cache = QuizFileCache(config, data_manager, self.CACHE_FILE)
+        self.total = Rollup()
+        self.quizzes: Dict[str, Rollup] = {}
+        self.folders: Dict[str, Rollup] = {}
+        self._questions: Dict[str, Dict[str, Rollup]] = {}  # Quiz file -> question id -> contribution
+
+    def _question_rollup(self, progress: Dict[str, Any]) -> Rollup:
+        """Get a single question's contribution to the rollups"""
+        question_progress = QuestionProgress(
+            attempts=progress.get('attempts', 0),
+            correct=progress.get('correct', 0),
+            last_review=progress.get('last_review'),
+            last_correct=progress.get('last_correct')
+        )
+        return Rollup(
+            questions=1,
+            seen=1 if question_progress.attempts > 0 else 0,
+            attempts=question_progress.attempts,
+            correct=question_progress.correct,
+            mastery_sum=question_progress.get_mastery(self.now, self.half_life_days)
+        )
+
+    def build(self) -> 'MasteryTree':
+        """Compute rollups for every discovered quiz
+
+        Returns:
+            This tree, for chaining
+        """
+        self.total = Rollup()
+        self.quizzes.clear()
+        self.folders.clear()
+        self._questions.clear()
+
+        question_ids_by_file = self.cache.collect(lambda quiz: [str(question_id) for question_id in quiz.questions])
+        for quiz_file, question_ids in question_ids_by_file.items():
+            progress = {str(question_id): entry for question_id, entry
+                        in self.data_manager.get_quiz_progress(quiz_file).items()}
+            contributions = {question_id: self._question_rollup(progress.get(question_id, {}))
+                             for question_id in question_ids}
+            self._questions[quiz_file] = contributions
+
+            rollup = Rollup()
+            for contribution in contributions.values():
+                rollup.add(contribution)
+            self.quizzes[quiz_file] = rollup
+            self._add_to_folders(quiz_file, rollup)
+        return self
+
+    def _add_to_folders(self, quiz_file: str, rollup: Rollup, sign: int = 1) -> None:
+        """Add a rollup into every folder above a quiz file and the total"""
+        for folder in folders_of(quiz_file):
+            self.folders.setdefault(folder, Rollup()).add(rollup, sign)
+        self.total.add(rollup, sign)
+
+    def record(self, quiz_file: str, question_id: Any, progress: QuestionProgress) -> None:
+        """Update the rollups for a question whose progress changed
+
+        Only the question's quiz and the folders above it are touched.
+
+        Args:
+            quiz_file: Quiz file path
+            question_id: ID of the question
+            progress: New progress of the question
+        """
+        contributions = self._questions.get(quiz_file)
+        question_id = str(question_id)
+        if contributions is None or question_id not in contributions:
+            return
+
+        new = self._question_rollup({
+            'attempts': progress.attempts,
+            'correct': progress.correct,
+            'last_review': progress.last_review,
+            'last_correct': progress.last_correct
+        })
+        delta = Rollup()
+        delta.add(new)
+        delta.add(contributions[question_id], -1)
+        contributions[question_id] = new
+        self.quizzes[quiz_file].add(delta)
+        self._add_to_folders(quiz_file, delta)
+
+    def get(self, path: str) -> Optional[Rollup]:
+        """Get the rollup of a quiz file or folder path"""
+        return self.quizzes.get(path) or self.folders.get(path)
+
+    def walk(self) -> List[Tuple[str, int, Rollup]]:
+        """List every folder and quiz file in tree order
+
+        Returns:
+            List of (path, depth, rollup), each folder followed by its contents
+        """
+        nodes = list(self.folders.items()) + list(self.quizzes.items())
+        nodes.sort(key=lambda node: node[0].split('/'))
+        return [(path, path.count('/'), rollup) for path, rollup in nodes]
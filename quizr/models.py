@@ -3,10 +3,20 @@ Data models for QUIZR quiz system
 """
 
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Any
+from typing import Dict, FrozenSet, List, Optional, Any
 from datetime import datetime, date
 import os
 
+from .identity import fingerprint
+
+
+# Ways of choosing and ordering the questions of a session
+MODES = ['spaced', 'shuffle', 'quick', 'weak', 'exam', 'leeches']
+
+# Modes that only order a given set of questions; exams need their own
+# session and leech drills pick their own questions
+PRACTICE_MODES = ['spaced', 'shuffle', 'quick', 'weak']
+
 
 @dataclass
 class Question:
@@ -16,6 +26,16 @@ class Question:
     answer: str
     image: Optional[str] = None
     strict: bool = False  # If True, no fuzzy matching
+    alternatives: List[str] = field(default_factory=list)  # Other accepted answers
+    accepted: Optional[FrozenSet[str]] = field(default=None, repr=False, compare=False)  # Normalized accepted answers
+    _fingerprint: Optional[str] = field(default=None, init=False, repr=False, compare=False)  # Computed on first use
+    
+    @property
+    def fingerprint(self) -> str:
+        """Content fingerprint identifying the question across renames"""
+        if self._fingerprint is None:
+            self._fingerprint = fingerprint(self.prompt, self.answer)
+        return self._fingerprint
     
     def has_image(self) -> bool:
         """Check if question has an associated image"""
@@ -42,15 +62,48 @@ class QuestionProgress:
             return 0.0
         return (self.correct / self.attempts) * 100
     
-    def record_attempt(self, is_correct: bool) -> None:
-        """Record a new attempt"""
-        now = datetime.now().isoformat()
+    def record_attempt(self, is_correct: bool, now: Optional[datetime] = None) -> None:
+        """Record a new attempt
+        
+        Args:
+            is_correct: Whether the answer was correct
+            now: Time of the attempt (defaults to the current time)
+        """
+        now = (now or datetime.now()).isoformat()
         self.attempts += 1
         self.last_review = now
         
         if is_correct:
             self.correct += 1
             self.last_correct = now
+    
+    def get_mastery(self, now: Optional[datetime] = None, half_life_days: float = 30) -> float:
+        """Estimate how well the question is known, from 0 to 1
+        
+        This is the mean of a Beta posterior over the chance of answering
+        correctly, starting from a prior of one wrong answer. The evidence is
+        discounted by the time since the last review, halving every
+        half_life_days, so mastery fades toward 0 for questions not seen in
+        a while.
+        
+        Args:
+            now: Current time (defaults to the current time)
+            half_life_days: Days for the weight of past answers to halve
+            
+        Returns:
+            Mastery estimate; 0 for unseen questions
+        """
+        if self.attempts == 0:
+            return 0.0
+        
+        weight = 1.0
+        if self.last_review and half_life_days > 0:
+            try:
+                elapsed = (now or datetime.now()) - datetime.fromisoformat(self.last_review)
+                weight = 0.5 ** (max(elapsed.total_seconds(), 0) / 86400 / half_life_days)
+            except ValueError:
+                pass
+        return weight * self.correct / (weight * self.attempts + 1)
 
 
 @dataclass
@@ -105,9 +158,13 @@ class SessionStats:
         if is_correct:
             self.questions_correct += 1
     
-    def finish_session(self) -> None:
-        """Mark session as finished"""
-        self.end_time = datetime.now()
+    def finish_session(self, now: Optional[datetime] = None) -> None:
+        """Mark session as finished
+        
+        Args:
+            now: Time the session ended (defaults to the current time)
+        """
+        self.end_time = now or datetime.now()
 
 
 @dataclass
@@ -118,10 +175,16 @@ class GlobalProgress:
     first_use: Optional[str] = None
     last_session: Optional[str] = None
     daily_log: Dict[str, int] = field(default_factory=dict)
+    last_compaction: Optional[str] = None
     
-    def update_session_stats(self, questions_reviewed: int) -> None:
-        """Update global stats after a session"""
-        now = datetime.now()
+    def update_session_stats(self, questions_reviewed: int, now: Optional[datetime] = None) -> None:
+        """Update global stats after a session
+        
+        Args:
+            questions_reviewed: Number of questions answered in the session
+            now: Time of the session (defaults to the current time)
+        """
+        now = now or datetime.now()
         today = now.date().isoformat()
         
         if self.first_use is None:
@@ -0,0 +1,123 @@
+"""
+Target names for QUIZR - a persisted index of quiz and folder names
+
+Every discovery of the exercises tree saves the names `start` accepts: quiz
+file names without .yaml and folder names at any level. Shell completion
+and "did you mean" suggestions read them back with nothing but json, so
+pressing Tab neither parses YAML nor walks Exercises/.
+"""
+
+import difflib
+import json
+import os
+from typing import Dict, List
+
+from .config import Config
+from .storage import atomic_write_text
+
+
+NAMES_FILE = 'names.json'
+
+
+def target_names(quizzes: Dict[str, List[str]]) -> List[str]:
+    """Get every name find_quizzes_by_path() matches
+
+    Args:
+        quizzes: Result of DataManager.discover_quizzes()
+
+    Returns:
+        Sorted folder and quiz names
+    """
+    names = set()
+    for folder, quiz_files in quizzes.items():
+        names.update(folder.split('/'))
+        names.update(os.path.splitext(os.path.basename(quiz_file))[0] for quiz_file in quiz_files)
+    return sorted(names)
+
+
+def _names_path(config: Config) -> str:
+    """Get the path of the name index"""
+    return os.path.join(config.get_cache_dir(), NAMES_FILE)
+
+
+def save_names(config: Config, names: List[str]) -> None:
+    """Persist the name index if it changed
+
+    Args:
+        config: Configuration object
+        names: Names from target_names()
+    """
+    path = _names_path(config)
+    text = json.dumps({'exercises_dir': config.get_exercises_dir(), 'names': names}, ensure_ascii=False)
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            if file.read() == text:
+                return
+    except OSError:
+        pass
+    try:
+        atomic_write_text(path, text)
+    except OSError:
+        pass  # Completion falls back to walking the tree
+
+
+def _walk_names(exercises_dir: str) -> List[str]:
+    """Collect names from the exercises tree, for when no index was saved yet"""
+    quizzes = {}
+    for root, _, files in os.walk(exercises_dir):
+        rel_path = os.path.relpath(root, exercises_dir).replace('\\', '/')
+        yaml_files = [f for f in files if f.endswith('.yaml') and f != 'progress.yaml']
+        if yaml_files and 'images' not in rel_path.split('/'):
+            quizzes['root' if rel_path == '.' else rel_path] = yaml_files
+    return target_names(quizzes)
+
+
+def load_names(config: Config) -> List[str]:
+    """Get the saved name index, building it from the tree if there is none
+
+    Args:
+        config: Configuration object
+
+    Returns:
+        Sorted folder and quiz names
+    """
+    try:
+        with open(_names_path(config), 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        if data.get('exercises_dir') == config.get_exercises_dir():
+            return list(data['names'])
+    except (OSError, ValueError, AttributeError, KeyError, TypeError):
+        pass
+    names = _walk_names(config.get_exercises_dir())
+    save_names(config, names)
+    return names
+
+
+def complete_names(names: List[str], incomplete: str) -> List[str]:
+    """Get the names starting with what was typed so far, ignoring case
+
+    Exact-case matches come first, so 'Net' offers 'Network+' before 'network'.
+    """
+    prefix = incomplete.casefold()
+    matches = [name for name in names if name.casefold().startswith(prefix)]
+    return sorted(matches, key=lambda name: (not name.startswith(incomplete), name.casefold()))
+
+
+def suggest_names(names: List[str], target: str, limit: int = 3) -> List[str]:
+    """Get the names closest to a target that matched nothing
+
+    Args:
+        names: Names from load_names()
+        target: Name that was asked for
+        limit: Maximum number of suggestions
+
+    Returns:
+        Names differing only in case first, then similar spellings
+    """
+    folded = {}
+    for name in names:
+        folded.setdefault(name.casefold(), name)
+    wanted = target.replace('\\', '/').rstrip('/')
+    wanted = (wanted[:-5] if wanted.endswith('.yaml') else wanted).casefold()
+    close = difflib.get_close_matches(wanted, list(folded), n=limit, cutoff=0.6)
+    return [folded[name] for name in close]
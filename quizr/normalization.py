@@ -0,0 +1,181 @@
+"""
+Answer normalization for QUIZR - folds answers to a canonical form before grading
+
+The pipeline is a list of named steps from the `answer_normalization`
+setting, run in order on both the expected and the given answer:
+
+    nfkc         Unicode NFKC (full-width and compatibility characters)
+    casefold     Case-insensitive comparison
+    punctuation  Punctuation becomes a space ('LGA-1200' -> 'lga 1200');
+                 '#', '%', '&' and '@' are kept so 'C#' stays distinct
+    acronyms     Words in `answer_acronyms` are expanded ('cpu' ->
+                 'central processing unit')
+    whitespace   All whitespace is removed ('802.11 ac' == '802.11ac')
+
+Every accepted form of a question is normalized once when the quiz is
+loaded, so grading an answer is a set lookup before any fuzzy scoring.
+"""
+
+import json
+import re
+import unicodedata
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+from .config import Config
+
+
+STEPS = list(Config.SCHEMA['answer_normalization']['items'])
+
+# Punctuation that carries meaning in answers like 'C#' or 'AT&T'
+KEEP_PUNCTUATION = '#%&@'
+
+# 'Central Processing Unit (CPU)' or 'CPU (Central Processing Unit)'
+PARENTHESIZED = re.compile(r'^\s*(.*?\S)\s*\(([^()]+)\)\s*$')
+
+# Bump when answer_variants() accepts different answers, so forms stored in
+# bundles packed by older versions are computed again
+VARIANTS_VERSION = 2
+
+
+class _PunctuationTable(dict):
+    """str.translate() table mapping punctuation to spaces, filled in as characters are seen"""
+
+    def __missing__(self, code: int) -> int:
+        char = chr(code)
+        folded = unicodedata.category(char).startswith('P') and char not in KEEP_PUNCTUATION
+        self[code] = ord(' ') if folded else code
+        return self[code]
+
+
+_PUNCTUATION_TABLE = _PunctuationTable()
+
+
+def _fold_punctuation(text: str) -> str:
+    """Replace punctuation characters with spaces"""
+    return text.translate(_PUNCTUATION_TABLE)
+
+
+def _initials(text: str, split_hyphens: bool) -> str:
+    """Get the first letter or digit of each word, casefolded"""
+    words = re.split(r'[\W_]+' if split_hyphens else r'[\s/]+', text)
+    return ''.join(re.sub(r'[\W_]', '', word)[:1] for word in words).casefold()
+
+
+def _is_acronym(short: str, long: str) -> bool:
+    """Check whether one text is made of the initials of the other's words
+
+    Hyphenated words may count as one word or several, so 'WPA' matches
+    'Wi-Fi Protected Access' and 'PWM' matches 'pulse-width modulation'.
+
+    Args:
+        short: Candidate acronym, e.g. 'TCP/IP'
+        long: Candidate expansion, e.g. 'Transmission Control Protocol/Internet Protocol'
+
+    Returns:
+        True if short spells the initials of long
+    """
+    letters = re.sub(r'[\W_]', '', short).casefold()
+    if len(letters) < 2 or len(short.split()) > 1:
+        return False
+    return letters in (_initials(long, True), _initials(long, False))
+
+
+def answer_variants(answer: str, alternatives: Iterable[str] = ()) -> List[str]:
+    """List the answers a question accepts before normalization
+
+    An answer that pairs an acronym with its expansion, such as 'Central
+    Processing Unit (CPU)' or 'CPU (Central Processing Unit)', also accepts
+    each part on its own. Other parenthesized parts, like the unit in
+    'measured in hertz (Hz)', are only accepted alone if listed in
+    alternatives.
+
+    Args:
+        answer: The question's answer
+        alternatives: Other accepted answers from the quiz file
+
+    Returns:
+        Accepted answers, the main answer first
+    """
+    variants = []
+    for variant in [str(answer), *(str(alternative) for alternative in alternatives)]:
+        variants.append(variant)
+        match = PARENTHESIZED.match(variant)
+        if match and (_is_acronym(*match.groups()) or _is_acronym(*reversed(match.groups()))):
+            variants.extend(match.groups())
+    return list(dict.fromkeys(variants))
+
+
+class AnswerNormalizer:
+    """Applies the configured normalization steps to answers"""
+
+    def __init__(self, steps: Optional[List[str]] = None, acronyms: Optional[Dict[str, str]] = None):
+        """Initialize normalizer
+
+        Args:
+            steps: Step names in the order they run (default: all of STEPS)
+            acronyms: Words mapped to what they stand for, e.g.
+                {'CPU': 'Central Processing Unit'}
+        """
+        self.steps = list(STEPS if steps is None else steps)
+        unknown = [step for step in self.steps if step not in STEPS]
+        if unknown:
+            raise ValueError(f"Unknown normalization step(s): {', '.join(unknown)}")
+
+        # Acronyms are matched against text already folded by the earlier steps
+        self.acronyms = {}
+        position = self.steps.index('acronyms') if 'acronyms' in self.steps else 0
+        earlier = AnswerNormalizer(self.steps[:position], {}) if position else None
+        for short, long in (acronyms or {}).items():
+            key = earlier.normalize(short) if earlier else str(short)
+            self.acronyms[key.strip()] = earlier.normalize(long) if earlier else str(long)
+
+        self.signature = json.dumps([VARIANTS_VERSION, self.steps, self.acronyms], sort_keys=True)
+
+    @classmethod
+    def from_config(cls, config: Config) -> 'AnswerNormalizer':
+        """Create the normalizer described by the configuration"""
+        return cls(config.get('answer_normalization'), config.get('answer_acronyms'))
+
+    def normalize(self, text: str) -> str:
+        """Run an answer through every step
+
+        Args:
+            text: Answer to normalize
+
+        Returns:
+            Normalized answer
+        """
+        text = str(text)
+        for step in self.steps:
+            if step == 'nfkc':
+                text = unicodedata.normalize('NFKC', text)
+            elif step == 'casefold':
+                text = text.casefold()
+            elif step == 'punctuation':
+                text = _fold_punctuation(text)
+            elif step == 'acronyms':
+                if self.acronyms:
+                    text = ' '.join(self.acronyms.get(word, word) for word in text.split())
+            elif step == 'whitespace':
+                text = ''.join(text.split())
+        return text.strip()
+
+    def normalize_answer(self, text: str) -> str:
+        """Normalize an answer, falling back to its plain lowercase form
+
+        Answers made only of punctuation would otherwise normalize to the
+        empty string and match each other.
+        """
+        return self.normalize(text) or str(text).strip().lower()
+
+    def accepted_forms(self, answer: str, alternatives: Iterable[str] = ()) -> FrozenSet[str]:
+        """Get the normalized forms of every answer a question accepts
+
+        Args:
+            answer: The question's answer
+            alternatives: Other accepted answers from the quiz file
+
+        Returns:
+            Set of normalized answers
+        """
+        return frozenset(self.normalize_answer(variant) for variant in answer_variants(answer, alternatives))
@@ -0,0 +1,133 @@
+"""
+Performance instrumentation for QUIZR - timers and counters around the hot paths
+
+Instrumentation is off by default and costs one attribute check per call.
+Enable it with the QUIZR_PROFILE environment variable, `quizr --profile`
+or `quizr doctor --perf`.
+"""
+
+import cProfile
+import functools
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .config import BOOL_VALUES
+
+
+class Profiler:
+    """Accumulates call counts, wall time and counters by name"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.timings: Dict[str, List[float]] = {}  # name -> [calls, total seconds]
+        self.counters: Dict[str, int] = {}
+        self._active: List[str] = []
+
+    def reset(self) -> None:
+        """Forget everything recorded so far"""
+        self.timings.clear()
+        self.counters.clear()
+
+    @contextmanager
+    def section(self, name: str) -> Iterator[None]:
+        """Time a block of code
+
+        Time spent in a section nested inside another section of the same
+        name (e.g. a recursive call) is only counted once.
+        """
+        if not self.enabled or name in self._active:
+            yield
+            return
+
+        self._active.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._active.pop()
+            entry = self.timings.setdefault(name, [0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """Add to a counter"""
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def report(self, wall_time: Optional[float] = None) -> List[str]:
+        """Format the recorded timings and counters
+
+        Sections can nest (e.g. load_quiz inside find_quizzes_by_path), so
+        their percentages of the wall time may add up to more than 100%.
+
+        Args:
+            wall_time: Total time of the profiled command, in seconds
+
+        Returns:
+            Report lines
+        """
+        header = f"{'Section':<28}{'Calls':>8}{'Total ms':>12}{'Avg ms':>10}"
+        lines = [header + (f"{'Wall':>8}" if wall_time else '')]
+        for name, (calls, total) in sorted(self.timings.items(), key=lambda item: -item[1][1]):
+            line = f"{name:<28}{calls:>8}{total * 1000:>12.1f}{total * 1000 / calls:>10.2f}"
+            if wall_time:
+                line += f"{total / wall_time * 100:>7.1f}%"
+            lines.append(line)
+        if wall_time:
+            lines.append(f"{'wall time':<28}{'':>8}{wall_time * 1000:>12.1f}")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"{name:<28}{value:>8}")
+        return lines
+
+
+def env_enabled() -> bool:
+    """Check whether QUIZR_PROFILE asks for profiling, spelled like a boolean setting"""
+    return BOOL_VALUES.get(os.environ.get('QUIZR_PROFILE', '').strip().lower(), False)
+
+
+# Process-wide profiler used by the instrumented functions
+profiler = Profiler(enabled=env_enabled())
+
+
+def timed(name: str) -> Callable:
+    """Decorator timing every call of a function under the given name"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            with profiler.section(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def profile_call(func: Callable, profile_output: Optional[str] = None) -> Tuple[Any, float]:
+    """Run a function with instrumentation enabled
+
+    Args:
+        func: Function to run, without arguments
+        profile_output: File to write cProfile statistics to (readable with
+            pstats or snakeviz), or None
+
+    Returns:
+        Tuple of (function result, wall time in seconds)
+    """
+    was_enabled = profiler.enabled
+    profiler.enabled = True
+    profile = cProfile.Profile() if profile_output else None
+    start = time.perf_counter()
+    try:
+        if profile:
+            result = profile.runcall(func)
+        else:
+            result = func()
+    finally:
+        wall_time = time.perf_counter() - start
+        profiler.enabled = was_enabled
+        if profile:
+            profile.dump_stats(profile_output)
+    return result, wall_time
@@ -0,0 +1,342 @@
+"""
+Progress export for QUIZR - flattens progress stores into one table for analysis
+
+Each store is read as a stream of YAML events instead of being loaded whole,
+and rows are written in batches, so memory stays bounded however large the
+store is. Several stores (one per learner profile) are flattened in
+parallel, each into a part file, and the parts are then appended to the
+output in the order the stores were given.
+
+Every row has a `record` column saying what it describes:
+
+- 'question': progress of one question (quiz_file, question_id, attempts,
+  correct, last_review, last_correct, fingerprint)
+- 'totals': the totals kept in __meta__ (reviews, questions_seen,
+  first_use, last_session, last_compaction)
+- 'day': one entry of the __meta__ activity log (day, reviews); days
+  rolled into months by compaction have 'YYYY-MM' as the day
+"""
+
+import csv
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import yaml
+
+from .storage import verify_snapshot
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet output is optional
+    pyarrow = None
+
+
+FORMATS = ['parquet', 'csv']
+
+COLUMNS = ['profile', 'record', 'folder', 'quiz_file', 'question_id', 'attempts', 'correct',
+           'last_review', 'last_correct', 'fingerprint', 'day', 'reviews', 'questions_seen',
+           'first_use', 'last_session', 'last_compaction']
+INTEGER_COLUMNS = {'attempts', 'correct', 'reviews', 'questions_seen'}
+
+# Rows buffered before a write; bounds memory per store
+BATCH_ROWS = 50000
+
+_PARSER_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)  # libyaml's parser when available
+_RESOLVER = yaml.resolver.Resolver()
+_CONSTRUCTOR = yaml.constructor.SafeConstructor()
+
+
+def default_format() -> str:
+    """Get the format used when none is asked for: Parquet if pyarrow is installed"""
+    return 'parquet' if pyarrow is not None else 'csv'
+
+
+def detect_format(path: str) -> str:
+    """Get the export format from an output file's extension
+
+    A file without an extension gets default_format().
+
+    Raises:
+        ValueError: If the extension is not a supported format
+    """
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    if not extension:
+        return default_format()
+    if extension not in FORMATS:
+        raise ValueError(f"Unknown format '.{extension}'; use one of: {', '.join(FORMATS)}")
+    return extension
+
+
+def profile_name(store: str) -> str:
+    """Name a profile after its store: 'alice.yaml' and 'alice/progress.yaml' are both 'alice'"""
+    stem = os.path.splitext(os.path.basename(store))[0]
+    if stem == 'progress':
+        parent = os.path.basename(os.path.dirname(os.path.abspath(store)))
+        return parent or stem
+    return stem
+
+
+def _scalar(event: yaml.ScalarEvent) -> Any:
+    """Convert a scalar event to the value yaml.safe_load would give it"""
+    value = event.value
+    if not event.implicit[0]:
+        return value  # Quoted: always a string
+    if value.isdigit() and (value == '0' or value[0] != '0'):
+        return int(value)  # Counts; the common case, skipped past the resolver
+    tag = _RESOLVER.resolve(yaml.ScalarNode, value, event.implicit)
+    converted = _CONSTRUCTOR.yaml_constructors[tag](_CONSTRUCTOR, yaml.ScalarNode(tag, value))
+    return converted.isoformat() if isinstance(converted, (date, datetime)) else converted
+
+
+def _is_quiz_file(key: str) -> bool:
+    """Check if a progress key names a quiz file rather than a folder"""
+    return key.endswith(('.yaml', '.yml'))
+
+
+def _text(value: Any) -> Optional[str]:
+    """Get a column value as text, keeping None"""
+    return None if value is None else str(value)
+
+
+def _count(value: Any) -> Optional[int]:
+    """Get a column value as an integer, or None if it isn't one"""
+    return value if isinstance(value, int) and not isinstance(value, bool) else None
+
+
+def iter_store_records(store: str, profile: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Flatten a progress store into rows, reading it as a stream
+
+    Args:
+        store: Progress file
+        profile: Value of the profile column (default: profile_name(store))
+
+    Yields:
+        Rows as dictionaries with a subset of COLUMNS
+
+    Raises:
+        OSError: If the store cannot be read
+        SnapshotError: If the store fails its checksum
+        yaml.YAMLError: If the store is not valid YAML
+    """
+    verify_snapshot(store)
+    profile = profile if profile is not None else profile_name(store)
+
+    # One frame per open mapping: [key of the value being read, scalar values read]
+    frames: List[List[Any]] = []
+    skipping = 0  # Depth inside sequences, which progress stores don't use
+    with open(store, 'r', encoding='utf-8') as file:
+        for event in yaml.parse(file, Loader=_PARSER_LOADER):
+            kind = type(event)
+            if skipping:
+                if kind is yaml.SequenceStartEvent or kind is yaml.MappingStartEvent:
+                    skipping += 1
+                elif kind is yaml.SequenceEndEvent or kind is yaml.MappingEndEvent:
+                    skipping -= 1
+                    if not skipping and frames:
+                        frames[-1][0] = None
+                continue
+
+            if kind is yaml.ScalarEvent:
+                if not frames:
+                    continue  # A document that is a single scalar
+                frame = frames[-1]
+                if frame[0] is None:
+                    frame[0] = str(_scalar(event))
+                else:
+                    frame[1][frame[0]] = _scalar(event)
+                    frame[0] = None
+            elif kind is yaml.AliasEvent:
+                if frames and frames[-1][0] is not None:
+                    frames[-1][0] = None  # Progress stores have no anchors; ignore the value
+            elif kind is yaml.MappingStartEvent:
+                if frames and frames[-1][0] is None:
+                    skipping = 1  # A mapping used as a key
+                else:
+                    frames.append([None, {}])
+            elif kind is yaml.SequenceStartEvent:
+                skipping = 1
+            elif kind is yaml.MappingEndEvent:
+                values = frames.pop()[1]
+                path = [frame[0] for frame in frames]
+                if frames:
+                    frames[-1][0] = None
+                yield from _records_at(profile, path, values)
+
+
+def _records_at(profile: str, path: List[str], values: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Turn the scalar values of a finished mapping into rows, depending on where it was"""
+    if path == ['__meta__']:
+        yield {'profile': profile, 'record': 'totals', 'reviews': _count(values.get('total_reviews')),
+               'questions_seen': _count(values.get('total_questions_seen')),
+               'first_use': _text(values.get('first_use')), 'last_session': _text(values.get('last_session')),
+               'last_compaction': _text(values.get('last_compaction'))}
+    elif path == ['__meta__', 'daily_log']:
+        for day, reviews in values.items():
+            yield {'profile': profile, 'record': 'day', 'day': day, 'reviews': _count(reviews)}
+    elif len(path) >= 2 and path[0] != '__meta__' and _is_quiz_file(path[-2]):
+        yield {'profile': profile, 'record': 'question', 'folder': '/'.join(path[:-2]),
+               'quiz_file': '/'.join(path[:-1]), 'question_id': path[-1],
+               'attempts': _count(values.get('attempts')), 'correct': _count(values.get('correct')),
+               'last_review': _text(values.get('last_review')), 'last_correct': _text(values.get('last_correct')),
+               'fingerprint': _text(values.get('fingerprint'))}
+
+
+class _CsvWriter:
+    """Writes rows to a CSV file"""
+
+    def __init__(self, path: str, header: bool = True):
+        self.file = open(path, 'w', encoding='utf-8', newline='')
+        self.writer = csv.DictWriter(self.file, COLUMNS)
+        if header:
+            self.writer.writeheader()
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        self.writer.writerows(rows)
+
+    def append(self, part: str) -> None:
+        """Copy the rows of a part file written without a header"""
+        self.file.flush()
+        with open(part, 'r', encoding='utf-8', newline='') as source:
+            shutil.copyfileobj(source, self.file, 1 << 20)
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class _ParquetWriter:
+    """Writes rows to a Parquet file, one row group per batch"""
+
+    def __init__(self, path: str, header: bool = True):
+        self.schema = pyarrow.schema([(name, pyarrow.int64() if name in INTEGER_COLUMNS else pyarrow.string())
+                                      for name in COLUMNS])
+        self.writer = pyarrow.parquet.ParquetWriter(path, self.schema, compression='zstd')
+
+    def write(self, rows: List[Dict[str, Any]]) -> None:
+        if rows:
+            self.writer.write_table(pyarrow.Table.from_pylist(rows, schema=self.schema))
+
+    def append(self, part: str) -> None:
+        """Copy the rows of a part file, a row group at a time"""
+        source = pyarrow.parquet.ParquetFile(part)
+        for group in range(source.num_row_groups):
+            self.writer.write_table(source.read_row_group(group))
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+def _open_writer(path: str, output_format: str, header: bool = True):
+    """Open a writer for an export format"""
+    if output_format == 'parquet':
+        return _ParquetWriter(path, header)
+    return _CsvWriter(path, header)
+
+
+def _export_store(task: Tuple[str, str, str, str, bool]) -> Tuple[int, int, Optional[str]]:
+    """Flatten one store into a file; runs in a worker process when merging
+
+    Args:
+        task: (store, profile, file to write, format, whether to write a CSV header)
+
+    Returns:
+        Tuple of (rows written, question rows written, error or None)
+    """
+    store, profile, path, output_format, header = task
+    writer = _open_writer(path, output_format, header)
+    rows = questions = 0
+    batch = []
+    try:
+        for record in iter_store_records(store, profile):
+            batch.append(record)
+            if record['record'] == 'question':
+                questions += 1
+            if len(batch) >= BATCH_ROWS:
+                writer.write(batch)
+                rows += len(batch)
+                batch = []
+        writer.write(batch)
+        rows += len(batch)
+    except Exception as e:
+        return 0, 0, f"{type(e).__name__}: {' '.join(str(e).split())}"
+    finally:
+        writer.close()
+    return rows, questions, None
+
+
+def export_progress(stores: List[str], output: str, output_format: Optional[str] = None,
+                    workers: Optional[int] = None) -> Dict[str, Any]:
+    """Flatten progress stores into one CSV or Parquet file
+
+    Stores that cannot be read are reported and left out; the others are
+    still exported.
+
+    Args:
+        stores: Progress files, one per profile
+        output: File to write
+        output_format: 'parquet' or 'csv' (default: from the extension, or
+            Parquet if pyarrow is installed and there is none)
+        workers: Processes flattening stores in parallel (default: one per CPU)
+
+    Returns:
+        Dictionary with 'stores', 'rows' and 'questions' written and
+        'errors' as a list of (store, message)
+
+    Raises:
+        ValueError: If the format is unknown, needs pyarrow, or two stores
+            would get the same profile name
+    """
+    output_format = output_format or detect_format(output)
+    if output_format not in FORMATS:
+        raise ValueError(f"Unknown format '{output_format}'; use one of: {', '.join(FORMATS)}")
+    if output_format == 'parquet' and pyarrow is None:
+        raise ValueError("Parquet export needs pyarrow (pip install pyarrow); export to .csv instead")
+
+    profiles = [profile_name(store) for store in stores]
+    repeated = sorted({profile for profile in profiles if profiles.count(profile) > 1})
+    if repeated:
+        raise ValueError(f"Several stores would be profile '{repeated[0]}'; give each profile its own file name")
+
+    counts: Dict[str, Any] = {'stores': 0, 'rows': 0, 'questions': 0, 'errors': []}
+    tmp_path = output + '.tmp'
+    part_dir = None
+    try:
+        if len(stores) == 1:
+            results = [_export_store((stores[0], profiles[0], tmp_path, output_format, True))]
+        else:
+            part_dir = tempfile.mkdtemp(prefix='.quizr-export-', dir=os.path.dirname(os.path.abspath(output)))
+            parts = [os.path.join(part_dir, f"{position}.part") for position in range(len(stores))]
+            tasks = [(store, profile, part, output_format, False)
+                     for store, profile, part in zip(stores, profiles, parts)]
+            with ProcessPoolExecutor(max_workers=workers or None) as executor:
+                results = list(executor.map(_export_store, tasks))
+
+            writer = _open_writer(tmp_path, output_format)
+            try:
+                for part, (_, _, error) in zip(parts, results):
+                    if not error:
+                        writer.append(part)
+            finally:
+                writer.close()
+
+        # Leave any earlier export in place if no store could be read
+        if not all(error for _, _, error in results):
+            os.replace(tmp_path, output)
+    finally:
+        if part_dir:
+            shutil.rmtree(part_dir, ignore_errors=True)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    for store, (rows, questions, error) in zip(stores, results):
+        if error:
+            counts['errors'].append((store, error))
+        else:
+            counts['stores'] += 1
+            counts['rows'] += rows
+            counts['questions'] += questions
+    return counts
@@ -5,32 +5,51 @@ Quiz engine for QUIZR - handles question presentation and answer evaluation
 import os
 import subprocess
 import sys
+import heapq
+import math
 import random
-from typing import List, Dict, Optional, Tuple
+import time
+from typing import Callable, List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
 from fuzzywuzzy import fuzz
 
-from .models import Question, Quiz, QuestionProgress, SessionStats
+from .models import MODES, Question, Quiz, QuestionProgress, SessionStats
+from .names import load_names, suggest_names
 from .data_manager import DataManager
 from .config import Config
+from .distractors import DistractorIndex
+from .normalization import AnswerNormalizer
+from .profiling import timed
+from .session import (ExamSession, ManualClock, QuizSession, is_quit_command, load_checkpoint,
+                      save_transcript)
 
 
 class QuizEngine:
     """Core quiz engine for running quiz sessions"""
     
-    def __init__(self, config: Config, data_manager: DataManager):
+    MODES = MODES
+    
+    def __init__(self, config: Config, data_manager: DataManager, seed: Optional[int] = None,
+                 clock: Optional[Callable[[], datetime]] = None):
         """Initialize quiz engine
         
         Args:
             config: Configuration object
             data_manager: Data manager for loading and saving data
+            seed: Seed for random question selection, for reproducible sessions
+            clock: Function returning the current time (defaults to datetime.now)
         """
         self.config = config
         self.data_manager = data_manager
         self.current_session: Optional[SessionStats] = None
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.clock = clock or datetime.now
+        self.normalizer = AnswerNormalizer.from_config(config)
+        self.distractors: Optional[DistractorIndex] = None  # Built on first multiple-choice question
     
-    def evaluate_answer(self, question: Question, user_answer: str) -> bool:
-        """Evaluate if the user's answer is correct
+    def check_answer(self, question: Question, user_answer: str) -> bool:
+        """Check if the user's answer is correct without printing feedback
         
         Args:
             question: Question being answered
@@ -40,19 +59,37 @@ class QuizEngine:
             True if answer is correct, False otherwise
         """
         if not user_answer:
-            print("\n❌ Incorrect. The correct answer is:", question.answer)
             return False
             
         # Get similarity threshold from config (default 90%)
-        threshold = self.config.get('similarity_threshold', 90)
+        threshold = self.config.get('fuzzy_threshold', 90)
+        
+        # Accepted answers are normalized when the quiz is loaded
+        accepted = question.accepted
+        if accepted is None:
+            accepted = self.normalizer.accepted_forms(question.answer, question.alternatives)
+        given = self.normalizer.normalize_answer(user_answer)
+        if given in accepted:
+            return True
         
-        # If question requires strict matching, use exact match
+        # If question requires strict matching, only normalized exact matches count
         if question.strict:
-            is_correct = user_answer.lower() == question.answer.lower()
-        else:
-            # Use fuzzy matching with similarity threshold
-            ratio = fuzz.ratio(user_answer.lower(), question.answer.lower())
-            is_correct = ratio >= threshold
+            return False
+        
+        # Use fuzzy matching with similarity threshold
+        return any(fuzz.ratio(given, form) >= threshold for form in accepted)
+    
+    def evaluate_answer(self, question: Question, user_answer: str) -> bool:
+        """Evaluate if the user's answer is correct
+        
+        Args:
+            question: Question being answered
+            user_answer: User's answer attempt
+            
+        Returns:
+            True if answer is correct, False otherwise
+        """
+        is_correct = self.check_answer(question, user_answer)
         
         if is_correct:
             print("\n✓ Correct!")
@@ -65,15 +102,11 @@ class QuizEngine:
         """Display an image using the system's default viewer
         
         Args:
-            image_path: Path to the image file
+            image_path: Path to the image file, known to exist
             
         Returns:
             True if image was opened successfully, False otherwise
         """
-        if not os.path.exists(image_path):
-            print(f"Warning: Image not found: {image_path}")
-            return False
-        
         try:
             if sys.platform.startswith('win'):
                 os.startfile(image_path)
@@ -86,27 +119,99 @@ class QuizEngine:
             print(f"Error opening image: {e}")
             return False
     
-    def present_question(self, question: Question) -> str:
+    def show_image(self, name: str) -> bool:
+        """Show a question's image as a terminal preview or in the system viewer
+        
+        Existence is looked up in the image manifest, so nothing is stat'ed.
+        
+        Args:
+            name: Image name as written in the quiz file
+            
+        Returns:
+            True if the image was shown, False otherwise
+        """
+        manifest = self.data_manager.get_image_manifest()
+        if manifest.get(name) is None:
+            print(f"Warning: Image not found in images/: {name}")
+            return False
+        
+        if self.config.get('image_previews'):
+            preview = manifest.read_preview(name)
+            if preview:
+                print(preview)
+                return True
+        return self.display_image(manifest.get_path(name))
+    
+    def warn_missing_images(self, questions: List[Tuple[str, Question]]) -> None:
+        """Report up front every image of a session that is not in the images directory
+        
+        Args:
+            questions: Session questions as (quiz_filepath, question)
+        """
+        missing = self.data_manager.get_image_manifest().missing(
+            question.image for _, question in questions if question.image)
+        if missing:
+            listed = ', '.join(missing[:5]) + (f" and {len(missing) - 5} more" if len(missing) > 5 else "")
+            print(f"Warning: {len(missing)} image(s) missing from images/: {listed}")
+            print("Run 'quizr check' for the questions that use them.\n")
+    
+    def get_choices(self, quiz_file: str, question: Question) -> List[str]:
+        """Get shuffled options for a multiple-choice question
+        
+        Distractors are plausible answers of other questions, mostly from
+        the same folder; see DistractorIndex.candidates().
+        
+        Args:
+            quiz_file: Quiz file the question belongs to
+            question: Question to offer choices for
+            
+        Returns:
+            Options including the right answer, in random order
+        """
+        if self.distractors is None:
+            self.distractors = DistractorIndex(self.config, self.data_manager).build()
+        
+        wanted = self.config.get('choice_count', 4) - 1
+        # Skip candidates close enough to the answer to be graded correct,
+        # looking further down the ranking if too many of them are
+        limit = 3 * wanted
+        while True:
+            candidates = self.distractors.candidates(quiz_file, question, self.rng, limit)
+            pool = [candidate for candidate in candidates if not self.check_answer(question, candidate)]
+            if len(pool) >= wanted or len(candidates) < limit:
+                break
+            limit *= 4
+        choices = self.rng.sample(pool[:2 * wanted], min(wanted, len(pool))) + [question.answer]
+        self.rng.shuffle(choices)
+        return choices
+    
+    def present_question(self, question: Question, choices: Optional[List[str]] = None) -> str:
         """Present a question to the user and get their answer
         
         Args:
             question: Question to present
+            choices: Options to pick from by number, or None for a free-text answer
             
         Returns:
-            User's answer
+            User's answer (the text of the option for a picked number)
         """
         # Display image if present
         if question.image:
-            image_path = os.path.join(self.config.get_images_dir(), question.image)
-            if not self.display_image(image_path):
+            if not self.show_image(question.image):
                 print(f"Warning: Could not display image: {question.image}")
         
         # Display question
         print("\n" + question.prompt)
+        if choices:
+            print()
+            for number, choice in enumerate(choices, 1):
+                print(f"  {number}) {choice}")
         
         # Get user input
         try:
             answer = input("\nYour answer: ").strip()
+            if choices and answer.isdigit() and 1 <= int(answer) <= len(choices):
+                return choices[int(answer) - 1]
             return answer
         except KeyboardInterrupt:
             return "!quit"
@@ -118,7 +223,7 @@ class QuizEngine:
         
         Args:
             quizzes: List of loaded quizzes
-            mode: Mode to use ('shuffle', 'quick', 'spaced')
+            mode: Mode to use ('shuffle', 'quick', 'spaced', 'weak', 'exam')
             
         Returns:
             List of tuples (quiz_filepath, question)
@@ -130,14 +235,43 @@ class QuizEngine:
             for question in quiz.questions.values():
                 all_questions.append((quiz.filepath, question))
         
-        if mode == 'quick':
+        return self.order_questions(all_questions, mode)
+    
+    @timed('order_questions')
+    def order_questions(self, all_questions: List[Tuple[str, Question]], mode: str) -> List[Tuple[str, Question]]:
+        """Select and order questions for a mode
+        
+        Args:
+            all_questions: List of (quiz_filepath, question) tuples
+            mode: Mode to use ('shuffle', 'quick', 'spaced', 'weak')
+            
+        Returns:
+            List of tuples (quiz_filepath, question)
+        """
+        if mode == 'exam':
+            # Fixed-size sample drawn from every domain in proportion
+            count = min(self.config.get('exam_question_count', 90), len(all_questions))
+            return self._stratified_sample(all_questions, count)
+        
+        elif mode == 'weak':
+            # Random subset favouring weak and stale questions
+            count = min(self.config.get('quick_mode_count', 10), len(all_questions))
+            return self._sample_by_weakness(all_questions, count)
+        
+        elif mode == 'leeches':
+            # The most-missed questions, worst first, from the leech index
+            count = self.config.get('quick_mode_count', 10)
+            return self._select_leeches(all_questions, count)
+        
+        elif mode == 'quick':
             # Select random subset
             count = min(self.config.get('quick_mode_count', 10), len(all_questions))
-            return random.sample(all_questions, count)
+            return self.rng.sample(all_questions, count)
         
         elif mode == 'shuffle':
             # Randomize order but include all questions
-            random.shuffle(all_questions)
+            all_questions = list(all_questions)
+            self.rng.shuffle(all_questions)
             return all_questions
         
         elif mode == 'spaced':
@@ -148,6 +282,194 @@ class QuizEngine:
             # Default to spaced repetition
             return self._sort_by_spaced_repetition(all_questions)
     
+    def _weakness_weights(self, questions: List[Tuple[str, Question]]) -> List[float]:
+        """Calculate sampling weights from error rate and time since last review
+        
+        Args:
+            questions: List of (quiz_filepath, question) tuples
+            
+        Returns:
+            Positive weight per question; higher means more likely to be drawn
+        """
+        now = self.clock()
+        half_life = self.config.get('weak_staleness_days', 7)
+        error_weight = self.config.get('weak_error_weight', 3.0)
+        unseen_error = 0.5  # Prior error rate for questions never attempted
+        
+        weights = []
+        for quiz_filepath, question in questions:
+            progress = self.data_manager.get_question_progress(quiz_filepath, question.id)
+            if progress.attempts == 0:
+                weights.append(0.1 + error_weight * unseen_error + 1.0)
+                continue
+            
+            error_rate = 1 - progress.correct / progress.attempts
+            try:
+                days_since = (now - datetime.fromisoformat(progress.last_review)).total_seconds() / 86400
+            except (TypeError, ValueError):
+                days_since = half_life * 10
+            # Staleness rises from 0 towards 1 as the last review ages
+            staleness = 1 - 0.5 ** (max(days_since, 0) / half_life)
+            weights.append(0.1 + error_weight * error_rate + staleness)
+        
+        return weights
+    
+    def _sample_by_weakness(self, questions: List[Tuple[str, Question]], count: int) -> List[Tuple[str, Question]]:
+        """Draw a weighted sample without replacement
+        
+        Uses Efraimidis-Spirakis keys: each question gets log(u) / weight for a
+        uniform u, and the count largest keys win. That is a single O(n) pass
+        plus an O(n log count) selection, with no repeated re-weighting.
+        
+        Args:
+            questions: List of (quiz_filepath, question) tuples
+            count: Number of questions to draw
+            
+        Returns:
+            Sampled questions, most strongly preferred first
+        """
+        weights = self._weakness_weights(questions)
+        random_value = self.rng.random
+        log = math.log
+        # 1 - random() is in (0, 1], so the log is always defined
+        keys = [log(1.0 - random_value()) / weight for weight in weights]
+        chosen = heapq.nlargest(count, range(len(questions)), key=keys.__getitem__)
+        return [questions[i] for i in chosen]
+    
+    @staticmethod
+    def exam_domains(quiz_files: List[str]) -> Dict[str, str]:
+        """Group quiz files into exam domains
+        
+        A domain is the first folder below the folder all quiz files share,
+        so an exam over A+ is split into Hardware, Networking and so on.
+        Quizzes directly in the shared folder are domains of their own.
+        
+        Args:
+            quiz_files: Quiz file paths
+            
+        Returns:
+            Dict mapping each quiz file to its domain name
+        """
+        split = {quiz_file: quiz_file.split('/') for quiz_file in quiz_files}
+        shared = os.path.commonprefix([parts[:-1] for parts in split.values()]) if split else []
+        depth = len(shared)
+        return {quiz_file: parts[depth] if len(parts) > depth + 1 else os.path.splitext(parts[-1])[0]
+                for quiz_file, parts in split.items()}
+    
+    def _stratified_sample(self, questions: List[Tuple[str, Question]], count: int) -> List[Tuple[str, Question]]:
+        """Draw an exam sample with a fixed share of questions from each domain
+        
+        Domains listed in ``exam_weights`` get that percentage of the
+        questions, and the remaining percentage is split among the other
+        domains by size. Seats are handed out by largest remainder, and
+        seats a small domain can't fill go to the others.
+        
+        Args:
+            questions: List of (quiz_filepath, question) tuples
+            count: Number of questions to draw
+            
+        Returns:
+            Sampled questions in random order
+        """
+        domains = self.exam_domains(sorted({quiz_filepath for quiz_filepath, _ in questions}))
+        by_domain: Dict[str, List[Tuple[str, Question]]] = {}
+        for item in questions:
+            by_domain.setdefault(domains[item[0]], []).append(item)
+        
+        # Listed domains get their percentage; the rest is split among the others by size
+        percentages = self.config.get('exam_weights') or {}
+        listed = {domain: float(percentages[domain]) for domain in by_domain if domain in percentages}
+        unlisted_size = sum(len(items) for domain, items in by_domain.items() if domain not in listed)
+        remainder = max(100.0 - sum(listed.values()), 0.0) if listed else 100.0
+        weights = {domain: listed.get(domain, remainder * len(items) / unlisted_size if unlisted_size else 0.0)
+                   for domain, items in by_domain.items()}
+        
+        seats = {domain: 0 for domain in by_domain}
+        left = count
+        while left > 0:
+            open_domains = {domain: weights[domain]
+                            for domain, items in by_domain.items() if seats[domain] < len(items) and weights[domain] > 0}
+            total = sum(open_domains.values())
+            if not open_domains or total <= 0:
+                break
+            shares = {domain: left * weight / total for domain, weight in open_domains.items()}
+            room = {domain: len(by_domain[domain]) - seats[domain] for domain in open_domains}
+            granted = {domain: min(int(share), room[domain]) for domain, share in shares.items()}
+            # Seats lost to rounding go to the largest remainders
+            spare = left - sum(granted.values())
+            for domain in sorted(shares, key=lambda d: (int(shares[d]) - shares[d], d)):
+                if spare <= 0:
+                    break
+                if granted[domain] < room[domain] and granted[domain] == int(shares[domain]):
+                    granted[domain] += 1
+                    spare -= 1
+            if not any(granted.values()):
+                break
+            for domain, extra in granted.items():
+                seats[domain] += extra
+                left -= extra
+        
+        sample = []
+        for domain in sorted(by_domain):
+            sample.extend(self.rng.sample(by_domain[domain], seats[domain]))
+        self.rng.shuffle(sample)
+        return sample
+    
+    def _select_leeches(self, questions: List[Tuple[str, Question]], count: int) -> List[Tuple[str, Question]]:
+        """Pick the worst leeches among questions
+        
+        Args:
+            questions: List of (quiz_filepath, question) tuples
+            count: Maximum number of questions
+            
+        Returns:
+            Leeches in index order, worst first
+        """
+        by_key = {(quiz_filepath, str(question.id)): (quiz_filepath, question) for quiz_filepath, question in questions}
+        quiz_files = {quiz_filepath for quiz_filepath, _ in questions}
+        index = self.data_manager.get_leech_index()
+        
+        # Progress of deleted questions can still rank; ask for more until enough are live
+        wanted = count
+        while True:
+            ranked = index.top(wanted, quiz_files)
+            picked = [by_key[(quiz_filepath, str(question_id))] for quiz_filepath, question_id, _ in ranked
+                      if (quiz_filepath, str(question_id)) in by_key]
+            if len(picked) >= count or len(ranked) < wanted:
+                return picked[:count]
+            wanted *= 2
+    
+    def load_leech_quizzes(self, quiz_files: List[str]) -> List[Quiz]:
+        """Load only the quizzes holding the leeches a session would ask
+        
+        Like _select_leeches(), asks the index for more leeches while some
+        of them belong to deleted questions, so those never crowd out live
+        ones.
+        
+        Args:
+            quiz_files: Quiz files of the session's target
+            
+        Returns:
+            Loaded quizzes with at least one of the worst leeches
+        """
+        count = self.config.get('quick_mode_count', 10)
+        index = self.data_manager.get_leech_index()
+        quizzes: Dict[str, Optional[Quiz]] = {}
+        question_ids: Dict[str, set] = {}
+        wanted = count
+        while True:
+            ranked = index.top(wanted, set(quiz_files))
+            holding = []
+            for quiz_filepath, question_id, _ in ranked:
+                if quiz_filepath not in quizzes:
+                    quiz = quizzes[quiz_filepath] = self.data_manager.load_quiz(quiz_filepath)
+                    question_ids[quiz_filepath] = {str(qid) for qid in quiz.questions} if quiz else set()
+                if str(question_id) in question_ids[quiz_filepath]:
+                    holding.append(quiz_filepath)
+            if len(holding) >= count or len(ranked) < wanted:
+                return [quizzes[quiz_filepath] for quiz_filepath in dict.fromkeys(holding[:count])]
+            wanted *= 2
+    
     def _sort_by_spaced_repetition(self, questions: List[Tuple[str, Question]]) -> List[Tuple[str, Question]]:
         """Sort questions by spaced repetition priority
         
@@ -157,6 +479,8 @@ class QuizEngine:
         Returns:
             Sorted list with highest priority questions first
         """
+        now = self.clock()
+        
         def calculate_priority(item: Tuple[str, Question]) -> float:
             quiz_filepath, question = item
             progress = self.data_manager.get_question_progress(quiz_filepath, question.id)
@@ -169,7 +493,7 @@ class QuizEngine:
             if progress.last_review:
                 try:
                     last_review = datetime.fromisoformat(progress.last_review)
-                    days_since = (datetime.now() - last_review).days
+                    days_since = (now - last_review).days
                 except:
                     days_since = 999  # Error parsing date, treat as very old
             else:
@@ -205,12 +529,14 @@ class QuizEngine:
         sorted_questions = sorted(questions, key=calculate_priority, reverse=True)
         return sorted_questions
     
-    def run_quiz_session(self, target_name: str, mode: str = 'spaced') -> SessionStats:
+    def run_quiz_session(self, target_name: Optional[str], mode: str = 'spaced', record_path: Optional[str] = None) -> SessionStats:
         """Run a complete quiz session
         
         Args:
-            target_name: Exact name of quiz file (without .yaml) or folder
-            mode: Quiz mode ('shuffle', 'quick', 'spaced')
+            target_name: Exact name of quiz file (without .yaml) or folder,
+                or None for every quiz
+            mode: Quiz mode ('shuffle', 'quick', 'spaced', 'weak', 'exam', 'leeches')
+            record_path: File to write an answer transcript to for replay
             
         Returns:
             Session statistics
@@ -218,15 +544,22 @@ class QuizEngine:
         # Start session tracking
         self.current_session = SessionStats(
             mode=mode,
-            start_time=datetime.now()
+            start_time=self.clock()
         )
         
         try:
             # Load quizzes - will raise ValueError if name is ambiguous
-            quiz_files = self.data_manager.find_quizzes_by_path(target_name, debug=False)
+            if target_name is None:
+                quiz_files = [quiz_file for files in self.data_manager.discover_quizzes().values() for quiz_file in files]
+                target_name = 'All Topics'
+            else:
+                quiz_files = self.data_manager.find_quizzes_by_path(target_name, debug=False)
             
             if not quiz_files:
                 print(f"No quiz found with name: {target_name}")
+                suggestions = suggest_names(load_names(self.config), target_name)
+                if suggestions:
+                    print(f"Did you mean: {', '.join(suggestions)}?")
                 print("\nPlease use one of these:")
                 print("1. An exact quiz name (without .yaml)")
                 print("2. An exact folder name")
@@ -234,69 +567,45 @@ class QuizEngine:
                 self.current_session.finish_session()
                 return self.current_session
             
-            quizzes = []
-            for quiz_file in quiz_files:
-                quiz = self.data_manager.load_quiz(quiz_file)
-                if quiz:
-                    quizzes.append(quiz)
-                    self.current_session.exercises_completed.append(quiz.name)
+            if mode == 'leeches':
+                # Only the files holding leeches are loaded
+                quizzes = self.load_leech_quizzes(quiz_files)
+                if not quizzes:
+                    print(f"No leeches in {target_name}: no question has been missed often enough yet.")
+                    self.current_session.finish_session()
+                    return self.current_session
+            else:
+                quizzes = []
+                for quiz_file in quiz_files:
+                    quiz = self.data_manager.load_quiz(quiz_file)
+                    if quiz:
+                        quizzes.append(quiz)
+                    error = self.data_manager.load_errors.get(quiz_file)
+                    if error:
+                        print(f"Warning: {quiz_file}: {error}")
             
             if not quizzes:
                 print("No valid quizzes could be loaded")
                 self.current_session.finish_session()
                 return self.current_session
             
-            # Get questions based on mode
-            questions = self.get_questions_for_mode(quizzes, mode)
-            
-            # Print session header
-            print("\n" + "=" * 60)
-            print(f"Starting {mode} mode session with {len(questions)} questions")
-            print(f"Target: {target_name}")
-            print("=" * 60 + "\n")
-            
-            # Run the quiz
-            was_aborted = False
-            for quiz_file, question in questions:
-                answer = self.present_question(question)
-                
-                # Check for quit/abort commands with various prefixes
-                quit_commands = ['quit', 'abort', '!quit', '!abort', '#quit', '#abort']
-                if any(answer.lower().strip() == cmd for cmd in quit_commands):
-                    was_aborted = True
-                    break
-                    
-                is_correct = self.evaluate_answer(question, answer)
-                self.current_session.record_answer(is_correct)
-                
-                # Update progress
-                progress = self.data_manager.get_question_progress(quiz_file, question.id)
-                progress.record_attempt(is_correct)
-                self.data_manager.update_question_progress(quiz_file, question.id, progress)
-                
-                # Save progress periodically
-                self.data_manager.save_progress()
-                
-                # Add a blank line for readability between questions
-                print()
-            
-            # Print session results
-            print("\n" + "=" * 60)
-            print(f"Exercise Complete: {' + '.join(self.current_session.exercises_completed)}")
-            print("=" * 60)
-            print(f"Mode                  : {mode}")
-            print(f"Questions Attempted   : {self.current_session.questions_attempted}")
-            print(f"Correct Answers       : {self.current_session.questions_correct}")
-            print(f"Correct Answers %     : {self.current_session.get_accuracy():.1f}%")
-            print(f"Session Duration      : {self.current_session.get_duration()}")
-            print("=" * 60)
-            
-            if was_aborted:
-                print("Note: Session was aborted by user.")
-            elif mode == 'quick':
-                print("Note: Quick mode session completed with selected questions.")
+            if record_path and self.seed is None:
+                # A transcript needs a known seed to reproduce the question order
+                self.seed = random.randrange(2 ** 32)
+                self.rng.seed(self.seed)
+            
+            if mode == 'exam':
+                session = ExamSession.from_quizzes(self, quizzes, mode, record=record_path is not None)
+                session.time_limit = self.config.get('exam_time_limit', 90) * 60
+                stats = self.run_exam(session, target_name)
             else:
-                print("Note: Session completed with all available questions.")
+                session = QuizSession.from_quizzes(self, quizzes, mode, record=record_path is not None)
+                session.checkpoint_to(self.config.get_checkpoint_file(), target_name)
+                stats = self.run_session(session, target_name)
+            if record_path:
+                save_transcript(record_path, session.get_transcript(target_name))
+                print(f"Transcript written to: {record_path}")
+            return stats
             
         except ValueError as e:
             print(f"\nError: {str(e)}")
@@ -306,4 +615,243 @@ class QuizEngine:
             print("\nRun 'quizr list' to see available quizzes and folders.")
         
         self.current_session.finish_session()
-        return self.current_session 
\ No newline at end of file
+        return self.current_session
+    
+    def resume_session(self) -> Optional[SessionStats]:
+        """Continue the last aborted session where it stopped
+        
+        Returns:
+            Session statistics, or None if there is no session to resume
+        """
+        checkpoint_file = self.config.get_checkpoint_file()
+        if not os.path.exists(checkpoint_file):
+            print("No unfinished session to resume.")
+            return None
+        try:
+            checkpoint = load_checkpoint(checkpoint_file)
+            session = QuizSession.from_checkpoint(self, checkpoint)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Error: Could not resume session from {checkpoint_file}: {e}")
+            return None
+        
+        skipped = len(checkpoint['queue']) - session.remaining
+        print(f"Resuming {checkpoint['mode']} session on {checkpoint['target']}: "
+              f"{session.stats.questions_attempted} answered, {session.remaining} left")
+        if skipped:
+            print(f"Note: {skipped} question(s) no longer exist and were skipped.")
+        return self.run_session(session, checkpoint['target'])
+    
+    def run_session(self, session: QuizSession, target_name: str) -> SessionStats:
+        """Run a prepared session interactively in the terminal
+        
+        Args:
+            session: Session to drive
+            target_name: Target shown in the session header
+            
+        Returns:
+            Session statistics
+        """
+        self.current_session = session.stats
+        mode = session.stats.mode
+        
+        # Print session header
+        print("\n" + "=" * 60)
+        print(f"Starting {mode} mode session with {session.remaining} questions")
+        print(f"Target: {target_name}")
+        print("=" * 60 + "\n")
+        self.warn_missing_images(session.questions[session.position:])
+        
+        # Run the quiz
+        while not session.is_finished:
+            quiz_file, question = session.next_question()
+            choices = self.get_choices(quiz_file, question) if self.config.get('multiple_choice') else None
+            answer = self.present_question(question, choices)
+            
+            # Check for quit/abort commands with various prefixes
+            if is_quit_command(answer):
+                session.abort()
+                break
+            
+            result = session.submit(answer)
+            if result.is_correct:
+                print("\n✓ Correct!")
+            else:
+                print("\n❌ Incorrect. The correct answer is:", result.correct_answer)
+            
+            # Add a blank line for readability between questions
+            print()
+        
+        stats = session.finish()
+        
+        # Print session results
+        print("\n" + "=" * 60)
+        print(f"Exercise Complete: {' + '.join(stats.exercises_completed)}")
+        print("=" * 60)
+        print(f"Mode                  : {mode}")
+        print(f"Questions Attempted   : {stats.questions_attempted}")
+        print(f"Correct Answers       : {stats.questions_correct}")
+        print(f"Correct Answers %     : {stats.get_accuracy():.1f}%")
+        print(f"Session Duration      : {stats.get_duration()}")
+        print("=" * 60)
+        
+        if session.aborted:
+            print("Note: Session was aborted by user.")
+            if session.checkpoint_path and session.remaining:
+                print(f"Run 'quizr start --resume' to answer the remaining {session.remaining} questions.")
+        elif mode == 'quick':
+            print("Note: Quick mode session completed with selected questions.")
+        elif mode == 'leeches':
+            print("Note: Leech drill completed. Questions answered well enough drop out of the next one.")
+        else:
+            print("Note: Session completed with all available questions.")
+        
+        return stats
+
+    
+    def run_exam(self, session: ExamSession, target_name: str) -> SessionStats:
+        """Run a prepared exam in the terminal, with results only at the end
+        
+        Args:
+            session: Exam session to drive
+            target_name: Target shown in the exam header
+            
+        Returns:
+            Session statistics
+        """
+        self.current_session = session.stats
+        total = session.remaining
+        
+        print("\n" + "=" * 60)
+        print(f"Starting exam with {total} questions")
+        print(f"Target: {target_name}")
+        if session.time_limit:
+            print(f"Time limit: {session.time_limit / 60:.0f} minutes")
+        print("Answers are graded when the exam ends. Type 'quit' to end early.")
+        print("=" * 60 + "\n")
+        self.warn_missing_images(session.questions[session.position:])
+        
+        while not session.is_finished:
+            quiz_file, question = session.next_question()
+            time_left = session.time_left()
+            clock = f" — {int(time_left // 60)}:{int(time_left % 60):02d} left" if time_left is not None else ""
+            print(f"Question {session.position + 1}/{total}{clock}")
+            choices = self.get_choices(quiz_file, question) if self.config.get('multiple_choice') else None
+            answer = self.present_question(question, choices)
+            
+            if is_quit_command(answer):
+                session.abort()
+                break
+            
+            session.write_answer(answer)
+            print()
+        
+        if session.timed_out:
+            print("\nTime is up. Your last answer was not counted.")
+        
+        results = session.grade()
+        stats = session.finish()
+        
+        # Score per domain, so weak areas stand out
+        domains = self.exam_domains(sorted({quiz_file for quiz_file, _ in session.questions}))
+        by_domain: Dict[str, List[int]] = {}
+        for quiz_file, _ in session.questions:
+            by_domain.setdefault(domains[quiz_file], [0, 0])[1] += 1
+        for result in results:
+            by_domain[domains[result.quiz_filepath]][0] += result.is_correct
+        
+        print("\n" + "=" * 60)
+        print(f"Exam Complete: {target_name}")
+        print("=" * 60)
+        print(f"Questions             : {total}")
+        print(f"Answered              : {len(results)}")
+        print(f"Correct Answers       : {stats.questions_correct}")
+        print(f"Score                 : {stats.questions_correct / total * 100:.1f}%" if total else "Score                 : N/A")
+        print(f"Session Duration      : {stats.get_duration()}")
+        print("-" * 60)
+        for domain, (correct, asked) in sorted(by_domain.items()):
+            print(f"  {domain:<30} {correct:>3}/{asked:<3} {correct / asked * 100:>5.0f}%")
+        print("=" * 60)
+        
+        missed = [result for result in results if not result.is_correct]
+        if missed:
+            print("Missed Questions:")
+            questions = {(quiz_file, question.id): question for quiz_file, question in session.questions}
+            for result in missed:
+                prompt = questions[(result.quiz_filepath, result.question_id)].prompt
+                print(f"  {prompt}")
+                print(f"    Your answer: {result.user_answer or '(blank)'} | Correct: {result.correct_answer}")
+        
+        if session.aborted:
+            print("Note: Exam was ended early; unanswered questions count as incorrect.")
+        elif len(results) < total:
+            print("Note: Unanswered questions count as incorrect.")
+        
+        return stats
+
+
+def replay_transcript(config: Config, transcript: Dict) -> Dict:
+    """Replay a recorded session without terminal I/O or writing progress
+    
+    The session is rebuilt from the transcript's seed, start time and
+    progress snapshot, and every recorded answer is submitted at its recorded
+    time, so the question order and grading match the original session.
+    Exams are replayed as exams: the answer sheet is filled in and graded in
+    one pass. The progress file is never read or written.
+    
+    Args:
+        config: Configuration object
+        transcript: Transcript loaded with load_transcript()
+        
+    Returns:
+        Dictionary with 'answers', 'correct', 'mismatches' (list of
+        descriptions of where the replay diverged) and 'seconds' taken
+    """
+    clock = ManualClock(datetime.fromisoformat(transcript['started_at']))
+    # Question selection depends on these settings; use the recorded ones
+    settings = transcript.get('settings') or {}
+    if settings:
+        base_config = config
+        config = Config(config.base_dir)
+        config.config = dict(base_config.config, **settings)
+    data_manager = DataManager(config, load_progress=False)
+    for quiz_file, quiz_progress in transcript['progress'].items():
+        data_manager.set_quiz_progress(quiz_file, quiz_progress)
+    engine = QuizEngine(config, data_manager, seed=transcript['seed'], clock=clock)
+    
+    quizzes = [data_manager.load_quiz(quiz_file) for quiz_file in transcript['quizzes']]
+    mismatches = [f"Quiz could not be loaded: {quiz_file}"
+                  for quiz_file, quiz in zip(transcript['quizzes'], quizzes) if quiz is None]
+    
+    started = time.perf_counter()
+    exam = transcript['mode'] == 'exam'
+    session_class = ExamSession if exam else QuizSession
+    session = session_class.from_quizzes(engine, [quiz for quiz in quizzes if quiz], transcript['mode'], persist=False)
+    results = []
+    for number, entry in enumerate(transcript['answers'], 1):
+        current = session.next_question()
+        expected = (entry['quiz'], entry['question'])
+        if current is None or (current[0], str(current[1].id)) != expected:
+            actual = f"{current[0]} [{current[1].id}]" if current else "end of session"
+            mismatches.append(f"Answer {number}: expected question {expected[0]} [{expected[1]}], got {actual}")
+            break
+        
+        clock.now = datetime.fromisoformat(entry['at'])
+        if exam:
+            session.write_answer(entry['answer'])  # Graded with the rest of the sheet below
+        else:
+            results.append(session.submit(entry['answer']))
+    if exam:
+        results = session.grade()
+    
+    correct = 0
+    for number, (entry, result) in enumerate(zip(transcript['answers'], results), 1):
+        correct += result.is_correct
+        if result.is_correct != entry['correct']:
+            mismatches.append(f"Answer {number}: graded {result.is_correct}, recorded {entry['correct']}")
+    
+    return {
+        'answers': len(transcript['answers']),
+        'correct': correct,
+        'mismatches': mismatches,
+        'seconds': time.perf_counter() - started,
+    }
@@ -0,0 +1,157 @@
+"""
+Full-text search for QUIZR - a persistent SQLite FTS5 index over prompts and answers
+"""
+
+import os
+import sqlite3
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from .config import Config
+from .data_manager import DataManager
+
+
+@dataclass
+class SearchHit:
+    """A question matching a search"""
+    quiz_filepath: str
+    question_id: str
+    prompt: str
+    answer: str
+    score: float
+
+
+class SearchIndex:
+    """Inverted index over every question in the exercises directory
+
+    The index lives in the cache directory and is brought up to date
+    incrementally: only quiz files whose size or modification time changed
+    since the last update are re-read.
+    """
+
+    INDEX_FILE = 'search.sqlite3'
+
+    def __init__(self, config: Config, data_manager: DataManager):
+        """Initialize search index
+
+        Args:
+            config: Configuration object
+            data_manager: Data manager used to discover and load quizzes
+
+        Raises:
+            RuntimeError: If the SQLite library lacks FTS5 support
+        """
+        self.config = config
+        self.data_manager = data_manager
+        self.db_path = os.path.join(config.get_cache_dir(), self.INDEX_FILE)
+        self.connection = sqlite3.connect(self.db_path)
+        try:
+            self.connection.executescript('''
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY,
+                    mtime_ns INTEGER NOT NULL,
+                    size INTEGER NOT NULL
+                );
+                CREATE VIRTUAL TABLE IF NOT EXISTS questions USING fts5(
+                    quiz_path UNINDEXED,
+                    question_id UNINDEXED,
+                    prompt,
+                    answer,
+                    tokenize = 'unicode61'
+                );
+            ''')
+        except sqlite3.OperationalError as e:
+            self.connection.close()
+            raise RuntimeError(f"Search needs SQLite with FTS5 support: {e}")
+
+    def close(self) -> None:
+        """Close the index database"""
+        self.connection.close()
+
+    def update(self) -> Dict[str, int]:
+        """Bring the index in line with the quiz files on disk
+
+        Returns:
+            Dictionary with counts of 'added', 'updated', 'removed' and
+            'unchanged' files
+        """
+        exercises_dir = self.config.get_exercises_dir()
+        bundle = self.data_manager.bundle
+        on_disk: Dict[str, Tuple[int, int]] = {}
+        for quiz_files in self.data_manager.discover_quizzes().values():
+            for quiz_file in quiz_files:
+                # Quizzes served from a bundle change whenever the bundle does
+                source = bundle.path if bundle else os.path.join(exercises_dir, *quiz_file.split('/'))
+                try:
+                    stat = os.stat(source)
+                except OSError:
+                    continue
+                on_disk[quiz_file] = (stat.st_mtime_ns, stat.st_size)
+
+        indexed = {path: (mtime_ns, size) for path, mtime_ns, size
+                   in self.connection.execute('SELECT path, mtime_ns, size FROM files')}
+
+        counts = {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 0}
+        with self.connection:
+            for path in indexed.keys() - on_disk.keys():
+                self._remove_file(path)
+                counts['removed'] += 1
+
+            for path, signature in on_disk.items():
+                if indexed.get(path) == signature:
+                    counts['unchanged'] += 1
+                    continue
+                if path in indexed:
+                    self._remove_file(path)
+                    counts['updated'] += 1
+                else:
+                    counts['added'] += 1
+                self._add_file(path, signature)
+
+        return counts
+
+    def _remove_file(self, path: str) -> None:
+        """Drop a quiz file's questions from the index"""
+        self.connection.execute('DELETE FROM questions WHERE quiz_path = ?', (path,))
+        self.connection.execute('DELETE FROM files WHERE path = ?', (path,))
+
+    def _add_file(self, path: str, signature: Tuple[int, int]) -> None:
+        """Index a quiz file's questions"""
+        quiz = self.data_manager.load_quiz(path)
+        if quiz:
+            self.connection.executemany(
+                'INSERT INTO questions (quiz_path, question_id, prompt, answer) VALUES (?, ?, ?, ?)',
+                [(path, str(question.id), str(question.prompt), str(question.answer))
+                 for question in quiz.questions.values()]
+            )
+        # Record unloadable files too so they aren't retried until they change
+        self.connection.execute('INSERT OR REPLACE INTO files (path, mtime_ns, size) VALUES (?, ?, ?)',
+                                (path,) + signature)
+
+    @staticmethod
+    def _build_query(terms: List[str]) -> str:
+        """Turn search terms into an FTS5 query matching all terms as prefixes"""
+        return ' '.join('"' + term.replace('"', '""') + '"*' for term in terms if term.strip())
+
+    def search(self, terms: List[str], limit: int = 20) -> List[SearchHit]:
+        """Find questions containing all of the given terms
+
+        Args:
+            terms: Words to search for in prompts and answers
+            limit: Maximum number of hits to return
+
+        Returns:
+            Hits ordered from most to least relevant
+        """
+        query = self._build_query(terms)
+        if not query:
+            return []
+
+        rows = self.connection.execute(
+            'SELECT quiz_path, question_id, prompt, answer, bm25(questions) AS score '
+            'FROM questions WHERE questions MATCH ? ORDER BY score LIMIT ?',
+            (query, limit)
+        )
+        # bm25() is lower for better matches; flip it so higher means more relevant
+        return [SearchHit(path, question_id, prompt, answer, -score)
+                for path, question_id, prompt, answer, score in rows]
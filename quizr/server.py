@@ -0,0 +1,389 @@
+"""
+Headless JSON-lines server for QUIZR - serves quiz sessions to many clients
+
+Each request is one JSON object per line and gets exactly one JSON object
+back on its own line. Supported operations:
+
+    {"op": "list"}
+    {"op": "start", "target": "A+", "mode": "quick", "choices": false}
+    {"op": "next", "session": "<id>"}
+    {"op": "answer", "session": "<id>", "answer": "80"}
+    {"op": "progress", "target": "global"}
+    {"op": "end", "session": "<id>"}
+
+Sessions started with "choices": true get multiple-choice options with each
+question from "next"; the answer is the text of the chosen option. Exam
+mode is not served: its answers are graded only when the exam ends, which
+the per-answer responses cannot express.
+
+Sessions are not tied to a connection, so a client may reconnect and carry
+on. A session with no requests for server_session_timeout seconds is
+dropped, so clients that go away without "end" don't pile up.
+
+Responses carry "ok": true plus the operation's fields, or "ok": false and
+an "error" message. An optional "id" in a request is echoed back.
+
+Requests are handled one at a time on a single worker thread, so quiz loads
+and progress writes never block the event loop reading other connections,
+and the data manager is never used by two threads at once.
+"""
+
+import asyncio
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from .config import Config
+from .data_manager import DataManager
+from .models import Quiz
+from .quiz_engine import QuizEngine
+from .session import QuizSession
+
+
+class RequestError(Exception):
+    """Raised for a malformed or invalid client request"""
+
+
+class ServerSession(QuizSession):
+    """A quiz session tracked by the server under an identifier"""
+
+    def __init__(self, session_id: str, target: str, session: QuizSession):
+        """Initialize session from a prepared quiz session
+
+        Args:
+            session_id: Unique session identifier
+            target: Quiz or folder name the session was started for
+            session: Session to take the questions and settings from
+        """
+        super().__init__(session.engine, session.questions, session.stats.mode,
+                         session.stats.exercises_completed, session.persist)
+        self.session_id = session_id
+        self.target = target
+        self.multiple_choice = False
+        self._choices: Optional[tuple] = None  # (position, options) of the current question
+        self.last_active = time.monotonic()
+
+    def summary(self) -> Dict[str, Any]:
+        """Get session statistics as a dictionary"""
+        return {
+            'session': self.session_id,
+            'target': self.target,
+            'mode': self.stats.mode,
+            'total': len(self.questions),
+            'remaining': self.remaining,
+            'attempted': self.stats.questions_attempted,
+            'correct': self.stats.questions_correct,
+            'accuracy': self.stats.get_accuracy(),
+            'duration': self.stats.get_duration(),
+        }
+
+
+class QuizServer:
+    """In-memory quiz registry and session host behind the JSON-lines protocol"""
+
+    LINE_LIMIT = 2 ** 16  # Longest request line accepted, in bytes
+
+    def __init__(self, config: Config, persist: bool = True):
+        """Initialize server
+
+        Args:
+            config: Configuration object
+            persist: Whether answers are written to the progress file. Load
+                tests turn this off so they don't touch real progress.
+        """
+        self.config = config
+        self.persist = persist
+        self.data_manager = DataManager(config)
+        self.quiz_engine = QuizEngine(config, self.data_manager)
+        self.sessions: Dict[str, ServerSession] = {}
+        self._quizzes: Dict[str, Quiz] = {}
+        self.registry = self.data_manager.discover_quizzes()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='quizr-server')
+        self._next_sweep = 0.0
+
+    def _get_quiz(self, quiz_file: str) -> Optional[Quiz]:
+        """Load a quiz once and keep it in memory"""
+        if quiz_file not in self._quizzes:
+            quiz = self.data_manager.load_quiz(quiz_file)
+            if quiz is None:
+                return None
+            self._quizzes[quiz_file] = quiz
+        return self._quizzes[quiz_file]
+
+    @staticmethod
+    def _field(request: Dict[str, Any], name: str, kind: type, default: Any = None) -> Any:
+        """Get a request field, checking its type
+
+        Raises:
+            RequestError: If the field is missing without a default, or has the wrong type
+        """
+        value = request.get(name, default)
+        if value is None:
+            raise RequestError(f"Missing {name}")
+        if not isinstance(value, kind) or isinstance(value, bool) != (kind is bool):
+            raise RequestError(f"{name.capitalize()} must be a {'boolean' if kind is bool else 'string'}")
+        return value
+
+    def _get_session(self, request: Dict[str, Any]) -> ServerSession:
+        """Look up the session named in a request"""
+        session_id = self._field(request, 'session', str)
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise RequestError(f"Unknown session: {session_id}")
+        session.last_active = time.monotonic()
+        return session
+
+    def _expire_sessions(self) -> None:
+        """Drop sessions idle for longer than the session timeout
+
+        Their answers are already recorded; only the unasked questions and
+        the session statistics are lost. Runs at most every tenth of the
+        timeout, so busy servers don't scan every session on each request.
+        """
+        timeout = self.config.get('server_session_timeout')
+        now = time.monotonic()
+        if not timeout or now < self._next_sweep:
+            return
+        self._next_sweep = now + timeout / 10
+        for session_id, session in list(self.sessions.items()):
+            if now - session.last_active > timeout:
+                del self.sessions[session_id]
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle a single decoded request
+
+        Args:
+            request: Decoded JSON request
+
+        Returns:
+            Response dictionary
+        """
+        self._expire_sessions()
+        try:
+            if not isinstance(request, dict):
+                raise RequestError("Request must be a JSON object")
+            op = request.get('op')
+            handler = getattr(self, f"op_{op}", None) if isinstance(op, str) else None
+            if handler is None:
+                raise RequestError(f"Unknown op: {op}")
+            response = {'ok': True}
+            response.update(handler(request))
+        except (RequestError, ValueError) as e:
+            response = {'ok': False, 'error': str(e)}
+        except Exception as e:
+            # Every request gets a response, even one that trips a bug
+            response = {'ok': False, 'error': f"Internal error: {type(e).__name__}: {e}"}
+
+        if isinstance(request, dict) and 'id' in request:
+            response['id'] = request['id']
+        return response
+
+    def op_list(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """List quiz folders and their files"""
+        return {'quizzes': self.registry}
+
+    def op_start(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Start a session for a quiz or folder"""
+        target = self._field(request, 'target', str)
+        mode = self._field(request, 'mode', str, 'spaced')
+        choices = self._field(request, 'choices', bool, False)
+        if not target:
+            raise RequestError("Missing target")
+        if mode not in QuizEngine.MODES:
+            raise RequestError(f"Invalid mode: {mode}")
+        if mode == 'exam':
+            raise RequestError("Exam mode is not available over the server")
+
+        quiz_files = self.data_manager.find_quizzes_by_path(target, all_quizzes=self.registry)
+        quizzes = [quiz for quiz in (self._get_quiz(f) for f in quiz_files) if quiz]
+        if not quizzes:
+            raise RequestError(f"No quiz found with name: {target}")
+
+        session = ServerSession(uuid.uuid4().hex, target,
+                                QuizSession.from_quizzes(self.quiz_engine, quizzes, mode, self.persist))
+        session.multiple_choice = choices
+        self.sessions[session.session_id] = session
+        return session.summary()
+
+    def op_next(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Get the question waiting for an answer"""
+        session = self._get_session(request)
+        current = session.next_question()
+        if current is None:
+            return {'done': True, 'summary': session.summary()}
+
+        quiz_file, question = current
+        response = {
+            'done': False,
+            'quiz': quiz_file,
+            'question': question.id,
+            'prompt': question.prompt,
+            'image': question.image,
+            'remaining': session.remaining,
+        }
+        if session.multiple_choice:
+            # Repeated requests for the same question see the same options
+            if session._choices is None or session._choices[0] != session.position:
+                session._choices = (session.position, self.quiz_engine.get_choices(quiz_file, question))
+            response['choices'] = session._choices[1]
+        return response
+
+    def op_answer(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Grade an answer to the current question and record progress"""
+        session = self._get_session(request)
+        answer = self._field(request, 'answer', str, '')
+
+        result = session.submit(answer.strip())
+        return {
+            'correct': result.is_correct,
+            'answer': result.correct_answer,
+            'remaining': result.remaining,
+        }
+
+    def op_progress(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Get progress for a session, a quiz or folder, or globally"""
+        if 'session' in request:
+            return self._get_session(request).summary()
+
+        target = self._field(request, 'target', str, 'global')
+        global_progress = self.data_manager.global_progress
+        if target == 'global':
+            quiz_files = [f for files in self.registry.values() for f in files]
+        else:
+            quiz_files = self.data_manager.find_quizzes_by_path(target, all_quizzes=self.registry)
+
+        total_questions = 0
+        questions_seen = 0
+        correct_answers = 0
+        total_attempts = 0
+        for quiz_file in quiz_files:
+            quiz = self._get_quiz(quiz_file)
+            if not quiz:
+                continue
+            for question_id in quiz.questions:
+                progress = self.data_manager.get_question_progress(quiz_file, question_id)
+                total_questions += 1
+                if progress.attempts > 0:
+                    questions_seen += 1
+                    total_attempts += progress.attempts
+                    correct_answers += progress.correct
+
+        return {
+            'target': target,
+            'total_questions': total_questions,
+            'questions_seen': questions_seen,
+            'correct_answers': correct_answers,
+            'total_attempts': total_attempts,
+            'total_reviews': global_progress.total_reviews,
+            'last_session': global_progress.last_session,
+        }
+
+    def op_end(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Finish a session and record it in the global statistics"""
+        session = self._get_session(request)
+        del self.sessions[session.session_id]
+        now = self.quiz_engine.clock()
+        session.stats.finish_session(now)
+        self.data_manager.global_progress.update_session_stats(session.stats.questions_attempted, now)
+        if self.persist:
+            self.data_manager.save_progress(force=False)
+        return {'summary': session.summary()}
+
+    async def _read_line(self, reader: asyncio.StreamReader) -> Optional[bytes]:
+        """Read one request line
+
+        A line over the stream limit is discarded as it arrives rather than
+        buffered, so it can't grow memory or be mistaken for the next request.
+
+        Returns:
+            The line, any bytes before end of stream, or None for a discarded
+            over-long line
+        """
+        try:
+            return await reader.readuntil(b'\n')
+        except asyncio.IncompleteReadError as e:
+            return e.partial
+        except asyncio.LimitOverrunError as e:
+            skip = e.consumed
+        while True:
+            await reader.readexactly(skip)
+            try:
+                await reader.readuntil(b'\n')
+                return None
+            except asyncio.IncompleteReadError:
+                return b''
+            except asyncio.LimitOverrunError as e:
+                skip = e.consumed
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve JSON-lines requests on one client connection"""
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                line = await self._read_line(reader)
+                if line is None:
+                    response = {'ok': False, 'error': f"Request line longer than {self.LINE_LIMIT} bytes"}
+                elif not line:
+                    break
+                elif not line.strip():
+                    continue
+                else:
+                    try:
+                        request = json.loads(line)
+                    except ValueError as e:
+                        response = {'ok': False, 'error': f"Invalid JSON: {e}"}
+                    else:
+                        response = await loop.run_in_executor(self.executor, self.handle, request)
+                writer.write(json.dumps(response).encode('utf-8') + b'\n')
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8765,
+                    socket_path: Optional[str] = None) -> asyncio.AbstractServer:
+        """Start listening on TCP or, if socket_path is given, a Unix socket
+
+        Returns:
+            The running asyncio server
+        """
+        if socket_path:
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+            return await asyncio.start_unix_server(self.handle_connection, path=socket_path, limit=self.LINE_LIMIT)
+        return await asyncio.start_server(self.handle_connection, host, port, limit=self.LINE_LIMIT)
+
+    def close(self) -> None:
+        """Wait for requests in flight and write any pending progress"""
+        self.executor.shutdown(wait=True)
+        if self.persist:
+            self.data_manager.flush_progress()
+
+
+def serve(config: Config, host: str = '127.0.0.1', port: int = 8765, socket_path: Optional[str] = None) -> None:
+    """Run the server until interrupted
+
+    Args:
+        config: Configuration object
+        host: TCP host to bind
+        port: TCP port to bind
+        socket_path: Unix socket path to bind instead of TCP
+    """
+    quiz_server = QuizServer(config)
+
+    async def run() -> None:
+        server = await quiz_server.start(host, port, socket_path)
+        print(f"QUIZR server listening on {socket_path or f'{host}:{port}'}")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        print("\nShutting down")
+    finally:
+        quiz_server.close()
@@ -0,0 +1,513 @@
+"""
+Quiz session state machine for QUIZR - drives a session without any terminal I/O
+"""
+
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+
+from .models import Question, Quiz, SessionStats
+from .storage import atomic_write_text
+
+if TYPE_CHECKING:
+    from .quiz_engine import QuizEngine
+
+
+# Configuration keys that affect which questions a session asks
+ORDER_SETTINGS = ['quick_mode_count', 'weak_error_weight', 'weak_staleness_days',
+                  'exam_question_count', 'exam_weights']
+
+# Bump when the checkpoint layout changes; older checkpoints are not resumed
+CHECKPOINT_VERSION = 1
+
+# Answers that end a session instead of being graded
+QUIT_COMMANDS = ['quit', 'abort', '!quit', '!abort', '#quit', '#abort']
+
+
+def is_quit_command(answer: str) -> bool:
+    """Check if an answer is a request to end the session"""
+    return answer.lower().strip() in QUIT_COMMANDS
+
+
+class ManualClock:
+    """A clock that returns whatever time it was last set to, for replays and tests"""
+
+    def __init__(self, now: datetime):
+        self.now = now
+
+    def __call__(self) -> datetime:
+        return self.now
+
+
+@dataclass
+class AnswerResult:
+    """Outcome of submitting an answer to a session"""
+    quiz_filepath: str
+    question_id: str
+    user_answer: str
+    correct_answer: str
+    is_correct: bool
+    remaining: int
+
+
+class BaseSession:
+    """Question queue, statistics and lifecycle shared by quiz sessions and exams
+
+    Subclasses decide what happens to an answer: QuizSession grades it right
+    away, ExamSession collects it for grading at the end.
+    """
+
+    def __init__(self, engine: 'QuizEngine', questions: List[Tuple[str, Question]], mode: str,
+                 exercises: Optional[List[str]] = None, persist: bool = True,
+                 started_at: Optional[datetime] = None):
+        """Initialize session
+
+        Args:
+            engine: Quiz engine used for grading and progress
+            questions: Ordered (quiz_filepath, question) pairs to ask
+            mode: Quiz mode the questions were selected with
+            exercises: Names of the quizzes the questions came from
+            persist: Whether answers are written to the progress file
+            started_at: Session start time (defaults to the engine's clock)
+        """
+        self.engine = engine
+        self.data_manager = engine.data_manager
+        self.questions = questions
+        self.position = 0
+        self.persist = persist
+        self.aborted = False
+        self.stats = SessionStats(mode=mode, start_time=started_at or engine.clock())
+        self.stats.exercises_completed.extend(exercises or [])
+        self.quiz_files: List[str] = []
+        self.recorded_answers: Optional[List[Dict[str, Any]]] = None
+        self.progress_snapshot: Dict[str, Dict[str, Any]] = {}
+        self.checkpoint_path: Optional[str] = None
+        self.target: Optional[str] = None
+
+    @classmethod
+    def from_quizzes(cls, engine: 'QuizEngine', quizzes: List[Quiz], mode: str, persist: bool = True,
+                     record: bool = False) -> 'BaseSession':
+        """Create a session over loaded quizzes, ordering questions by mode
+
+        Args:
+            engine: Quiz engine used for grading and progress
+            quizzes: Quizzes to draw questions from
+            mode: Quiz mode ('shuffle', 'quick', 'spaced', 'weak')
+            persist: Whether answers are written to the progress file
+            record: Whether to keep a transcript for get_transcript()
+
+        Returns:
+            New session
+        """
+        # Read the clock and progress before ordering, which may depend on both
+        started_at = engine.clock()
+        snapshot = {quiz.filepath: engine.data_manager.get_quiz_progress(quiz.filepath)
+                    for quiz in quizzes} if record else {}
+        questions = engine.get_questions_for_mode(quizzes, mode)
+
+        session = cls(engine, questions, mode, [quiz.name for quiz in quizzes], persist, started_at)
+        session.quiz_files = [quiz.filepath for quiz in quizzes]
+        if record:
+            session.recorded_answers = []
+            session.progress_snapshot = snapshot
+        return session
+
+    def checkpoint_to(self, path: str, target: str) -> None:
+        """Keep a checkpoint of the session for resuming it later
+
+        The checkpoint is rewritten whenever progress is written and when the
+        session is aborted, and removed when the session completes.
+
+        Args:
+            path: Checkpoint file
+            target: Quiz or folder name the session was started for
+        """
+        self.checkpoint_path = path
+        self.target = target
+
+    @property
+    def remaining(self) -> int:
+        """Number of questions not yet answered"""
+        return len(self.questions) - self.position
+
+    @property
+    def is_finished(self) -> bool:
+        """Whether the session has no more questions to ask"""
+        return self.aborted or self.position >= len(self.questions)
+
+    def next_question(self) -> Optional[Tuple[str, Question]]:
+        """Get the question waiting for an answer
+
+        Returns:
+            Tuple (quiz_filepath, question), or None if the session is finished
+        """
+        if self.is_finished:
+            return None
+        return self.questions[self.position]
+
+    def abort(self) -> None:
+        """End the session early"""
+        self.aborted = True
+
+    def finish(self) -> SessionStats:
+        """Finish the session and write any pending progress
+
+        Returns:
+            Session statistics
+        """
+        if self.persist:
+            self.data_manager.flush_progress()
+        if self.aborted and self.remaining:
+            self._write_checkpoint()
+        elif self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        self.stats.finish_session(self.engine.clock())
+        return self.stats
+
+    def get_checkpoint(self) -> Dict[str, Any]:
+        """Get the state needed to resume this session
+
+        The queue holds (quiz file index, question id) references to the
+        unanswered questions rather than the questions themselves.
+
+        Returns:
+            Checkpoint dictionary for save_checkpoint()
+        """
+        file_indexes: Dict[str, int] = {}
+        queue = []
+        for quiz_filepath, question in self.questions[self.position:]:
+            index = file_indexes.setdefault(quiz_filepath, len(file_indexes))
+            queue.append([index, question.id])
+        version, internal, gauss = self.engine.rng.getstate()
+
+        return {
+            'version': CHECKPOINT_VERSION,
+            'target': self.target,
+            'mode': self.stats.mode,
+            'seed': self.engine.seed,
+            'rng': [version, list(internal), gauss],
+            'saved_at': self.engine.clock().isoformat(),
+            'elapsed': (self.engine.clock() - self.stats.start_time).total_seconds(),
+            'attempted': self.stats.questions_attempted,
+            'correct': self.stats.questions_correct,
+            'exercises': self.stats.exercises_completed,
+            'quizzes': list(file_indexes),
+            'queue': queue,
+        }
+
+    def _write_checkpoint(self) -> None:
+        """Write the checkpoint, if this session keeps one"""
+        if not self.checkpoint_path:
+            return
+        try:
+            save_checkpoint(self.checkpoint_path, self.get_checkpoint())
+        except OSError as e:
+            print(f"Warning: could not write session checkpoint: {e}")
+
+    def get_transcript(self, target: str) -> Dict[str, Any]:
+        """Get everything needed to replay this session exactly
+
+        Only available for sessions created with record=True.
+
+        Args:
+            target: Quiz or folder name the session was started for
+
+        Returns:
+            Transcript dictionary for save_transcript()
+        """
+        return {
+            'target': target,
+            'mode': self.stats.mode,
+            'seed': self.engine.seed,
+            'started_at': self.stats.start_time.isoformat(),
+            'quizzes': self.quiz_files,
+            'progress': self.progress_snapshot,
+            'settings': {key: self.engine.config.get(key) for key in ORDER_SETTINGS},
+            'answers': self.recorded_answers or [],
+        }
+
+
+class QuizSession(BaseSession):
+    """A quiz session as a state machine
+
+    Call next_question() to get the pending question and submit() to grade an
+    answer to it. The session records progress through the engine's data
+    manager but never prints or reads input, so it can be driven by the CLI,
+    the server or a replayed transcript alike.
+    """
+
+    @classmethod
+    def from_checkpoint(cls, engine: 'QuizEngine', checkpoint: Dict[str, Any]) -> 'QuizSession':
+        """Recreate an unfinished session from its checkpoint
+
+        Only the quiz files still in the queue are loaded, and the queue is
+        taken as it was, so nothing is discovered or ordered again. The
+        engine's random generator is restored, so options drawn for
+        multiple-choice questions continue the original sequence. Questions
+        removed from their quiz since the checkpoint are skipped.
+
+        Args:
+            engine: Quiz engine used for grading and progress
+            checkpoint: Checkpoint loaded with load_checkpoint()
+
+        Returns:
+            New session positioned at the first unanswered question
+        """
+        data_manager = engine.data_manager
+        questions_by_file = {}
+        for quiz_file in checkpoint['quizzes']:
+            quiz = data_manager.load_quiz(quiz_file)
+            questions_by_file[quiz_file] = {str(qid): question for qid, question in quiz.questions.items()} if quiz else {}
+
+        questions = []
+        for file_index, question_id in checkpoint['queue']:
+            quiz_file = checkpoint['quizzes'][file_index]
+            question = questions_by_file[quiz_file].get(str(question_id))
+            if question is not None:
+                questions.append((quiz_file, question))
+
+        engine.seed = checkpoint['seed']
+        version, internal, gauss = checkpoint['rng']
+        engine.rng.setstate((version, tuple(internal), gauss))
+
+        started_at = engine.clock() - timedelta(seconds=checkpoint['elapsed'])
+        session = cls(engine, questions, checkpoint['mode'], checkpoint['exercises'], started_at=started_at)
+        session.stats.questions_attempted = checkpoint['attempted']
+        session.stats.questions_correct = checkpoint['correct']
+        session.quiz_files = list(checkpoint['quizzes'])
+        session.checkpoint_to(data_manager.config.get_checkpoint_file(), checkpoint['target'])
+        return session
+
+    def submit(self, answer: str) -> AnswerResult:
+        """Grade an answer to the current question and record progress
+
+        Args:
+            answer: User's answer
+
+        Returns:
+            Result of grading
+
+        Raises:
+            ValueError: If the session has no question waiting
+        """
+        current = self.next_question()
+        if current is None:
+            raise ValueError("Session has no questions left")
+
+        quiz_filepath, question = current
+        now = self.engine.clock()
+        is_correct = self.engine.check_answer(question, answer)
+        self.stats.record_answer(is_correct)
+        self.position += 1
+
+        if self.recorded_answers is not None:
+            self.recorded_answers.append({
+                'quiz': quiz_filepath,
+                'question': str(question.id),
+                'answer': answer,
+                'correct': is_correct,
+                'at': now.isoformat(),
+            })
+
+        progress = self.data_manager.get_question_progress(quiz_filepath, question.id)
+        progress.record_attempt(is_correct, now)
+        self.data_manager.update_question_progress(quiz_filepath, question.id, progress, question.fingerprint)
+        if self.persist and self.data_manager.save_progress(force=False):
+            self._write_checkpoint()
+
+        return AnswerResult(
+            quiz_filepath=quiz_filepath,
+            question_id=question.id,
+            user_answer=answer,
+            correct_answer=question.answer,
+            is_correct=is_correct,
+            remaining=self.remaining
+        )
+
+    def replay(self, answers: Iterable[str]) -> List[AnswerResult]:
+        """Feed recorded answers through the session at full speed
+
+        Quit commands in the transcript abort the session as they would
+        interactively.
+
+        Args:
+            answers: Recorded answers in the order they were given
+
+        Returns:
+            Results for each graded answer
+        """
+        results = []
+        for answer in answers:
+            if self.is_finished:
+                break
+            if is_quit_command(answer):
+                self.abort()
+                break
+            results.append(self.submit(answer))
+        return results
+
+
+class ExamSession(BaseSession):
+    """A timed exam: answers are collected without feedback and graded together at the end
+
+    write_answer() only fills in the answer sheet. grade() checks every answer in
+    one pass, records all progress at a single time and writes the progress
+    file once, so answering costs no grading or disk work while the clock
+    runs.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.time_limit: Optional[float] = None  # Seconds, or None for untimed
+        self.answer_sheet: List[str] = []
+        self.timed_out = False
+        self.results: Optional[List[AnswerResult]] = None
+
+    @property
+    def deadline(self) -> Optional[datetime]:
+        """Time by which answers must be submitted"""
+        if not self.time_limit:
+            return None
+        return self.stats.start_time + timedelta(seconds=self.time_limit)
+
+    def time_left(self) -> Optional[float]:
+        """Seconds left before the deadline, or None for untimed exams"""
+        deadline = self.deadline
+        if deadline is None:
+            return None
+        return max((deadline - self.engine.clock()).total_seconds(), 0.0)
+
+    @property
+    def is_finished(self) -> bool:
+        """Whether the exam is over: all answered, aborted or out of time"""
+        return super().is_finished or self.timed_out
+
+    def write_answer(self, answer: str) -> None:
+        """Put an answer to the current question on the answer sheet
+
+        An answer given after the deadline is discarded and ends the exam.
+
+        Args:
+            answer: User's answer
+
+        Raises:
+            ValueError: If the exam has no question waiting
+        """
+        if self.next_question() is None:
+            raise ValueError("Session has no questions left")
+        if self.time_left() == 0:
+            self.timed_out = True
+            return
+        self.answer_sheet.append(answer)
+        self.position += 1
+
+    def grade(self) -> List[AnswerResult]:
+        """Grade the answer sheet and commit all progress in one write
+
+        Unanswered questions are not graded and leave progress untouched.
+
+        Returns:
+            Result for each answered question, in exam order
+        """
+        if self.results is not None:
+            return self.results
+
+        now = self.engine.clock()
+        self.results = []
+        for number, ((quiz_filepath, question), answer) in enumerate(zip(self.questions, self.answer_sheet)):
+            is_correct = self.engine.check_answer(question, answer)
+            self.stats.record_answer(is_correct)
+
+            if self.recorded_answers is not None:
+                self.recorded_answers.append({
+                    'quiz': quiz_filepath,
+                    'question': str(question.id),
+                    'answer': answer,
+                    'correct': is_correct,
+                    'at': now.isoformat(),
+                })
+
+            progress = self.data_manager.get_question_progress(quiz_filepath, question.id)
+            progress.record_attempt(is_correct, now)
+            self.data_manager.update_question_progress(quiz_filepath, question.id, progress, question.fingerprint)
+            self.results.append(AnswerResult(
+                quiz_filepath=quiz_filepath,
+                question_id=question.id,
+                user_answer=answer,
+                correct_answer=question.answer,
+                is_correct=is_correct,
+                remaining=len(self.questions) - number - 1
+            ))
+
+        if self.persist and self.results:
+            self.data_manager.save_progress()
+        return self.results
+
+    def finish(self) -> SessionStats:
+        """Grade the exam if needed and finish the session
+
+        Returns:
+            Session statistics
+        """
+        self.grade()
+        return super().finish()
+
+    def replay(self, answers: Iterable[str]) -> List[AnswerResult]:
+        """Fill in the answer sheet from recorded answers and grade it
+
+        Args:
+            answers: Recorded answers in the order they were given
+
+        Returns:
+            Results for each graded answer
+        """
+        for answer in answers:
+            if self.is_finished:
+                break
+            if is_quit_command(answer):
+                self.abort()
+                break
+            self.write_answer(answer)
+        return self.grade()
+
+
+def save_transcript(path: str, transcript: Dict[str, Any]) -> None:
+    """Write a session transcript as JSON"""
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(transcript, file, indent=2)
+
+
+def load_transcript(path: str) -> Dict[str, Any]:
+    """Read a session transcript written by save_transcript()
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If the file is not a transcript
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        transcript = json.load(file)
+    missing = {'mode', 'seed', 'started_at', 'quizzes', 'progress', 'answers'} - set(transcript)
+    if missing:
+        raise ValueError(f"Not a session transcript, missing: {', '.join(sorted(missing))}")
+    return transcript
+
+
+def save_checkpoint(path: str, checkpoint: Dict[str, Any]) -> None:
+    """Write a session checkpoint atomically as compact JSON"""
+    atomic_write_text(path, json.dumps(checkpoint, separators=(',', ':')))
+
+
+def load_checkpoint(path: str) -> Dict[str, Any]:
+    """Read a session checkpoint written by save_checkpoint()
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If the file is not a checkpoint this version can resume
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        checkpoint = json.load(file)
+    if not isinstance(checkpoint, dict) or checkpoint.get('version') != CHECKPOINT_VERSION:
+        raise ValueError("Not a session checkpoint, or written by another version of QUIZR")
+    return checkpoint
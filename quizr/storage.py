@@ -0,0 +1,194 @@
+"""
+Crash-safe file storage for QUIZR - atomic writes and checksummed snapshots
+"""
+
+import hashlib
+import os
+import tempfile
+from typing import Any, Callable, List, Optional, Tuple
+
+
+# First line of every snapshot; it is a YAML comment so the file stays readable
+CHECKSUM_PREFIX = '# quizr-sha256: '
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot is truncated or fails its checksum"""
+
+
+def _checksum(body: str) -> str:
+    """Get the hex SHA-256 digest of a snapshot body"""
+    return hashlib.sha256(body.encode('utf-8')).hexdigest()
+
+
+def _fsync_directory(directory: str) -> None:
+    """Flush a directory entry so a rename survives a power loss"""
+    if not hasattr(os, 'O_DIRECTORY'):
+        return  # Not supported on Windows; os.replace is still atomic there
+    try:
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write_bytes(path: str, data: bytes) -> None:
+    """Write a file so readers see either the old or the new contents, never a mix
+
+    The data is written to a temporary file in the same directory, flushed
+    to disk and then renamed over the target.
+
+    Args:
+        path: Destination file path
+        data: Bytes to write
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    _fsync_directory(directory)
+
+
+def atomic_write_text(path: str, text: str) -> None:
+    """Atomically write UTF-8 text; see atomic_write_bytes()
+
+    Args:
+        path: Destination file path
+        text: Text to write
+    """
+    atomic_write_bytes(path, text.encode('utf-8'))
+
+
+def backup_paths(path: str, backups: int) -> List[str]:
+    """Get rotating backup paths for a snapshot, newest first
+
+    Args:
+        path: Primary snapshot path
+        backups: Number of backups kept
+
+    Returns:
+        List like ['progress.yaml.1', 'progress.yaml.2', ...]
+    """
+    return [f"{path}.{i}" for i in range(1, backups + 1)]
+
+
+def rotate_backups(path: str, backups: int) -> None:
+    """Shift existing snapshots down one slot, copying the primary into slot 1
+
+    Args:
+        path: Primary snapshot path
+        backups: Number of backups kept
+    """
+    if backups <= 0 or not os.path.exists(path):
+        return
+
+    slots = backup_paths(path, backups)
+    for older, newer in reversed(list(zip(slots[1:], slots[:-1]))):
+        if os.path.exists(newer):
+            os.replace(newer, older)
+
+    # Copy rather than move so the primary is never missing
+    with open(path, 'r', encoding='utf-8', newline='') as file:
+        atomic_write_text(slots[0], file.read())
+
+
+def write_snapshot(path: str, body: str) -> None:
+    """Atomically write a snapshot with a checksum header
+
+    Args:
+        path: Snapshot path
+        body: Snapshot contents
+    """
+    atomic_write_text(path, f"{CHECKSUM_PREFIX}{_checksum(body)}\n{body}")
+
+
+def read_snapshot(path: str) -> str:
+    """Read a snapshot and verify its checksum header
+
+    Files without a header (written before checksums existed, or edited by
+    hand with the header removed) are accepted as-is.
+
+    Args:
+        path: Snapshot path
+
+    Returns:
+        Snapshot body without the header
+
+    Raises:
+        OSError: If the file cannot be read
+        SnapshotError: If the checksum does not match the contents
+    """
+    with open(path, 'r', encoding='utf-8', newline='') as file:
+        text = file.read()
+
+    if not text.startswith(CHECKSUM_PREFIX):
+        return text
+
+    header, _, body = text.partition('\n')
+    expected = header[len(CHECKSUM_PREFIX):].strip()
+    if _checksum(body) != expected:
+        raise SnapshotError(f"checksum mismatch in {path}")
+    return body
+
+
+def verify_snapshot(path: str, chunk_size: int = 1 << 20) -> None:
+    """Check a snapshot's checksum header without holding the file in memory
+
+    Args:
+        path: Snapshot path
+        chunk_size: Bytes read at a time
+
+    Raises:
+        OSError: If the file cannot be read
+        SnapshotError: If the checksum does not match the contents
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        header = file.readline()
+        if not header.startswith(CHECKSUM_PREFIX.encode('utf-8')):
+            return
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+
+    expected = header[len(CHECKSUM_PREFIX):].decode('utf-8', 'replace').strip()
+    if digest.hexdigest() != expected:
+        raise SnapshotError(f"checksum mismatch in {path}")
+
+
+def load_newest_valid(path: str, backups: int, parse: Callable[[str], Any]) -> Tuple[Optional[Any], Optional[str], List[str]]:
+    """Load the newest snapshot that passes its checksum and parses
+
+    Args:
+        path: Primary snapshot path
+        backups: Number of backups to fall back on
+        parse: Function turning a snapshot body into data; may raise
+
+    Returns:
+        Tuple of (data, path it was loaded from, list of error messages for
+        snapshots that were skipped). Data and path are None if nothing valid
+        exists.
+    """
+    errors = []
+    for candidate in [path] + backup_paths(path, backups):
+        if not os.path.exists(candidate):
+            continue
+        try:
+            return parse(read_snapshot(candidate)), candidate, errors
+        except Exception as e:
+            errors.append(f"{candidate}: {e}")
+    return None, None, errors
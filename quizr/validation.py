@@ -0,0 +1,218 @@
+"""
+Quiz file validation for QUIZR - schema and lint checks for exercise YAML
+"""
+
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+from .config import Config
+from .data_manager import DataManager, format_load_error
+from .file_cache import load_json_cache, save_json_cache
+
+
+KNOWN_KEYS = {'prompt', 'answer', 'image', 'strict', 'alternatives'}
+
+
+@dataclass
+class ValidationIssue:
+    """A problem found in a quiz file"""
+    level: str  # 'error' or 'warning'
+    quiz_filepath: str
+    question_id: Optional[str]
+    message: str
+
+
+class DuplicateKeyError(yaml.constructor.ConstructorError):
+    """Raised when a YAML mapping repeats a key"""
+
+
+class StrictLoader(yaml.SafeLoader):
+    """Safe YAML loader that rejects duplicate keys instead of keeping the last one"""
+
+    def construct_mapping(self, node, deep=False):
+        seen = set()
+        for key_node, _ in node.value:
+            key = self.construct_object(key_node, deep=deep)
+            if key in seen:
+                raise DuplicateKeyError(None, None, f"duplicate question id '{key}'", key_node.start_mark)
+            seen.add(key)
+        return super().construct_mapping(node, deep)
+
+
+def check_quiz_text(text: str) -> Tuple[List[Tuple[str, Optional[str], str]], List[str]]:
+    """Check the contents of a quiz file
+
+    The result depends only on the text, so it can be cached by content hash.
+
+    Args:
+        text: YAML source of the quiz file
+
+    Returns:
+        Tuple of (issues as (level, question_id, message), referenced images)
+    """
+    issues = []
+    images = []
+
+    try:
+        data = yaml.load(text, Loader=StrictLoader)
+    except yaml.YAMLError as e:
+        return [('error', None, format_load_error(e))], images
+
+    if data is None:
+        return [('warning', None, "File has no questions")], images
+    if not isinstance(data, dict):
+        return [('error', None, "Top level must be a mapping of question ids to questions")], images
+
+    for question_id, question in data.items():
+        qid = str(question_id)
+        if not isinstance(question_id, str):
+            issues.append(('warning', qid, f"Question id should be a string, got {type(question_id).__name__}"))
+        if not isinstance(question, dict):
+            issues.append(('error', qid, "Question must be a mapping with 'prompt' and 'answer'"))
+            continue
+
+        for key in ('prompt', 'answer'):
+            value = question.get(key)
+            if value is None or (isinstance(value, str) and not value.strip()):
+                issues.append(('error', qid, f"Missing required '{key}'"))
+            elif not isinstance(value, str):
+                issues.append(('warning', qid, f"'{key}' should be a string, got {type(value).__name__}"))
+
+        if 'strict' in question and not isinstance(question['strict'], bool):
+            issues.append(('error', qid, f"'strict' must be true or false, got {question['strict']!r}"))
+
+        alternatives = question.get('alternatives')
+        if alternatives is not None and not isinstance(alternatives, (str, list)):
+            issues.append(('error', qid, "'alternatives' must be a list of answers"))
+        elif isinstance(alternatives, list) and not all(isinstance(item, str) for item in alternatives):
+            issues.append(('warning', qid, "'alternatives' should only contain strings"))
+
+        image = question.get('image')
+        if image is not None:
+            if not isinstance(image, str) or not image.strip():
+                issues.append(('error', qid, "'image' must be a file name"))
+            else:
+                images.append(image)
+
+        for key in sorted(set(question) - KNOWN_KEYS, key=str):
+            issues.append(('warning', qid, f"Unknown key '{key}'"))
+
+    return issues, images
+
+
+def _check_file(full_path: str) -> Tuple[str, List[Tuple[str, Optional[str], str]], List[str]]:
+    """Read and check one quiz file; runs in a worker process
+
+    Returns:
+        Tuple of (content hash, issues, referenced images)
+    """
+    try:
+        with open(full_path, 'rb') as file:
+            raw = file.read()
+    except OSError as e:
+        return '', [('error', None, f"Cannot read file: {e}")], []
+
+    digest = hashlib.sha256(raw).hexdigest()
+    try:
+        text = raw.decode('utf-8')
+    except UnicodeDecodeError as e:
+        return digest, [('error', None, f"File is not valid UTF-8: {e}")], []
+
+    issues, images = check_quiz_text(text)
+    return digest, issues, images
+
+
+class QuizValidator:
+    """Validates every quiz file, caching results by content hash"""
+
+    CACHE_FILE = 'check_cache_v2.json'  # Bump when the checks change so stale results are dropped
+
+    def __init__(self, config: Config, data_manager: DataManager):
+        """Initialize validator
+
+        Args:
+            config: Configuration object
+            data_manager: Data manager used to discover quizzes
+        """
+        self.config = config
+        self.data_manager = data_manager
+        self.cache_path = os.path.join(config.get_cache_dir(), self.CACHE_FILE)
+
+    def validate(self) -> Tuple[List[ValidationIssue], Dict[str, int]]:
+        """Validate all quiz files
+
+        Returns:
+            Tuple of (issues, counts of 'files', 'checked' and 'cached' files)
+        """
+        exercises_dir = self.config.get_exercises_dir()
+        quiz_files = [f for files in self.data_manager.discover_quizzes().values() for f in files]
+
+        # Hash every file first; only files with unseen contents are parsed
+        cache = load_json_cache(self.cache_path)
+        hashes = {}
+        for quiz_file in quiz_files:
+            try:
+                with open(os.path.join(exercises_dir, *quiz_file.split('/')), 'rb') as file:
+                    hashes[quiz_file] = hashlib.sha256(file.read()).hexdigest()
+            except OSError:
+                hashes[quiz_file] = ''
+
+        pending = [f for f in quiz_files if hashes[f] not in cache]
+        if pending:
+            full_paths = [os.path.join(exercises_dir, *f.split('/')) for f in pending]
+            workers = self.config.get('check_workers') or None
+            if len(pending) == 1:
+                results = [_check_file(full_paths[0])]
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    results = list(executor.map(_check_file, full_paths, chunksize=8))
+            for quiz_file, (digest, issues, images) in zip(pending, results):
+                hashes[quiz_file] = digest
+                if digest:
+                    cache[digest] = {'issues': issues, 'images': images}
+
+            # Forget results for contents no longer present
+            live = set(hashes.values())
+            cache = {digest: entry for digest, entry in cache.items() if digest in live}
+            save_json_cache(self.cache_path, cache)
+
+        manifest = self.data_manager.get_image_manifest()
+        all_issues = []
+        for quiz_file in quiz_files:
+            entry = cache.get(hashes[quiz_file], {'issues': [('error', None, "Cannot read file")], 'images': []})
+            for level, question_id, message in entry['issues']:
+                all_issues.append(ValidationIssue(level, quiz_file, question_id, message))
+            # Image existence depends on the images directory, so it comes from the image manifest
+            for image in manifest.missing(entry['images']):
+                all_issues.append(ValidationIssue('error', quiz_file, None, f"Image not found in images/: {image}"))
+
+        all_issues.extend(self._check_names(quiz_files))
+
+        counts = {'files': len(quiz_files), 'checked': len(pending), 'cached': len(quiz_files) - len(pending)}
+        return all_issues, counts
+
+    @staticmethod
+    def _check_names(quiz_files: List[str]) -> List[ValidationIssue]:
+        """Warn about quiz names that `start` cannot tell apart"""
+        by_name: Dict[str, List[str]] = {}
+        for quiz_file in quiz_files:
+            by_name.setdefault(os.path.splitext(os.path.basename(quiz_file))[0], []).append(quiz_file)
+
+        issues = []
+        for name, paths in sorted(by_name.items()):
+            if len(paths) > 1:
+                for path in paths:
+                    others = ', '.join(p for p in paths if p != path)
+                    issues.append(ValidationIssue('warning', path, None,
+                                                  f"Quiz name '{name}' is also used by {others}"))
+        return issues
+
+
+def issues_as_dicts(issues: List[ValidationIssue]) -> List[Dict[str, Any]]:
+    """Convert issues to plain dictionaries for JSON output"""
+    return [asdict(issue) for issue in issues]
@@ -0,0 +1,228 @@
+"""
+Test helpers: synthetic exercise trees and reference implementations of the data layer
+
+The reference functions are deliberately naive restatements of what the
+data layer promises. Tests check the real implementations against them, so
+a faster rewrite has to give the same answers.
+"""
+
+import itertools
+import os
+import random
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from quizr.config import Config
+from quizr.data_manager import DataManager
+from quizr.identity import normalize_text
+from quizr.models import QuestionProgress
+
+
+# Fixed clock for recorded attempts, so mastery doesn't depend on when tests run
+EPOCH = datetime(2024, 1, 1, 9, 0, 0)
+
+# A bank layout: quiz file path relative to Exercises/ -> number of questions
+Layout = Dict[str, int]
+
+# One answer: (quiz file, question index, correct, minutes after EPOCH)
+Attempt = Tuple[str, int, bool, int]
+
+
+def question_id(index: int) -> str:
+    """Get the id of the index-th question of a synthetic quiz"""
+    return f"q_{index + 1:03d}"
+
+
+def quiz_yaml(quiz_file: str, count: int) -> str:
+    """Render a synthetic quiz file with count questions"""
+    lines = []
+    for index in range(count):
+        lines.append(f"{question_id(index)}:")
+        lines.append(f"  prompt: \"Question {index + 1} of {quiz_file}\"")
+        lines.append(f"  answer: \"answer {index + 1}\"")
+    return '\n'.join(lines) + '\n'
+
+
+def write_bank(base_dir: str, layout: Layout) -> None:
+    """Write a synthetic exercise tree under base_dir/Exercises"""
+    exercises = os.path.join(base_dir, 'Exercises')
+    os.makedirs(exercises, exist_ok=True)
+    for quiz_file, count in layout.items():
+        path = os.path.join(exercises, *quiz_file.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(quiz_yaml(quiz_file, count))
+
+
+def write_progress_store(path: str, records: int, questions_per_file: int = 100, days: int = 30) -> None:
+    """Write a synthetic progress store the way save_progress lays it out, without building it in memory
+
+    Questions are spread over quiz files of questions_per_file questions,
+    ten files per folder. Every third answer history ends with a miss.
+    """
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write("__meta__:\n  total_questions_seen: {0}\n  total_reviews: {1}\n"
+                   "  first_use: '{2}'\n  last_session: '{3}'\n  daily_log:\n".format(
+                       records, 3 * records, EPOCH.date().isoformat(), EPOCH.isoformat()))
+        for day in range(days):
+            file.write(f"    '{(EPOCH + timedelta(days=day)).date().isoformat()}': {3 * records // days}\n")
+        file.write("  last_compaction: null\n")
+
+        for index in range(records):
+            file_index, question = divmod(index, questions_per_file)
+            folder, quiz = divmod(file_index, 10)
+            if question == 0:
+                if quiz == 0:
+                    file.write(f"Domain{folder}:\n")
+                file.write(f"  Quiz{folder}_{quiz}.yaml:\n")
+            seen = (EPOCH + timedelta(minutes=index)).isoformat()
+            last_correct = 'null' if index % 3 == 0 else f"'{seen}'"
+            file.write(f"    {question_id(question)}:\n      attempts: 3\n      correct: {2 - (index % 3 == 0)}\n"
+                       f"      last_review: '{seen}'\n      last_correct: {last_correct}\n")
+
+
+# Words in most prompts, for synthetic_questions()
+COMMON_WORDS = ['what', 'is', 'the', 'of', 'which', 'a', 'port', 'does', 'in', 'for']
+
+
+def synthetic_questions(count: int, seed: int = 0) -> Iterator[Tuple[str, str, str, str]]:
+    """Generate (quiz_filepath, question_id, prompt, answer) tuples with known duplicates
+
+    Prompts mix common words with words drawn from a Zipf-distributed
+    vocabulary, like real text. In every hundred questions, the 51st repeats
+    the 1st exactly and the 76th repeats it with one word added.
+    """
+    rng = random.Random(seed)
+    vocabulary = [f"term{rank}" for rank in range(20000)]
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+    originals: Dict[int, Tuple[str, str]] = {}
+    for index in range(count):
+        block, position = divmod(index, 100)
+        if position == 50:
+            prompt, answer = originals[block]
+        elif position == 75:
+            prompt, answer = originals[block]
+            prompt = f"{prompt} variant{index}"
+        else:
+            prompt = ' '.join(rng.sample(COMMON_WORDS, 3) + rng.choices(vocabulary, cum_weights=cum_weights, k=7))
+            answer = ' '.join(rng.choices(vocabulary, cum_weights=cum_weights, k=2))
+            if position == 0:
+                originals[block] = prompt, answer
+        yield f"Domain{block // 100}/Quiz{block}.yaml", question_id(position), prompt, answer
+
+
+def make_config(base_dir: str, **settings) -> Config:
+    """Create a configuration with only the defaults and the given settings"""
+    config = Config(base_dir, load_files=False)
+    for key, value in settings.items():
+        config.set(key, value)
+    return config
+
+
+def make_manager(base_dir: str, **settings) -> DataManager:
+    """Create a data manager over a bank written by write_bank()"""
+    return DataManager(make_config(base_dir, **settings))
+
+
+def apply_history(data_manager: DataManager, history: Iterable[Attempt]) -> None:
+    """Record a sequence of answers through the data manager"""
+    for quiz_file, index, correct, minutes in history:
+        progress = data_manager.get_question_progress(quiz_file, question_id(index))
+        progress.record_attempt(correct, EPOCH + timedelta(minutes=minutes))
+        data_manager.update_question_progress(quiz_file, question_id(index), progress)
+
+
+def reference_progress(history: Iterable[Attempt]) -> Dict[Tuple[str, str], QuestionProgress]:
+    """Replay answers into progress records without the data manager"""
+    records: Dict[Tuple[str, str], QuestionProgress] = {}
+    for quiz_file, index, correct, minutes in history:
+        at = (EPOCH + timedelta(minutes=minutes)).isoformat()
+        record = records.setdefault((quiz_file, question_id(index)), QuestionProgress())
+        record.attempts += 1
+        record.last_review = at
+        if correct:
+            record.correct += 1
+            record.last_correct = at
+    return records
+
+
+def folder_of(quiz_file: str) -> str:
+    """Get the folder key discover_quizzes() files a quiz under"""
+    return quiz_file.rsplit('/', 1)[0] if '/' in quiz_file else 'root'
+
+
+def stem_of(quiz_file: str) -> str:
+    """Get a quiz file's name without folder or extension"""
+    return quiz_file.rsplit('/', 1)[-1][:-len('.yaml')]
+
+
+def reference_find(layout: Layout, target: str) -> List[str]:
+    """Quiz files a target names: the quiz with that name, else every quiz below a folder of that name
+
+    Assumes quiz and folder names in the layout are unique.
+    """
+    if target.endswith('.yaml'):
+        target = target[:-len('.yaml')]
+    for quiz_file in layout:
+        if stem_of(quiz_file) == target:
+            return [quiz_file]
+    return [quiz_file for quiz_file in layout
+            if target in folder_of(quiz_file).split('/')]
+
+
+def reference_stats(data_manager: DataManager, quiz_files: Iterable[str],
+                    now: Optional[datetime] = None) -> Dict[str, float]:
+    """Statistics over quiz files by loading each quiz and reading every question's progress"""
+    questions = seen = attempts = correct = 0
+    mastery = 0.0
+    for quiz_file in quiz_files:
+        quiz = data_manager.load_quiz(quiz_file)
+        if quiz is None:
+            continue
+        for qid in quiz.questions:
+            progress = data_manager.get_question_progress(quiz_file, qid)
+            questions += 1
+            if progress.attempts > 0:
+                seen += 1
+                attempts += progress.attempts
+                correct += progress.correct
+            mastery += progress.get_mastery(now, data_manager.config.get('mastery_half_life_days', 30))
+    return {
+        'total_questions': questions,
+        'questions_seen': seen,
+        'correct_answers': correct,
+        'total_attempts': attempts,
+        'completion_rate': seen / questions * 100 if questions else 0.0,
+        'accuracy_rate': correct / attempts * 100 if attempts else 0.0,
+        'mastery': mastery / questions * 100 if questions else 0.0,
+    }
+
+
+def reference_duplicates(questions: List[Tuple[str, str, str, str]], threshold: float) -> Dict[str, set]:
+    """Duplicate report of find_duplicates() by comparing every pair of questions
+
+    Returns:
+        Dict with 'exact' (sets of questions sharing prompt and answer),
+        'conflicts' (prompts with several answers) and 'near' (pairs of
+        questions with different prompts, both similarities rounded)
+    """
+    def jaccard(a, b):
+        return len(a & b) / len(a | b) if a | b else 1.0
+
+    normalized = [((quiz_file, str(qid)), normalize_text(prompt), normalize_text(answer))
+                  for quiz_file, qid, prompt, answer in questions]
+    exact, conflicts, near = set(), set(), set()
+    for i, (ref_a, prompt_a, answer_a) in enumerate(normalized):
+        for ref_b, prompt_b, answer_b in normalized[i + 1:]:
+            pair = frozenset([ref_a, ref_b])
+            if prompt_a == prompt_b:
+                if answer_a == answer_b:
+                    exact.add(pair)
+                else:
+                    conflicts.add(prompt_a)
+                continue
+            prompt_similarity = jaccard(set(prompt_a.split()), set(prompt_b.split()))
+            answer_similarity = jaccard(set(answer_a.split()), set(answer_b.split()))
+            if prompt_similarity >= threshold and answer_similarity >= threshold:
+                near.add((pair, round(prompt_similarity, 3), round(answer_similarity, 3)))
+    return {'exact': exact, 'conflicts': conflicts, 'near': near}
@@ -0,0 +1,49 @@
+"""
+Shared fixtures for the QUIZR test suite
+"""
+
+import os
+
+import pytest
+
+from quizr import config as config_module
+
+
+SCALE_TIERS = ['small', 'medium', 'large']
+
+
+def pytest_addoption(parser):
+    parser.addoption('--scale', choices=SCALE_TIERS, default='small',
+                     help="Largest bank size the scale tests run at (default: small)")
+    parser.addoption('--scale-budget-factor', type=float, default=1.0,
+                     help="Multiply the scale tests' time budgets, e.g. 3 on a slow machine")
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', "scale(tier): performance gate run at a bank size tier")
+
+
+def pytest_collection_modifyitems(config, items):
+    largest = SCALE_TIERS.index(config.getoption('--scale'))
+    for item in items:
+        marker = item.get_closest_marker('scale')
+        if marker and SCALE_TIERS.index(marker.args[0]) > largest:
+            item.add_marker(pytest.mark.skip(reason=f"needs --scale {marker.args[0]}"))
+
+
+@pytest.fixture(autouse=True)
+def isolated_config(monkeypatch, tmp_path):
+    """Keep the user's configuration files, environment and --set overrides out of tests"""
+    for name in list(os.environ):
+        if name.startswith('QUIZR_'):
+            monkeypatch.delenv(name)
+    monkeypatch.setenv('QUIZR_SYSTEM_CONFIG', str(tmp_path / 'no-system-config.yaml'))
+    monkeypatch.setenv('QUIZR_CONFIG', str(tmp_path / 'no-user-config.yaml'))
+    monkeypatch.setattr(config_module, 'CLI_OVERRIDES', {})
+
+
+@pytest.fixture
+def budget(request):
+    """Scale a time budget in seconds by --scale-budget-factor"""
+    factor = request.config.getoption('--scale-budget-factor')
+    return lambda seconds: seconds * factor
@@ -0,0 +1,122 @@
+"""
+Tests for the shared bundle built in the cache directory
+"""
+
+import glob
+import os
+import threading
+import time
+
+import pytest
+
+from quizr import bundle
+from quizr.bundle import BundleError, ensure_shared_bundle
+
+from .bank import make_manager, write_bank
+
+
+LAYOUT = {'Network/Ports.yaml': 3, 'Basics.yaml': 2}
+
+
+@pytest.fixture
+def bank(tmp_path):
+    write_bank(str(tmp_path), LAYOUT)
+    return str(tmp_path)
+
+
+@pytest.fixture
+def packs(monkeypatch):
+    """Count bundle builds, slowing each one down so callers overlap"""
+    calls = []
+    pack_quizzes = bundle.pack_quizzes
+
+    def counting_pack(*args, **kwargs):
+        calls.append(args[1])
+        time.sleep(0.2)
+        return pack_quizzes(*args, **kwargs)
+
+    monkeypatch.setattr(bundle, 'pack_quizzes', counting_pack)
+    return calls
+
+
+def cache_files(manager):
+    return sorted(os.path.basename(path) for path in glob.glob(os.path.join(manager.config.get_cache_dir(), 'bank-*')))
+
+
+def test_concurrent_callers_build_once(bank, packs):
+    managers = [make_manager(bank) for _ in range(4)]
+    paths = [None] * len(managers)
+
+    def ensure(number):
+        paths[number] = ensure_shared_bundle(managers[number])
+
+    threads = [threading.Thread(target=ensure, args=(number,)) for number in range(len(managers))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(packs) == 1
+    assert len(set(paths)) == 1 and os.path.exists(paths[0])
+    assert cache_files(managers[0]) == [os.path.basename(paths[0])]  # Lock released
+
+
+def test_stale_lock_is_taken_over(bank, packs):
+    manager = make_manager(bank)
+    path = os.path.join(manager.config.get_cache_dir(), f"bank-{bundle.tree_signature(manager)[:16]}.qzb")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.lock', 'w', encoding='utf-8'):
+        pass
+    old = time.time() - bundle.SHARED_STALE_LOCK_SECONDS - 10
+    os.utime(path + '.lock', (old, old))
+
+    assert ensure_shared_bundle(manager) == path
+    assert packs == [path]
+    assert not os.path.exists(path + '.lock')
+
+
+def test_waiting_for_a_live_lock_times_out(bank, packs, monkeypatch):
+    monkeypatch.setattr(bundle, 'SHARED_WAIT_SECONDS', 0.2)
+    manager = make_manager(bank)
+    path = os.path.join(manager.config.get_cache_dir(), f"bank-{bundle.tree_signature(manager)[:16]}.qzb")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.lock', 'w', encoding='utf-8'):
+        pass
+
+    with pytest.raises(BundleError, match="Timed out waiting"):
+        ensure_shared_bundle(manager)
+    assert packs == []
+
+
+def test_a_changed_tree_rebuilds_and_removes_the_old_bank(bank, packs):
+    manager = make_manager(bank)
+    old_path = ensure_shared_bundle(manager)
+    assert ensure_shared_bundle(manager) == old_path and len(packs) == 1
+
+    with open(os.path.join(bank, 'Exercises', 'Basics.yaml'), 'a', encoding='utf-8') as file:
+        file.write("q_009:\n  prompt: \"Added\"\n  answer: \"added\"\n")
+    new_path = ensure_shared_bundle(manager)
+
+    assert new_path != old_path and len(packs) == 2
+    assert cache_files(manager) == [os.path.basename(new_path)]
+
+
+def test_a_failed_build_is_remembered_until_the_tree_changes(bank, packs):
+    manager = make_manager(bank)
+    broken = os.path.join(bank, 'Exercises', 'Network', 'Broken.yaml')
+    with open(broken, 'w', encoding='utf-8') as file:
+        file.write("q_001: [unclosed\n")
+
+    with pytest.raises(BundleError):
+        ensure_shared_bundle(manager)
+    failed = cache_files(manager)
+    assert len(failed) == 1 and failed[0].endswith('.qzb.failed')
+
+    with pytest.raises(BundleError):
+        ensure_shared_bundle(manager)
+    assert len(packs) == 1  # Gave up at once from the marker
+
+    os.remove(broken)
+    path = ensure_shared_bundle(manager)
+    assert len(packs) == 2
+    assert cache_files(manager) == [os.path.basename(path)]  # Marker cleaned up with the old tree
@@ -0,0 +1,97 @@
+"""
+Tests for multiple-choice options and the distractor index behind them
+"""
+
+import os
+import random
+
+import pytest
+
+from quizr.distractors import DistractorIndex, _NgramIndex
+from quizr.quiz_engine import QuizEngine
+
+from .bank import make_manager
+
+
+QUIZZES = {
+    'Network/Ports.yaml': ['22', '23', '25', '80', '443', '3389'],
+    'Network/Protocols.yaml': ['Secure Shell (SSH)', 'Telnet', 'Simple Mail Transfer Protocol',
+                               'Hypertext Transfer Protocol', 'Hypertext Transfer Protocol Secure'],
+    'Hardware/Cables.yaml': ['Cat 5e', 'Cat 6', 'Fiber'],
+}
+
+
+@pytest.fixture
+def manager(tmp_path):
+    for quiz_file, answers in QUIZZES.items():
+        path = tmp_path / 'Exercises' / quiz_file
+        os.makedirs(path.parent, exist_ok=True)
+        path.write_text(''.join(f"q_{index}:\n  prompt: \"Question {index}\"\n  answer: \"{answer}\"\n"
+                                for index, answer in enumerate(answers)), encoding='utf-8')
+    return make_manager(str(tmp_path))
+
+
+def question(manager, quiz_file, answer):
+    quiz = manager.load_quiz(quiz_file)
+    return next(q for q in quiz.questions.values() if q.answer == answer)
+
+
+def test_ngram_index_ranks_by_similarity():
+    forms = ['port22', 'port23', 'cable', 'port2200']
+    index = _NgramIndex(forms, forms)
+    ranked = index.ranked('port22', 3)
+    assert ranked[0] == 0
+    assert set(ranked) == {0, 1, 3}  # 'cable' shares no trigram
+
+
+def test_candidates_are_similar_answers_of_the_same_folder(manager):
+    index = DistractorIndex(manager.config, manager).build()
+    http = question(manager, 'Network/Protocols.yaml', 'Hypertext Transfer Protocol')
+    candidates = index.candidates('Network/Protocols.yaml', http, random.Random(1), limit=2)
+    assert candidates == ['Hypertext Transfer Protocol Secure', 'Simple Mail Transfer Protocol']
+
+
+def test_unrelated_candidates_prefer_the_same_shape(manager):
+    index = DistractorIndex(manager.config, manager).build()
+    ssh = question(manager, 'Network/Ports.yaml', '22')
+    candidates = index.candidates('Network/Ports.yaml', ssh, random.Random(1), limit=3)
+    assert sorted(candidates) == ['23', '25', '80']
+
+
+def test_small_folders_widen_to_the_bank(manager):
+    index = DistractorIndex(manager.config, manager).build()
+    cable = question(manager, 'Hardware/Cables.yaml', 'Cat 6')
+    candidates = index.candidates('Hardware/Cables.yaml', cable, random.Random(1), limit=5)
+    assert candidates[:2] == ['Cat 5e', 'Fiber']
+    assert len(candidates) == 5 and 'Cat 6' not in candidates
+
+
+def test_choices_hold_the_answer_once_and_no_other_correct_one(manager):
+    engine = QuizEngine(manager.config, manager, seed=5)
+    ssh = question(manager, 'Network/Protocols.yaml', 'Secure Shell (SSH)')
+    for _ in range(10):
+        choices = engine.get_choices('Network/Protocols.yaml', ssh)
+        assert len(choices) == 4 and len(set(choices)) == 4
+        assert [choice for choice in choices if engine.check_answer(ssh, choice)] == ['Secure Shell (SSH)']
+
+    first, second = (QuizEngine(manager.config, manager, seed=9) for _ in range(2))
+    assert first.get_choices('Network/Protocols.yaml', ssh) == second.get_choices('Network/Protocols.yaml', ssh)
+
+
+def test_answers_are_cached_until_a_quiz_changes(manager, monkeypatch):
+    DistractorIndex(manager.config, manager).build()
+    loaded = []
+    load_quiz = manager.load_quiz
+    monkeypatch.setattr(manager, 'load_quiz', lambda quiz_file: loaded.append(quiz_file) or load_quiz(quiz_file))
+
+    index = DistractorIndex(manager.config, manager).build()
+    assert loaded == []
+    assert sorted(index._folder_answers['Hardware']) == ['Cat 5e', 'Cat 6', 'Fiber']
+
+    path = os.path.join(manager.config.get_exercises_dir(), 'Hardware', 'Cables.yaml')
+    with open(path, 'a', encoding='utf-8') as file:
+        file.write("q_9:\n  prompt: \"Question 9\"\n  answer: \"Coaxial\"\n")
+    index = DistractorIndex(manager.config, manager).build()
+    assert loaded == ['Hardware/Cables.yaml']
+    assert 'Coaxial' in index._folder_answers['Hardware']
+
@@ -0,0 +1,81 @@
+"""
+Tests for progress compaction
+"""
+
+import os
+
+import pytest
+
+from quizr.bundle import pack_quizzes
+from quizr.models import QuestionProgress
+
+from .bank import apply_history, make_manager, question_id, quiz_yaml, write_bank
+
+
+LAYOUT = {'Network/Ports.yaml': 4, 'Hardware/Cables.yaml': 4}
+
+
+@pytest.fixture
+def bank(tmp_path):
+    write_bank(str(tmp_path), LAYOUT)
+    manager = make_manager(str(tmp_path))
+    apply_history(manager, [(quiz_file, index, True, index) for quiz_file in LAYOUT for index in range(4)])
+    manager.save_progress()
+    return str(tmp_path)
+
+
+def delete_question(base, quiz_file, count, deleted=1):
+    """Rewrite a quiz without its last questions"""
+    with open(os.path.join(base, 'Exercises', *quiz_file.split('/')), 'w', encoding='utf-8') as file:
+        file.write(quiz_yaml(quiz_file, count - deleted))
+
+
+def test_deleted_questions_are_compacted(bank):
+    delete_question(bank, 'Network/Ports.yaml', 4)
+    delete_question(bank, 'Hardware/Cables.yaml', 4)
+    counts = make_manager(bank).auto_compact_progress()
+    assert counts['dropped'] == 2
+    assert make_manager(bank).get_quiz_progress('Network/Ports.yaml').keys() == {question_id(i) for i in range(3)}
+
+
+def test_a_partial_bundle_keeps_other_progress(bank):
+    pack_quizzes(make_manager(bank), os.path.join(bank, 'network.qzb'), ['Network/Ports.yaml'])
+    manager = make_manager(bank, bundle_file='network.qzb')
+    assert manager.bundle is not None
+
+    assert manager.auto_compact_progress() is None
+    assert len(make_manager(bank).get_quiz_progress('Hardware/Cables.yaml')) == 4
+
+
+def test_a_broken_quiz_keeps_its_progress_with_a_shared_cache(bank, capsys):
+    with open(os.path.join(bank, 'Exercises', 'Hardware', 'Cables.yaml'), 'a', encoding='utf-8') as file:
+        file.write("q_009: [unclosed\n")
+    delete_question(bank, 'Network/Ports.yaml', 4, deleted=2)
+
+    manager = make_manager(bank, shared_cache=True)
+    assert manager.bundle is None  # No bundle without the broken quiz is published
+    assert "Hardware/Cables.yaml" in capsys.readouterr().out
+    cache_dir = manager.config.get_cache_dir()
+    assert [name for name in os.listdir(cache_dir) if name.endswith('.qzb')] == []
+
+    counts = manager.auto_compact_progress()
+    assert counts['dropped'] == 2
+    assert len(make_manager(bank).get_quiz_progress('Hardware/Cables.yaml')) == 4
+
+    make_manager(bank, shared_cache=True)
+    assert "Hardware/Cables.yaml" in capsys.readouterr().out  # Told again without rebuilding
+
+
+def test_unanswered_entries_do_not_trigger_compaction(bank):
+    manager = make_manager(bank)
+    write_bank(bank, {'Network/Ports.yaml': 40})
+    for index in range(4, 40):
+        # Empty entries, as older versions recorded for every question looked up
+        manager.update_question_progress('Network/Ports.yaml', question_id(index), QuestionProgress())
+    manager.save_progress()
+    delete_question(bank, 'Hardware/Cables.yaml', 4)
+
+    # 1 of 8 answers is orphaned, below the 20% threshold
+    manager = make_manager(bank)
+    assert manager.auto_compact_progress() is None
+    assert manager.global_progress.last_compaction is not None
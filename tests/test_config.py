@@ -0,0 +1,54 @@
+"""
+Tests for checking settings against the configuration schema
+"""
+
+import pytest
+
+from quizr.config import Config
+
+
+@pytest.mark.parametrize('value, expected', [
+    ({'Hardware': 25, 'Network': 12.5}, {'Hardware': 25, 'Network': 12.5}),
+    ("{Hardware: 25, Network: 0}", {'Hardware': 25, 'Network': 0}),
+    ({}, {}),
+])
+def test_valid_exam_weights(value, expected):
+    assert Config.validate('exam_weights', value) == expected
+
+
+@pytest.mark.parametrize('value, error', [
+    ({'Hardware': 'lots'}, "'Hardware' expected float, got str"),
+    ({'Hardware': None}, "'Hardware' expected float, got NoneType"),
+    ({'Hardware': True}, "'Hardware' expected float, got bool"),
+    ({'Hardware': -5}, "'Hardware' must be at least 0"),
+    ("{Hardware: [25]}", "'Hardware' expected float, got list"),
+])
+def test_invalid_exam_weights(value, error):
+    with pytest.raises(ValueError, match=error):
+        Config.validate('exam_weights', value)
+
+
+def test_invalid_exam_weights_fall_back_to_the_default(tmp_path, monkeypatch):
+    monkeypatch.setenv('QUIZR_EXAM_WEIGHTS', "{Hardware: lots}")
+    config = Config(str(tmp_path))
+    assert config.get('exam_weights') == {}
+    assert any('Hardware' in warning for warning in config.warnings)
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('true', True), ('Yes', True), ('on', True), ('1', True),
+    ('false', False), ('NO', False), ('off', False), ('0', False), (True, True),
+])
+def test_bool_settings_parse_common_spellings(value, expected):
+    assert Config.validate('multiple_choice', value) is expected
+
+
+@pytest.mark.parametrize('key, value', [
+    ('multiple_choice', 'maybe'),
+    ('multiple_choice', 1),
+    ('choice_count', True),
+    ('exam_time_limit', False),
+])
+def test_bools_and_numbers_are_not_interchangeable(key, value):
+    with pytest.raises(ValueError):
+        Config.validate(key, value)
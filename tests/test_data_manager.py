@@ -0,0 +1,243 @@
+"""
+Tests for DataManager path handling, progress navigation and statistics
+"""
+
+import os
+
+import pytest
+
+from quizr.bundle import pack_quizzes
+from quizr.identity import FingerprintIndex, fingerprint
+from quizr.names import load_names, suggest_names
+
+from .bank import (EPOCH, apply_history, make_manager, question_id, quiz_yaml, reference_find,
+                   reference_progress, reference_stats, write_bank)
+
+
+LAYOUT = {
+    'CompTIA/A+/Hardware.yaml': 3,
+    'CompTIA/A+/Gamma.yaml': 2,
+    'CompTIA/Network+/Ports.yaml': 4,
+    'CompTIA/Net/Subnetting.yaml': 2,
+    'Linux/Shell.yaml': 2,
+    'Only.yaml': 1,
+}
+
+
+@pytest.fixture
+def bank(tmp_path):
+    write_bank(str(tmp_path), LAYOUT)
+    return str(tmp_path)
+
+
+@pytest.fixture
+def manager(bank):
+    return make_manager(bank)
+
+
+def test_discover_lists_every_quiz_under_its_folder(manager):
+    quizzes = manager.discover_quizzes()
+    assert {quiz_file for files in quizzes.values() for quiz_file in files} == set(LAYOUT)
+    assert quizzes['root'] == ['Only.yaml']
+    assert sorted(quizzes['CompTIA/A+']) == ['CompTIA/A+/Gamma.yaml', 'CompTIA/A+/Hardware.yaml']
+
+
+def test_every_discovered_quiz_loads(manager):
+    for files in manager.discover_quizzes().values():
+        for quiz_file in files:
+            quiz = manager.load_quiz(quiz_file)
+            assert quiz is not None, manager.load_errors.get(quiz_file)
+            assert quiz.get_question_count() == LAYOUT[quiz_file]
+
+
+@pytest.mark.parametrize('target', ['Gamma', 'Only', 'Hardware', 'Gamma.yaml', 'Only.yaml'])
+def test_find_quiz_by_name(manager, target):
+    # Names ending in the letters of '.yaml' used to lose them
+    assert manager.find_quizzes_by_path(target) == reference_find(LAYOUT, target)
+
+
+@pytest.mark.parametrize('target', ['A+', 'CompTIA', 'Linux', 'Net', 'Network+'])
+def test_find_quizzes_by_folder(manager, target):
+    assert sorted(manager.find_quizzes_by_path(target)) == sorted(reference_find(LAYOUT, target))
+
+
+def test_folder_match_does_not_include_sibling_with_same_prefix(manager):
+    assert manager.find_quizzes_by_path('Net') == ['CompTIA/Net/Subnetting.yaml']
+
+
+def test_find_is_case_sensitive(manager):
+    assert manager.find_quizzes_by_path('linux') == []
+    # Callers suggest the right spelling from the name index
+    assert suggest_names(load_names(manager.config), 'linux') == ['Linux']
+
+
+def test_name_of_both_a_folder_and_a_quiz_is_ambiguous(tmp_path):
+    write_bank(str(tmp_path), {'Ports/Basics.yaml': 1, 'Other/Ports.yaml': 1})
+    with pytest.raises(ValueError, match="Ambiguous target"):
+        make_manager(str(tmp_path)).find_quizzes_by_path('Ports')
+
+
+def test_question_progress_round_trip(manager, bank):
+    history = [
+        ('CompTIA/A+/Hardware.yaml', 0, True, 0),
+        ('CompTIA/A+/Hardware.yaml', 0, False, 5),
+        ('CompTIA/A+/Hardware.yaml', 2, True, 10),
+        ('Only.yaml', 0, False, 15),
+    ]
+    apply_history(manager, history)
+    manager.save_progress()
+
+    reloaded = make_manager(bank)
+    for (quiz_file, qid), expected in reference_progress(history).items():
+        assert manager.get_question_progress(quiz_file, qid) == expected
+        assert reloaded.get_question_progress(quiz_file, qid) == expected
+
+
+def test_unanswered_question_has_empty_progress(manager):
+    progress = manager.get_question_progress('CompTIA/A+/Hardware.yaml', question_id(1))
+    assert progress.attempts == 0 and progress.last_review is None
+    assert manager.progress_data == {}  # Reading never creates entries
+
+
+def test_quiz_progress_is_a_copy(manager):
+    apply_history(manager, [('Linux/Shell.yaml', 0, True, 0)])
+    snapshot = manager.get_quiz_progress('Linux/Shell.yaml')
+    snapshot[question_id(0)]['attempts'] = 99
+    assert manager.get_question_progress('Linux/Shell.yaml', question_id(0)).attempts == 1
+
+
+def test_set_quiz_progress_restores_snapshot(manager):
+    apply_history(manager, [('Linux/Shell.yaml', 0, True, 0)])
+    snapshot = manager.get_quiz_progress('Linux/Shell.yaml')
+    apply_history(manager, [('Linux/Shell.yaml', 0, False, 1), ('Linux/Shell.yaml', 1, True, 2)])
+    manager.set_quiz_progress('Linux/Shell.yaml', snapshot)
+    assert manager.get_quiz_progress('Linux/Shell.yaml') == snapshot
+
+
+def test_global_stats_match_reference(manager):
+    apply_history(manager, [
+        ('CompTIA/A+/Hardware.yaml', 0, True, 0),
+        ('CompTIA/Network+/Ports.yaml', 3, False, 1),
+        ('Only.yaml', 0, True, 2),
+    ])
+    stats = manager.calculate_global_stats()
+    expected = reference_stats(manager, LAYOUT, now=manager.get_mastery_tree().now)
+    assert stats == pytest.approx(expected)
+    assert stats['total_questions'] == sum(LAYOUT.values())
+    assert stats['questions_seen'] == 3
+
+
+def test_folder_stats_follow_recorded_answers(manager):
+    tree = manager.get_mastery_tree()  # Built before the answers, then kept up to date
+    apply_history(manager, [('CompTIA/A+/Gamma.yaml', 1, True, 0), ('CompTIA/A+/Gamma.yaml', 1, True, 1)])
+    stats = manager.calculate_folder_stats('A+')
+    assert stats == pytest.approx(reference_stats(manager, reference_find(LAYOUT, 'A+'), now=tree.now))
+    assert stats['total_attempts'] == 2
+
+
+def test_bundle_matches_yaml_tree(manager, bank, tmp_path):
+    bundle_file = str(tmp_path / 'bank.qzb')
+    pack_quizzes(manager, bundle_file)
+    packed = make_manager(bank, bundle_file=bundle_file)
+    assert packed.bundle is not None
+
+    # Directory listing order is up to the filesystem
+    def listing(data_manager):
+        return {folder: sorted(files) for folder, files in data_manager.discover_quizzes().items()}
+    assert listing(packed) == listing(manager)
+    for quiz_file in LAYOUT:
+        assert packed.load_quiz(quiz_file) == manager.load_quiz(quiz_file)
+    assert sorted(packed.find_quizzes_by_path('CompTIA')) == sorted(manager.find_quizzes_by_path('CompTIA'))
+
+
+def test_progress_timestamps_use_recorded_clock(manager):
+    apply_history(manager, [('Linux/Shell.yaml', 1, True, 30)])
+    progress = manager.get_question_progress('Linux/Shell.yaml', question_id(1))
+    assert progress.last_review == progress.last_correct == EPOCH.replace(minute=30).isoformat()
+
+
+def answer_and_save(bank, history):
+    """Record answers in a session that loaded the quizzes, so the progress carries fingerprints"""
+    manager = make_manager(bank)
+    apply_history(manager, history)
+    for quiz_file in {quiz_file for quiz_file, _, _, _ in history}:
+        manager.load_quiz(quiz_file)
+    manager.save_progress()
+    return reference_progress(history)
+
+
+def move_quiz(bank, old, new, text=None):
+    """Move a quiz file, optionally rewriting it"""
+    old_path = os.path.join(bank, 'Exercises', *old.split('/'))
+    new_path = os.path.join(bank, 'Exercises', *new.split('/'))
+    if text is None:
+        with open(old_path, 'r', encoding='utf-8') as file:
+            text = file.read()
+    os.remove(old_path)
+    os.makedirs(os.path.dirname(new_path), exist_ok=True)
+    with open(new_path, 'w', encoding='utf-8') as file:
+        file.write(text)
+
+
+def attempts_by_id(manager, quiz_file):
+    manager.load_quiz(quiz_file)
+    return {qid: progress['attempts'] for qid, progress in manager.get_quiz_progress(quiz_file).items()
+            if progress.get('attempts')}
+
+
+@pytest.mark.parametrize('new', ['Linux/Bash.yaml', 'CompTIA/A+/Shell.yaml'])
+def test_progress_follows_a_renamed_or_moved_quiz(bank, new):
+    expected = answer_and_save(bank, [('Linux/Shell.yaml', 0, True, 0), ('Linux/Shell.yaml', 1, False, 5),
+                                      ('Linux/Shell.yaml', 1, True, 10)])
+    move_quiz(bank, 'Linux/Shell.yaml', new)
+
+    manager = make_manager(bank)
+    manager.load_quiz(new)
+    for (_, qid), progress in expected.items():
+        assert manager.get_question_progress(new, qid) == progress
+    assert manager.get_quiz_progress('Linux/Shell.yaml') == {}
+
+
+def test_progress_follows_renumbered_questions(bank):
+    answer_and_save(bank, [('CompTIA/A+/Gamma.yaml', 0, True, 0),
+                           ('CompTIA/A+/Gamma.yaml', 1, False, 5), ('CompTIA/A+/Gamma.yaml', 1, False, 6)])
+    text = quiz_yaml('CompTIA/A+/Gamma.yaml', 2)
+    swapped = text.replace('q_001:', 'tmp:').replace('q_002:', 'q_001:').replace('tmp:', 'q_002:')
+    move_quiz(bank, 'CompTIA/A+/Gamma.yaml', 'CompTIA/A+/Gamma.yaml', swapped)
+
+    manager = make_manager(bank)
+    assert attempts_by_id(manager, 'CompTIA/A+/Gamma.yaml') == {'q_001': 2, 'q_002': 1}
+
+
+def test_an_edited_prompt_does_not_take_the_old_progress(bank):
+    answer_and_save(bank, [('Linux/Shell.yaml', 0, True, 0), ('Linux/Shell.yaml', 1, True, 5)])
+    text = quiz_yaml('Linux/Shell.yaml', 2).replace('Question 1 of', 'Rewritten question 1 of')
+    move_quiz(bank, 'Linux/Shell.yaml', 'Linux/Bash.yaml', text)
+
+    manager = make_manager(bank)
+    assert attempts_by_id(manager, 'Linux/Bash.yaml') == {'q_002': 1}
+    assert manager.get_question_progress('Linux/Shell.yaml', question_id(0)).attempts == 1  # Left as an orphan
+
+
+def test_identical_questions_do_not_share_one_record(bank):
+    answer_and_save(bank, [('Only.yaml', 0, True, 0), ('Only.yaml', 0, True, 5)])
+    text = quiz_yaml('Only.yaml', 1)
+    move_quiz(bank, 'Only.yaml', 'Twice.yaml', text + text.replace('q_001:', 'q_002:'))
+
+    manager = make_manager(bank)
+    assert list(attempts_by_id(manager, 'Twice.yaml').values()) == [2]
+    assert manager.get_quiz_progress('Only.yaml') == {}
+
+
+def test_fingerprint_index_locates_stamped_progress():
+    assert fingerprint('What is  SSH?', 'Port 22') == fingerprint('what is ssh', 'port 22.')
+    assert fingerprint('What is SSH?', 'Port 22') != fingerprint('What is SSH?', 'Port 23')
+
+    stamp = fingerprint('What is SSH?', 'Port 22')
+    index = FingerprintIndex.build({
+        'Network': {'Ports.yaml': {'q_001': {'attempts': 1, 'fingerprint': stamp}, 'q_002': {'attempts': 1}}},
+        '__meta__': {'total_reviews': 1},
+    })
+    assert len(index) == 1
+    assert index.get(stamp) == ('Network/Ports.yaml', 'q_001')
+    assert index.get(fingerprint('What is Telnet?', 'Port 23')) is None
@@ -0,0 +1,69 @@
+"""
+Tests for duplicate detection against a brute-force reference
+"""
+
+import itertools
+import random
+
+import pytest
+
+from quizr.dedupe import find_duplicates, similar_pairs
+
+from .bank import reference_duplicates, synthetic_questions
+
+
+VOCABULARY = [f"w{number}" for number in range(12)]
+
+
+def random_questions(count, seed):
+    """Short prompts over a small vocabulary, so many pairs sit near any threshold
+
+    Every tenth question repeats the one nine before it, with the same answer
+    or, every other time, a different one.
+    """
+    rng = random.Random(seed)
+    questions = []
+    for index in range(count):
+        if index % 10 == 9:
+            prompt, answer = questions[index - 9][2].upper() + '?', questions[index - 9][3]
+            if index % 20 == 19:
+                answer += ' w11'
+        else:
+            prompt = ' '.join(rng.sample(VOCABULARY, rng.randint(2, 8)))
+            answer = ' '.join(rng.sample(VOCABULARY[:4], rng.randint(1, 3)))
+        questions.append((f"Quiz{index % 7}.yaml", f"q_{index}", prompt, answer))
+    return questions
+
+
+def report_as_sets(report):
+    """Turn a dedupe report into the shape of reference_duplicates()"""
+    def key(ref):
+        return ref['quiz'], ref['id']
+
+    exact = set()
+    for group in report['exact']:
+        exact.update(frozenset(pair) for pair in itertools.combinations(map(key, group['questions']), 2))
+    near = {(frozenset([key(pair['a']), key(pair['b'])]), pair['prompt_similarity'], pair['answer_similarity'])
+            for pair in report['near']}
+    assert len(near) == len(report['near'])  # No pair reported twice
+    return {'exact': exact, 'conflicts': {conflict['prompt'] for conflict in report['conflicts']}, 'near': near}
+
+
+@pytest.mark.parametrize('threshold', [0.5, 0.6, 2 / 3, 0.75, 0.8, 1.0])
+def test_report_matches_brute_force(threshold):
+    questions = random_questions(200, seed=4)
+    expected = reference_duplicates(questions, threshold)
+    assert expected['near'] and expected['exact'] and expected['conflicts']
+    assert report_as_sets(find_duplicates(questions, threshold)) == expected
+
+
+def test_report_matches_brute_force_on_realistic_prompts():
+    questions = list(synthetic_questions(500, seed=2))
+    assert report_as_sets(find_duplicates(questions)) == reference_duplicates(questions, 0.8)
+
+
+def test_similarity_exactly_at_the_threshold_counts():
+    sets = [frozenset('abcd'), frozenset('abcde'), frozenset('abc'), frozenset('abcdefghij'), frozenset('abcdefgh')]
+    # 4/5 and 8/10 are on the threshold, 3/4 and 4/8 fall short
+    assert sorted((i, j) for i, j, _ in similar_pairs(sets, 0.8)) == [(0, 1), (3, 4)]
+    assert sorted((i, j) for i, j, _ in similar_pairs(sets, 0.75)) == [(0, 1), (0, 2), (3, 4)]
@@ -0,0 +1,58 @@
+"""
+Tests for exam sessions and their command-line options
+"""
+
+import pytest
+from click.testing import CliRunner
+
+from quizr.cli import main
+from quizr.quiz_engine import QuizEngine
+from quizr.server import QuizServer
+from quizr.session import ExamSession
+
+from .bank import make_manager, write_bank
+from .test_server import exchange
+
+
+LAYOUT = {'Network/Ports.yaml': 3, 'Basics.yaml': 2}
+
+
+@pytest.fixture
+def bank(tmp_path):
+    write_bank(str(tmp_path), LAYOUT)
+    return str(tmp_path)
+
+
+def attempts(manager, session):
+    return [manager.get_question_progress(quiz_file, question.id).attempts for quiz_file, question in session.questions]
+
+
+def test_answers_are_graded_together(bank):
+    manager = make_manager(bank, progress_save_interval=0, exam_question_count=5)
+    engine = QuizEngine(manager.config, manager, seed=3)
+    session = ExamSession.from_quizzes(engine, [manager.load_quiz(quiz_file) for quiz_file in LAYOUT], 'exam')
+
+    for _ in range(3):
+        assert session.write_answer('answer 1') is None
+    assert attempts(manager, session) == [0] * 5  # Nothing graded while the exam runs
+
+    results = session.grade()
+    assert len(results) == 3 and session.remaining == 2
+    assert attempts(manager, session) == [1, 1, 1, 0, 0]
+    assert session.grade() is results
+
+
+def test_server_refuses_exams(bank):
+    quiz_server = QuizServer(make_manager(bank).config)
+    try:
+        response, = exchange(quiz_server, ['{"op": "start", "target": "Ports", "mode": "exam"}'])
+    finally:
+        quiz_server.close()
+    assert response == {'ok': False, 'error': "Exam mode is not available over the server"}
+
+
+@pytest.mark.parametrize('option, value', [('--count', '0'), ('--count', '-5'), ('--minutes', '-1')])
+def test_invalid_exam_options_are_rejected(option, value):
+    result = CliRunner().invoke(main, ['start', 'Ports', 'exam', option, value])
+    assert result.exit_code == 2
+    assert option in result.output and 'must be at least' in result.output
@@ -0,0 +1,101 @@
+"""
+Tests for the image manifest and image checks
+"""
+
+import os
+
+import pytest
+
+from quizr.images import ImageManifest
+from quizr.quiz_engine import QuizEngine
+from quizr.validation import QuizValidator
+
+from .bank import make_manager
+
+
+QUIZ = """\
+q_001:
+  prompt: "Which port?"
+  answer: "22"
+  image: "ports/ssh.png"
+q_002:
+  prompt: "Which cable?"
+  answer: "Cat6"
+  image: "cable.png"
+"""
+
+
+@pytest.fixture
+def base(tmp_path):
+    os.makedirs(tmp_path / 'Exercises' / 'Network')
+    (tmp_path / 'Exercises' / 'Network' / 'Ports.yaml').write_text(QUIZ, encoding='utf-8')
+    os.makedirs(tmp_path / 'images' / 'ports')
+    (tmp_path / 'images' / 'ports' / 'ssh.png').write_bytes(b'ssh image')
+    return str(tmp_path)
+
+
+def test_manifest_records_every_image(base):
+    manifest = make_manager(base).get_image_manifest()
+    assert sorted(manifest.entries) == ['ports/ssh.png']
+    entry = manifest.get('ports\\ssh.png')
+    assert entry.size == len(b'ssh image')
+    assert len(entry.sha256) == 64
+    assert manifest.missing(['ports/ssh.png', 'cable.png', 'cable.png']) == ['cable.png']
+
+
+def test_unchanged_directories_are_not_rescanned(base, monkeypatch):
+    make_manager(base).get_image_manifest()
+
+    monkeypatch.setattr(os, 'scandir', lambda path: pytest.fail(f"rescanned {path}"))
+    manifest = make_manager(base).get_image_manifest()
+    assert 'ports/ssh.png' in manifest
+
+
+def test_changes_are_picked_up_incrementally(base, monkeypatch):
+    manager = make_manager(base)
+    before = manager.get_image_manifest().get('ports/ssh.png')
+
+    with open(os.path.join(base, 'images', 'cable.png'), 'wb') as file:
+        file.write(b'cable image')
+    os.utime(os.path.join(base, 'images'), ns=(1, 1))  # Coarse clocks may not move on their own
+
+    scanned = []
+    scandir = os.scandir
+    monkeypatch.setattr(os, 'scandir', lambda path: scanned.append(path) or scandir(path))
+    manifest = manager.get_image_manifest()
+
+    assert scanned == [os.path.join(base, 'images')]  # images/ports is unchanged
+    assert sorted(manifest.entries) == ['cable.png', 'ports/ssh.png']
+    assert manifest.get('ports/ssh.png') is before
+
+
+def test_check_reports_missing_images_from_the_manifest(base):
+    manager = make_manager(base)
+    issues, _ = QuizValidator(manager.config, manager).validate()
+    assert [issue.message for issue in issues] == ["Image not found in images/: cable.png"]
+
+
+def test_session_warns_about_missing_images_up_front(base, capsys):
+    manager = make_manager(base)
+    engine = QuizEngine(manager.config, manager)
+    quiz = manager.load_quiz('Network/Ports.yaml')
+    engine.warn_missing_images([(quiz.filepath, question) for question in quiz.questions.values()])
+    assert "1 image(s) missing from images/: cable.png" in capsys.readouterr().out
+
+    assert not engine.show_image('cable.png')
+
+
+def test_previews_are_cached_under_images(base):
+    Image = pytest.importorskip('PIL.Image')
+    Image.new('RGB', (8, 4), (255, 0, 0)).save(os.path.join(base, 'images', 'red.png'))
+
+    manager = make_manager(base, image_previews=True, image_preview_width=8)
+    manifest = manager.get_image_manifest()
+    preview = manifest.read_preview('red.png')
+    assert preview.count('\n') == 1  # Two rows of half blocks
+    assert '\x1b[38;2;255;0;0m' in preview
+    assert manifest.read_preview('ports/ssh.png') is None  # Not an image Pillow can read
+
+    os.remove(os.path.join(base, 'images', 'red.png'))
+    ImageManifest.load(manager.config)
+    assert os.listdir(os.path.join(base, 'images', '.previews')) == []
@@ -0,0 +1,66 @@
+"""
+Tests for importing and exporting cards
+"""
+
+import json
+import os
+
+import pytest
+
+from quizr import interchange
+from quizr.interchange import export_cards, import_cards
+
+from .bank import make_config, make_manager
+
+
+CARDS = [
+    {'folder': 'Network', 'quiz': 'Ports', 'prompt': 'Port for SSH?', 'answer': '22'},
+    {'folder': 'Network', 'quiz': 'Ports', 'prompt': 'Port for HTTPS?', 'answer': '443', 'alternatives': ['https']},
+    {'quiz': 'Basics', 'prompt': 'What does CPU stand for?', 'answer': 'Central Processing Unit', 'strict': True},
+]
+
+
+@pytest.fixture
+def base(tmp_path):
+    source = tmp_path / 'cards.json'
+    source.write_text(json.dumps(CARDS), encoding='utf-8')
+    counts = import_cards(make_config(str(tmp_path)), str(source), folder='')
+    assert counts['imported'] == 3
+    return str(tmp_path)
+
+
+def quiz_files(manager):
+    return sorted(quiz_file for files in manager.discover_quizzes().values() for quiz_file in files)
+
+
+def test_export_round_trips(base, tmp_path):
+    manager = make_manager(base)
+    assert quiz_files(manager) == ['Basics.yaml', 'Network/Ports.yaml']
+    output = str(tmp_path / 'export.jsonl')
+    assert export_cards(manager, output, quiz_files(manager)) == 3
+
+    with open(output, 'r', encoding='utf-8') as file:
+        exported = [json.loads(line) for line in file]
+    assert [(card['folder'], card['quiz'], card['prompt'], card['answer']) for card in exported] == [
+        ('', 'Basics', 'What does CPU stand for?', 'Central Processing Unit'),
+        ('Network', 'Ports', 'Port for SSH?', '22'),
+        ('Network', 'Ports', 'Port for HTTPS?', '443'),
+    ]
+    assert exported[0]['strict'] is True
+    assert exported[2]['alternatives'] == ['https']
+
+
+def test_failed_export_leaves_no_temporary_file(base, tmp_path, monkeypatch):
+    iter_cards = interchange.iter_cards
+
+    def broken(data_manager, quiz_files):
+        yield from iter_cards(data_manager, quiz_files[:1])
+        raise OSError("disk full")
+
+    manager = make_manager(base)
+    output = str(tmp_path / 'export.csv')
+    monkeypatch.setattr(interchange, 'iter_cards', broken)
+    with pytest.raises(OSError):
+        export_cards(manager, output, quiz_files(manager))
+    assert not os.path.exists(output)
+    assert not os.path.exists(output + '.tmp')
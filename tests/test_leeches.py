@@ -0,0 +1,125 @@
+"""
+Tests for the leech index and the leech drill
+"""
+
+import random
+
+import pytest
+
+from quizr.compaction import iter_entries
+from quizr.models import QuestionProgress
+from quizr.quiz_engine import QuizEngine
+from quizr.session import QuizSession
+
+from .bank import EPOCH, apply_history, make_manager, question_id, write_bank
+
+
+LAYOUT = {f"Domain{d}/Quiz{d}_{t}.yaml": 20 for d in range(3) for t in range(4)}
+
+
+@pytest.fixture
+def manager(tmp_path):
+    write_bank(str(tmp_path), LAYOUT)
+    return make_manager(str(tmp_path), leech_min_attempts=3, leech_max_accuracy=0.5)
+
+
+def brute_force_scores(data_manager):
+    index = data_manager.get_leech_index()
+    scores = {}
+    for quiz_file, qid, progress in iter_entries(data_manager.progress_data):
+        score = index.score(progress['attempts'], progress['correct'],
+                            progress.get('last_review'), progress.get('last_correct'))
+        if score is not None:
+            scores[(quiz_file, qid)] = score
+    return scores
+
+
+def test_question_becomes_and_stops_being_a_leech(manager):
+    quiz_file = 'Domain0/Quiz0_0.yaml'
+    index = manager.get_leech_index()
+
+    apply_history(manager, [(quiz_file, 0, False, 0), (quiz_file, 0, False, 1)])
+    assert index.get(quiz_file, question_id(0)) is None  # Too few attempts
+
+    apply_history(manager, [(quiz_file, 0, False, 2)])
+    assert index.get(quiz_file, question_id(0)) == 3 + 2  # Three misses, the latest one recent
+
+    apply_history(manager, [(quiz_file, 0, True, 3)] * 3)
+    assert index.get(quiz_file, question_id(0)) is None  # Half right now
+    assert index.top(5) == []
+
+
+def test_index_matches_brute_force_after_random_answers(manager):
+    rng = random.Random(3)
+    manager.get_leech_index()  # Built before the answers, then kept up to date
+    for minute in range(3000):
+        quiz_file = rng.choice(sorted(LAYOUT))
+        apply_history(manager, [(quiz_file, rng.randrange(20), rng.random() < 0.45, minute)])
+
+    expected = brute_force_scores(manager)
+    top = manager.get_leech_index().top(len(expected) + 10)
+    assert {(quiz_file, qid): score for quiz_file, qid, score in top} == expected
+    assert [score for _, _, score in top] == sorted(expected.values(), reverse=True)
+
+    rebuilt = make_manager(manager.config.base_dir, leech_min_attempts=3, leech_max_accuracy=0.5)
+    rebuilt.progress_data = manager.progress_data
+    assert sorted(score for _, _, score in rebuilt.get_leech_index().top(10)) == sorted(
+        score for _, _, score in top[:10])
+
+
+def test_top_can_be_limited_to_quiz_files(manager):
+    history = [(quiz_file, 1, False, minute) for minute, quiz_file in enumerate(sorted(LAYOUT) * 3)]
+    apply_history(manager, history)
+    domain = {quiz_file for quiz_file in LAYOUT if quiz_file.startswith('Domain2/')}
+    top = manager.get_leech_index().top(10, domain)
+    assert {quiz_file for quiz_file, _, _ in top} == domain
+
+
+def test_leech_session_loads_only_files_with_leeches(manager):
+    worst = 'Domain1/Quiz1_2.yaml'
+    apply_history(manager, [(worst, 4, False, minute) for minute in range(5)])
+    apply_history(manager, [('Domain2/Quiz2_0.yaml', 7, False, minute) for minute in range(3)])
+
+    loaded = []
+    load_quiz = manager.load_quiz
+    def counting_load(quiz_file):
+        loaded.append(quiz_file)
+        return load_quiz(quiz_file)
+    manager.load_quiz = counting_load
+
+    engine = QuizEngine(manager.config, manager)
+    quizzes = engine.load_leech_quizzes([quiz_file for files in manager.discover_quizzes().values()
+                                         for quiz_file in files])
+    session = QuizSession.from_quizzes(engine, quizzes, 'leeches')
+
+    assert sorted(loaded) == ['Domain1/Quiz1_2.yaml', 'Domain2/Quiz2_0.yaml']
+    assert [(quiz_file, question.id) for quiz_file, question in session.questions] == [
+        (worst, question_id(4)), ('Domain2/Quiz2_0.yaml', question_id(7))]
+
+
+def test_progress_of_deleted_questions_is_skipped(manager):
+    quiz_file = 'Domain0/Quiz0_1.yaml'
+    progress = QuestionProgress()
+    for _ in range(6):
+        progress.record_attempt(False, EPOCH)
+    manager.update_question_progress(quiz_file, 'q_999', progress)  # No such question
+    apply_history(manager, [(quiz_file, 2, False, minute) for minute in range(3)])
+
+    engine = QuizEngine(manager.config, manager)
+    questions = engine.get_questions_for_mode([manager.load_quiz(quiz_file)], 'leeches')
+    assert [question.id for _, question in questions] == [question_id(2)]
+
+
+def test_progress_of_deleted_questions_does_not_crowd_out_live_leeches(manager):
+    manager.config.set('quick_mode_count', 2)
+    progress = QuestionProgress()
+    for _ in range(8):
+        progress.record_attempt(False, EPOCH)
+    for number in range(3):
+        # Worse than any live leech, in a file that has no such questions
+        manager.update_question_progress('Domain0/Quiz0_0.yaml', f"q_9{number}", progress)
+    apply_history(manager, [('Domain2/Quiz2_3.yaml', 5, False, minute) for minute in range(3)])
+
+    engine = QuizEngine(manager.config, manager)
+    quizzes = engine.load_leech_quizzes(list(LAYOUT))
+    assert [quiz.filepath for quiz in quizzes] == ['Domain2/Quiz2_3.yaml']
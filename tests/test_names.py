@@ -0,0 +1,96 @@
+"""
+Tests for the name index behind tab completion and target suggestions
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+from click.shell_completion import ShellComplete
+
+from quizr import cli
+from quizr.config import Config
+from quizr.names import complete_names, load_names, suggest_names
+
+from .bank import make_config, make_manager, write_bank
+
+
+LAYOUT = {'CompTIA/Network+/Ports.yaml': 2, 'CompTIA/Security+/Crypto.yaml': 2, 'Networking.yaml': 1}
+
+
+@pytest.fixture
+def base(tmp_path):
+    write_bank(str(tmp_path), LAYOUT)
+    return str(tmp_path)
+
+
+def completions(base, monkeypatch, *words):
+    monkeypatch.setattr(cli, 'Config', lambda **kwargs: make_config(base))
+    completer = ShellComplete(cli.main, {}, 'quizr', '_QUIZR_COMPLETE')
+    return [item.value for item in completer.get_completions(list(words[:-1]), words[-1])]
+
+
+def test_discovery_saves_every_target_name(base):
+    make_manager(base).discover_quizzes()
+    assert load_names(make_config(base)) == ['CompTIA', 'Crypto', 'Network+', 'Networking', 'Ports', 'Security+', 'root']
+
+
+def test_new_quizzes_appear_after_the_next_discovery(base):
+    manager = make_manager(base)
+    manager.discover_quizzes()
+    write_bank(base, {'CompTIA/Network+/Cables.yaml': 1})
+    assert 'Cables' not in load_names(manager.config)  # Completion never walks the tree itself
+
+    manager.discover_quizzes()
+    assert 'Cables' in load_names(manager.config)
+
+
+def test_missing_index_is_built_from_file_names(base):
+    assert not os.path.exists(os.path.join(base, '.quizr_cache', 'names.json'))
+    assert 'Ports' in load_names(make_config(base))
+    assert os.path.exists(os.path.join(base, '.quizr_cache', 'names.json'))
+
+
+def test_completion_ignores_case_and_prefers_exact_case():
+    names = ['CompTIA', 'Network+', 'Networking', 'network-basics']
+    assert complete_names(names, 'net') == ['network-basics', 'Network+', 'Networking']
+    assert complete_names(names, 'Net') == ['Network+', 'Networking', 'network-basics']
+    assert complete_names(names, 'x') == []
+
+
+def test_targets_and_modes_complete_from_the_shell(base, monkeypatch):
+    make_manager(base).discover_quizzes()
+    assert completions(base, monkeypatch, 'start', 'Net') == ['Network+', 'Networking']
+    assert completions(base, monkeypatch, 'start', 'Ports', 'l') == ['leeches']
+    assert completions(base, monkeypatch, 'progress', 'sec') == ['Security+']
+    assert completions(base, monkeypatch, 'pack', '--target', 'Com') == ['CompTIA']
+
+
+def test_completion_does_not_print_config_warnings(base, monkeypatch, capsys, tmp_path):
+    make_manager(base).discover_quizzes()
+    (tmp_path / 'config.yaml').write_text("quick_mode_count: lots\n", encoding='utf-8')
+    monkeypatch.setenv('QUIZR_SYSTEM_CONFIG', str(tmp_path / 'missing.yaml'))
+    monkeypatch.setenv('QUIZR_CONFIG', str(tmp_path / 'config.yaml'))
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    monkeypatch.setenv('QUIZR_CHOICE_COUNT', 'many')
+    Config(base)
+    assert capsys.readouterr().err.count('Warning:') == 2
+
+    monkeypatch.setattr(cli, 'Config', lambda **kwargs: Config(base, **kwargs))
+    completer = ShellComplete(cli.main, {}, 'quizr', '_QUIZR_COMPLETE')
+    assert [item.value for item in completer.get_completions(['start'], 'Net')] == ['Network+', 'Networking']
+    assert capsys.readouterr() == ('', '')
+
+
+def test_suggestions_for_unknown_targets():
+    names = ['A+', 'CompTIA', 'Network+', 'Security+']
+    assert suggest_names(names, 'network+') == ['Network+']
+    assert suggest_names(names, 'Securty+.yaml') == ['Security+']
+    assert suggest_names(names, 'Biology') == []
+
+
+def test_cli_starts_without_loading_yaml():
+    code = "import sys, quizr.cli; print(sorted(m for m in ('yaml', 'quizr.data_manager') if m in sys.modules))"
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == '[]'
@@ -0,0 +1,59 @@
+"""
+Tests for answer normalization and the answers a question accepts
+"""
+
+import pytest
+
+from quizr.models import Question
+from quizr.normalization import AnswerNormalizer, answer_variants
+from quizr.quiz_engine import QuizEngine
+
+from .bank import make_manager
+
+
+@pytest.mark.parametrize('answer, parts', [
+    ("Central Processing Unit (CPU)", ["Central Processing Unit", "CPU"]),
+    ("CPU (Central Processing Unit)", ["CPU", "Central Processing Unit"]),
+    ("Transmission Control Protocol/Internet Protocol (TCP/IP)",
+     ["Transmission Control Protocol/Internet Protocol", "TCP/IP"]),
+    ("Wi-Fi Protected Access 2 (WPA2)", ["Wi-Fi Protected Access 2", "WPA2"]),
+    ("pulse-width modulation (PWM)", ["pulse-width modulation", "PWM"]),
+])
+def test_acronyms_are_accepted_on_their_own(answer, parts):
+    assert answer_variants(answer) == [answer, *parts]
+
+
+@pytest.mark.parametrize('answer', [
+    "SIP - VoIP signaling (unencrypted)",
+    "Frequency measured in hertz (Hz)",
+    "DC (direct current) dimming instead of PWM (pulse-width modulation)",
+    "Cat 6 (up to 55 m at 10 Gbps)",
+])
+def test_other_parenthesized_parts_are_not_answers(answer):
+    assert answer_variants(answer) == [answer]
+
+
+def test_alternatives_opt_in_to_parts():
+    assert answer_variants("Frequency measured in hertz (Hz)", ["Hz"]) == ["Frequency measured in hertz (Hz)", "Hz"]
+
+
+def test_normalization_steps():
+    normalizer = AnswerNormalizer(acronyms={'CPU': 'Central Processing Unit'})
+    assert normalizer.normalize("LGA-1200") == normalizer.normalize("lga 1200") == "lga1200"
+    assert normalizer.normalize("C#") != normalizer.normalize("C")
+    assert normalizer.normalize("Ｃｐｕ") == normalizer.normalize("central processing unit")
+    assert normalizer.normalize_answer("...") == "..."
+
+
+@pytest.mark.parametrize('strict', [False, True])
+def test_grading_ignores_qualifiers(tmp_path, strict):
+    manager = make_manager(str(tmp_path))
+    engine = QuizEngine(manager.config, manager)
+    question = Question(id='q', prompt="What does SIP carry?", answer="SIP - VoIP signaling (unencrypted)",
+                        strict=strict)
+    assert not engine.check_answer(question, "unencrypted")
+    assert engine.check_answer(question, "sip voip signaling (unencrypted)")
+
+    question = Question(id='q', prompt="Which part runs code?", answer="CPU (Central Processing Unit)", strict=strict)
+    assert engine.check_answer(question, "cpu")
+    assert engine.check_answer(question, "central processing unit")
@@ -0,0 +1,54 @@
+"""
+Tests for the performance instrumentation and how it is switched on
+"""
+
+import pytest
+from click.testing import CliRunner
+
+from quizr import profiling
+from quizr.cli import main
+from quizr.profiling import Profiler, profiler, timed
+
+
+@pytest.mark.parametrize('value, enabled', [
+    ('1', True), ('true', True), ('Yes', True), (' on ', True),
+    ('0', False), ('false', False), ('no', False), ('off', False), ('', False), ('maybe', False),
+])
+def test_quizr_profile_is_read_like_a_boolean_setting(monkeypatch, value, enabled):
+    monkeypatch.setenv('QUIZR_PROFILE', value)
+    assert profiling.env_enabled() is enabled
+
+
+def test_sections_are_recorded_only_when_enabled():
+    quiet = Profiler()
+    with quiet.section('load'):
+        quiet.count('files')
+    assert quiet.timings == {} and quiet.counters == {}
+
+    loud = Profiler(enabled=True)
+    with loud.section('load'):
+        with loud.section('load'):  # Nested calls count once
+            loud.count('files', 3)
+    assert loud.timings['load'][0] == 1 and loud.counters == {'files': 3}
+    assert [line.split()[0] for line in loud.report()[1:]] == ['load', 'files']
+
+
+def test_timed_functions_report_only_when_profiling(monkeypatch):
+    monkeypatch.setattr(profiler, 'enabled', False)
+    monkeypatch.setattr(profiler, 'timings', {})
+    double = timed('double')(lambda value: value * 2)
+
+    assert double(2) == 4
+    assert 'double' not in profiler.timings
+    profiler.enabled = True
+    assert double(3) == 6
+    assert profiler.timings['double'][0] == 1
+
+
+@pytest.mark.parametrize('args, breakdown', [([], False), (['--profile'], True)])
+def test_cli_prints_the_breakdown_only_when_asked(monkeypatch, args, breakdown):
+    monkeypatch.setattr(profiler, 'enabled', False)
+    result = CliRunner().invoke(main, args + ['completion', 'bash'])
+    assert result.exit_code == 0
+    assert ('wall time' in result.stderr) is breakdown
+    assert 'wall time' not in result.stdout
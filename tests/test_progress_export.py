@@ -0,0 +1,142 @@
+"""
+Tests for `export-progress`: flattening progress stores into CSV and Parquet
+"""
+
+import csv
+import os
+import tracemalloc
+
+import pytest
+import yaml
+
+from quizr.compaction import iter_entries
+from quizr import progress_export
+from quizr.progress_export import COLUMNS, detect_format, export_progress, iter_store_records
+from quizr.storage import read_snapshot
+
+from .bank import apply_history, make_manager, write_bank, write_progress_store
+
+
+LAYOUT = {'Network/Ports.yaml': 5, 'Network/Cables/Copper.yaml': 4, 'Basics.yaml': 3}
+
+
+def learner_store(base, history):
+    """Save the progress of a learner who gave the answers in history"""
+    write_bank(base, LAYOUT)
+    manager = make_manager(base)
+    apply_history(manager, history)
+    manager.global_progress.total_reviews = len(history)
+    manager.global_progress.daily_log = {'2024-01-01': len(history)}
+    manager.save_progress()
+    return manager.config.get_progress_file()
+
+
+def reference_rows(store):
+    """Flatten a store by loading it whole"""
+    data = yaml.safe_load(read_snapshot(store))
+    meta = data.pop('__meta__')
+    return sorted((quiz_file, str(qid), progress['attempts'], progress['correct'], progress['last_review'])
+                  for quiz_file, qid, progress in iter_entries(data)), meta
+
+
+def read_csv_rows(path):
+    with open(path, 'r', encoding='utf-8', newline='') as file:
+        return list(csv.DictReader(file))
+
+
+@pytest.fixture
+def stores(tmp_path):
+    alice = learner_store(str(tmp_path / 'alice'), [('Network/Ports.yaml', 1, True, 0),
+                                                     ('Network/Cables/Copper.yaml', 0, False, 5),
+                                                     ('Network/Cables/Copper.yaml', 0, True, 9)])
+    bob = learner_store(str(tmp_path / 'bob'), [('Basics.yaml', 2, False, 3)])
+    return [alice, bob]
+
+
+def test_rows_match_the_loaded_store(stores):
+    expected, meta = reference_rows(stores[0])
+    rows = list(iter_store_records(stores[0]))
+
+    questions = [row for row in rows if row['record'] == 'question']
+    assert sorted((row['quiz_file'], row['question_id'], row['attempts'], row['correct'], row['last_review'])
+                  for row in questions) == expected
+    assert {row['folder'] for row in questions} == {'Network', 'Network/Cables'}
+    totals, = [row for row in rows if row['record'] == 'totals']
+    assert totals['profile'] == 'alice'
+    assert totals['reviews'] == meta['total_reviews'] == 3
+    assert [(row['day'], row['reviews']) for row in rows if row['record'] == 'day'] == [('2024-01-01', 3)]
+
+
+def test_stores_are_merged_in_order(stores, tmp_path):
+    output = str(tmp_path / 'report.csv')
+    counts = export_progress(stores, output, workers=2)
+    assert counts == {'stores': 2, 'rows': 7, 'questions': 3, 'errors': []}
+
+    rows = read_csv_rows(output)
+    assert list(rows[0]) == COLUMNS
+    assert [row['profile'] for row in rows] == ['alice'] * 4 + ['bob'] * 3
+    assert [row['quiz_file'] for row in rows if row['profile'] == 'bob' and row['record'] == 'question'] == ['Basics.yaml']
+    assert not [name for name in os.listdir(tmp_path) if name.startswith('.quizr-export-')]
+
+
+def test_unreadable_stores_are_reported_and_skipped(stores, tmp_path):
+    with open(stores[1], 'a', encoding='utf-8') as file:
+        file.write("  tampered: 1\n")
+    counts = export_progress(stores, str(tmp_path / 'report.csv'))
+    assert counts['stores'] == 1
+    assert [store for store, _ in counts['errors']] == [stores[1]]
+    assert 'checksum mismatch' in counts['errors'][0][1]
+    assert {row['profile'] for row in read_csv_rows(str(tmp_path / 'report.csv'))} == {'alice'}
+
+    assert export_progress([stores[1]], str(tmp_path / 'bob.csv'))['stores'] == 0
+    assert not os.path.exists(tmp_path / 'bob.csv')
+
+
+def test_profiles_need_distinct_names(stores, tmp_path):
+    with pytest.raises(ValueError, match="profile 'alice'"):
+        export_progress([stores[0], stores[0]], str(tmp_path / 'report.csv'))
+
+
+def test_format_comes_from_the_extension(monkeypatch):
+    assert detect_format('report.CSV') == 'csv'
+    assert detect_format('out/report.parquet') == 'parquet'
+    with pytest.raises(ValueError, match="Unknown format '.xlsx'"):
+        detect_format('report.xlsx')
+
+    monkeypatch.setattr(progress_export, 'pyarrow', None)
+    assert detect_format('report') == 'csv'
+    monkeypatch.setattr(progress_export, 'pyarrow', object())
+    assert detect_format('report') == 'parquet'
+
+
+def test_output_without_extension_defaults_to_csv_without_pyarrow(stores, tmp_path, monkeypatch):
+    monkeypatch.setattr(progress_export, 'pyarrow', None)
+    output = str(tmp_path / 'report')
+    assert export_progress(stores, output)['rows'] == 7
+    assert list(read_csv_rows(output)[0]) == COLUMNS
+
+
+def test_parquet_export(stores, tmp_path):
+    parquet = pytest.importorskip('pyarrow.parquet')
+    output = str(tmp_path / 'report.parquet')
+    export_progress(stores, output)
+
+    table = parquet.read_table(output)
+    assert table.column_names == COLUMNS
+    assert str(table.schema.field('attempts').type) == 'int64'
+    assert table.to_pylist() == [{name: row.get(name) for name in COLUMNS}
+                                 for store in stores for row in iter_store_records(store)]
+
+
+def test_memory_stays_bounded(tmp_path):
+    store = str(tmp_path / 'progress.yaml')
+    write_progress_store(store, 20000)
+
+    tracemalloc.start()
+    try:
+        rows = sum(1 for _ in iter_store_records(store))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert rows == 20000 + 30 + 1
+    assert peak < os.path.getsize(store) / 10
@@ -0,0 +1,188 @@
+"""
+Property-based tests: random exercise trees and progress histories checked against reference behaviour
+"""
+
+import tempfile
+
+import pytest
+
+hypothesis = pytest.importorskip('hypothesis')
+from hypothesis import HealthCheck, given, settings, strategies as st  # noqa: E402
+
+from quizr.bundle import pack_quizzes  # noqa: E402
+from quizr.mastery import MasteryTree  # noqa: E402
+from quizr.models import QuestionProgress  # noqa: E402
+
+from .bank import (apply_history, folder_of, make_manager, question_id, reference_find,  # noqa: E402
+                   reference_progress, reference_stats, stem_of, write_bank)
+
+
+PROPERTY_SETTINGS = settings(max_examples=40, deadline=None,
+                             suppress_health_check=[HealthCheck.too_slow])
+
+# Names include the characters that used to be stripped from targets ('.yaml')
+# and the special characters real folder names use ('A+', 'Network+')
+NAME_ALPHABET = 'abcdeglmnoy' + 'ALMY' + '0123456789' + '+-_.'
+RESERVED = {'root', 'images', 'progress'}
+
+names = st.text(NAME_ALPHABET, min_size=1, max_size=8).filter(
+    lambda name: not name.startswith('.') and not name.endswith(('.', '.yaml')) and name.lower() not in RESERVED)
+
+
+@st.composite
+def layouts(draw):
+    """A bank whose quiz and folder names are all distinct, ignoring case"""
+    pool = draw(st.lists(names, min_size=2, max_size=14, unique_by=str.lower))
+    split = draw(st.integers(1, len(pool) - 1))
+    folders, stems = pool[:split], pool[split:]
+
+    # Each folder nests under an earlier one or sits at the top
+    paths = []
+    for position, folder in enumerate(folders):
+        parent = draw(st.sampled_from([None, *paths])) if position else None
+        paths.append(f"{parent}/{folder}" if parent else folder)
+
+    layout = {}
+    for stem in stems:
+        folder = draw(st.sampled_from(['', *paths]))
+        layout[f"{folder}/{stem}.yaml" if folder else f"{stem}.yaml"] = draw(st.integers(1, 6))
+    return layout
+
+
+@st.composite
+def banks(draw):
+    """A layout with a history of answers to its questions"""
+    layout = draw(layouts())
+    attempt = st.sampled_from(sorted(layout)).flatmap(lambda quiz_file: st.tuples(
+        st.just(quiz_file), st.integers(0, layout[quiz_file] - 1), st.booleans(), st.integers(0, 60 * 24 * 90)))
+    history = draw(st.lists(attempt, max_size=40))
+    return layout, history
+
+
+def folder_names(layout):
+    return {part for quiz_file in layout if '/' in quiz_file for part in folder_of(quiz_file).split('/')}
+
+
+@PROPERTY_SETTINGS
+@given(layouts())
+def test_discovery_finds_exactly_the_written_quizzes(layout):
+    with tempfile.TemporaryDirectory() as base:
+        write_bank(base, layout)
+        manager = make_manager(base)
+        discovered = manager.discover_quizzes()
+
+        assert sorted(f for files in discovered.values() for f in files) == sorted(layout)
+        for folder, files in discovered.items():
+            assert all(folder_of(quiz_file) == folder for quiz_file in files)
+        for quiz_file, count in layout.items():
+            quiz = manager.load_quiz(quiz_file)
+            assert quiz is not None, manager.load_errors.get(quiz_file)
+            assert quiz.name == stem_of(quiz_file)
+            assert quiz.get_question_ids() == [question_id(i) for i in range(count)]
+
+
+@PROPERTY_SETTINGS
+@given(layouts(), st.data())
+def test_find_by_name_matches_reference(layout, data):
+    with tempfile.TemporaryDirectory() as base:
+        write_bank(base, layout)
+        manager = make_manager(base)
+        all_quizzes = manager.discover_quizzes()
+
+        targets = sorted(folder_names(layout) | {stem_of(quiz_file) for quiz_file in layout})
+        target = data.draw(st.sampled_from(targets))
+        suffix = data.draw(st.sampled_from(['', '.yaml'])) if target not in folder_names(layout) else ''
+
+        found = manager.find_quizzes_by_path(target + suffix, all_quizzes=all_quizzes)
+        assert sorted(found) == sorted(reference_find(layout, target))
+        assert found, "every quiz and folder name should find something"
+
+
+@PROPERTY_SETTINGS
+@given(layouts(), names)
+def test_unknown_names_find_nothing(layout, target):
+    hypothesis.assume(target not in folder_names(layout))
+    hypothesis.assume(target not in {stem_of(quiz_file) for quiz_file in layout})
+    with tempfile.TemporaryDirectory() as base:
+        write_bank(base, layout)
+        assert make_manager(base).find_quizzes_by_path(target) == []
+
+
+@PROPERTY_SETTINGS
+@given(banks())
+def test_progress_matches_replayed_history(bank):
+    layout, history = bank
+    with tempfile.TemporaryDirectory() as base:
+        write_bank(base, layout)
+        manager = make_manager(base)
+        apply_history(manager, history)
+        expected = reference_progress(history)
+
+        for quiz_file, count in layout.items():
+            stored = manager.get_quiz_progress(quiz_file)
+            assert set(stored) == {qid for (f, qid) in expected if f == quiz_file}
+            for index in range(count):
+                progress = manager.get_question_progress(quiz_file, question_id(index))
+                assert progress == expected.get((quiz_file, question_id(index)), QuestionProgress())
+
+        manager.save_progress()
+        reloaded = make_manager(base)
+        for (quiz_file, qid), progress in expected.items():
+            assert reloaded.get_question_progress(quiz_file, qid) == progress
+
+
+@PROPERTY_SETTINGS
+@given(banks())
+def test_incremental_rollups_match_rebuilt_ones(bank):
+    layout, history = bank
+    with tempfile.TemporaryDirectory() as base:
+        write_bank(base, layout)
+        manager = make_manager(base)
+        live = manager.get_mastery_tree()
+        apply_history(manager, history)
+
+        rebuilt = make_manager(base)
+        apply_history(rebuilt, history)
+        fresh = MasteryTree(rebuilt.config, rebuilt, now=live.now).build()
+
+        assert manager.calculate_global_stats() == pytest.approx(reference_stats(manager, layout, live.now))
+        assert set(live.folders) == set(fresh.folders)
+        for path in [*live.quizzes, *live.folders]:
+            assert live.get(path).questions == fresh.get(path).questions
+            assert live.get(path).attempts == fresh.get(path).attempts
+            assert live.get(path).correct == fresh.get(path).correct
+            assert live.get(path).mastery == pytest.approx(fresh.get(path).mastery)
+
+
+@PROPERTY_SETTINGS
+@given(banks(), st.data())
+def test_folder_stats_match_reference(bank, data):
+    layout, history = bank
+    folders = sorted(folder_names(layout))
+    hypothesis.assume(folders)
+    folder = data.draw(st.sampled_from(folders))
+    with tempfile.TemporaryDirectory() as base:
+        write_bank(base, layout)
+        manager = make_manager(base)
+        apply_history(manager, history)
+        now = manager.get_mastery_tree().now
+
+        expected = reference_stats(manager, reference_find(layout, folder), now)
+        assert manager.calculate_folder_stats(folder) == pytest.approx(expected)
+
+
+@PROPERTY_SETTINGS
+@given(layouts())
+def test_bundle_and_yaml_tree_agree(layout):
+    with tempfile.TemporaryDirectory() as base:
+        write_bank(base, layout)
+        manager = make_manager(base)
+        pack_quizzes(manager, f"{base}/bank.qzb")
+        packed = make_manager(base, bundle_file='bank.qzb')
+
+        assert ({folder: sorted(files) for folder, files in packed.discover_quizzes().items()}
+                == {folder: sorted(files) for folder, files in manager.discover_quizzes().items()})
+        for quiz_file in layout:
+            assert packed.load_quiz(quiz_file) == manager.load_quiz(quiz_file)
+        for name in folder_names(layout):
+            assert sorted(packed.find_quizzes_by_path(name)) == sorted(manager.find_quizzes_by_path(name))
@@ -0,0 +1,67 @@
+"""
+Tests for recording session transcripts and replaying them
+"""
+
+import os
+
+import pytest
+
+from quizr.quiz_engine import QuizEngine, replay_transcript
+from quizr.session import ExamSession, QuizSession
+
+from .bank import make_manager, write_bank
+
+
+LAYOUT = {'Ports/Common.yaml': 6, 'Ports/Rare.yaml': 4}
+
+ANSWERS = ['answer 1', 'answer 2', 'wrong', 'answer 4', 'answer 5']
+
+
+@pytest.fixture
+def bank(tmp_path):
+    write_bank(str(tmp_path), LAYOUT)
+    return str(tmp_path)
+
+
+def record(base, session_class, mode):
+    """Answer a seeded session and get its transcript"""
+    manager = make_manager(base, progress_save_interval=0, exam_question_count=6)
+    engine = QuizEngine(manager.config, manager, seed=11)
+    quizzes = [manager.load_quiz(quiz_file) for quiz_file in LAYOUT]
+    session = session_class.from_quizzes(engine, quizzes, mode, persist=False, record=True)
+    session.replay(ANSWERS)
+    session.finish()
+    return manager.config, session.get_transcript('Ports')
+
+
+def test_session_replays_identically(bank):
+    config, transcript = record(bank, QuizSession, 'shuffle')
+    results = replay_transcript(config, transcript)
+    assert results['mismatches'] == []
+    assert results['answers'] == len(ANSWERS)
+    assert results['correct'] == sum(entry['correct'] for entry in transcript['answers'])
+
+
+def test_exam_is_replayed_as_an_exam(bank, monkeypatch):
+    config, transcript = record(bank, ExamSession, 'exam')
+    assert len({entry['at'] for entry in transcript['answers']}) == 1  # Graded together
+
+    graded = []
+    grade = ExamSession.grade
+    monkeypatch.setattr(ExamSession, 'grade', lambda session: graded.append(session) or grade(session))
+    results = replay_transcript(config, transcript)
+    assert results['mismatches'] == []
+    assert len(graded) == 1
+
+
+def test_replay_leaves_progress_alone(bank):
+    config, transcript = record(bank, QuizSession, 'shuffle')
+    for _ in range(2):
+        make_manager(bank).save_progress()  # The second run rotates a backup a load could recover from
+    with open(config.get_progress_file(), 'w', encoding='utf-8') as file:
+        file.write("not: [a valid snapshot\n")
+
+    assert replay_transcript(config, transcript)['mismatches'] == []
+    with open(config.get_progress_file(), 'r', encoding='utf-8') as file:
+        assert file.read() == "not: [a valid snapshot\n"
+    assert not os.path.exists(config.get_progress_file() + '.corrupt')
@@ -0,0 +1,368 @@
+"""
+Scale tests: data layer operations on generated banks, timed against budgets
+
+Each tier doubles as a performance regression gate. Only the small tier runs
+by default; `pytest --scale medium` or `--scale large` adds the bigger banks,
+and `--scale-budget-factor` loosens every budget on slow machines. Budgets
+are several times what the operations take on a laptop, so a failure means
+something got slower by a lot, not noise.
+"""
+
+import csv
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+import pytest
+
+from quizr.bundle import ensure_shared_bundle, pack_quizzes
+from quizr.dedupe import find_duplicates
+from quizr.distractors import DistractorIndex
+from quizr.interchange import export_cards, import_cards
+from quizr.progress_export import export_progress
+from quizr.quiz_engine import QuizEngine
+from quizr.search_index import SearchIndex
+from quizr.session import QuizSession
+
+from .bank import (apply_history, make_config, make_manager, question_id, synthetic_questions, write_bank,
+                   write_progress_store)
+
+
+# Tier -> (folders, quiz files per folder, questions per file)
+TIERS = {
+    'small': (4, 5, 100),
+    'medium': (10, 20, 100),
+    'large': (20, 50, 200),
+}
+
+# Tier -> operation -> budget in seconds
+BUDGETS = {
+    'small': {'discover': 0.5, 'find': 0.05, 'load': 4, 'stats_cold': 4, 'stats_warm': 0.2,
+              'save': 2, 'reload': 3, 'bundle_load': 0.3, 'answer': 0.01,
+              'search_build': 4, 'search_update': 0.5, 'search': 0.02, 'search_all': 0.1},
+    'medium': {'discover': 1, 'find': 0.1, 'load': 35, 'stats_cold': 35, 'stats_warm': 1,
+               'save': 15, 'reload': 30, 'bundle_load': 2, 'answer': 0.01,
+               'search_build': 35, 'search_update': 1, 'search': 0.02, 'search_all': 0.5},
+    'large': {'discover': 5, 'find': 1, 'load': 350, 'stats_cold': 350, 'stats_warm': 10,
+              'save': 150, 'reload': 300, 'bundle_load': 20, 'answer': 0.01,
+              'search_build': 350, 'search_update': 5, 'search': 0.05, 'search_all': 5},
+}
+
+# Tier -> (progress records per store, stores) for export-progress
+EXPORT_TIERS = {
+    'small': (20000, 2),
+    'medium': (100000, 4),
+    'large': (1000000, 1),
+}
+
+# Tier -> seconds to export every store
+EXPORT_BUDGETS = {'small': 8, 'medium': 80, 'large': 200}
+
+# Tier -> questions compared by dedupe
+DEDUPE_TIERS = {'small': 10000, 'medium': 100000, 'large': 300000}
+
+# Tier -> seconds to find every duplicate
+DEDUPE_BUDGETS = {'small': 3, 'medium': 60, 'large': 600}
+
+# Tier -> cards imported from CSV and exported again
+INTERCHANGE_TIERS = {'small': 10000, 'medium': 100000, 'large': 1000000}
+
+# Tier -> (seconds to import, seconds to export)
+INTERCHANGE_BUDGETS = {'small': (3, 15), 'medium': (25, 150), 'large': (250, 1500)}
+
+# Tier -> answers in the one folder multiple-choice options are drawn from
+DISTRACTOR_TIERS = {'small': 10000, 'medium': 100000, 'large': 300000}
+
+# Tier -> (seconds to collect the answers, to index the folder, per pick)
+DISTRACTOR_BUDGETS = {'small': (20, 2, 0.01), 'medium': (150, 10, 0.02), 'large': (500, 30, 0.05)}
+
+# Tier -> concurrent processes in the shared cache memory test
+SHARED_SESSIONS = {'small': 10, 'medium': 50, 'large': 50}
+
+# Aggregate PSS allowed with the shared cache, relative to parsing the YAML
+SHARED_PSS_RATIO = 1.1
+
+# A session process: load one domain, report readiness, wait to be released
+SESSION_SCRIPT = '''
+import sys
+from quizr.config import Config
+from quizr.data_manager import DataManager
+config = Config(sys.argv[1], load_files=False)
+config.set('shared_cache', sys.argv[2] == 'shared')
+data_manager = DataManager(config)
+quizzes = [data_manager.load_quiz(quiz_file) for quiz_file in data_manager.find_quizzes_by_path(sys.argv[3])]
+print(sum(len(quiz.questions) for quiz in quizzes), flush=True)
+sys.stdin.readline()
+'''
+
+TIER_PARAMS = [pytest.param(tier, marks=pytest.mark.scale(tier), id=tier) for tier in TIERS]
+
+
+def tier_layout(tier):
+    folders, files, questions = TIERS[tier]
+    return {f"Domain{d}/Topic{d}_{t}/Quiz{d}_{t}.yaml": questions
+            for d in range(folders) for t in range(files)}
+
+
+@contextmanager
+def within(seconds, label):
+    """Fail if the block takes longer than its budget"""
+    started = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - started
+    assert elapsed <= seconds, f"{label} took {elapsed:.3f}s, budget {seconds:.3f}s"
+
+
+@pytest.fixture(scope='module', params=TIER_PARAMS)
+def scaled_bank(request, tmp_path_factory):
+    """Generated bank of a tier, with every other question answered once"""
+    tier = request.param
+    base = str(tmp_path_factory.mktemp(f"bank-{tier}"))
+    layout = tier_layout(tier)
+    write_bank(base, layout)
+
+    manager = make_manager(base, progress_save_interval=0)
+    apply_history(manager, [(quiz_file, index, index % 3 != 0, index)
+                            for quiz_file, count in layout.items() for index in range(0, count, 2)])
+    manager.save_progress()
+    return tier, base, layout
+
+
+def test_discover_and_find(scaled_bank, budget):
+    tier, base, layout = scaled_bank
+    manager = make_manager(base)
+
+    with within(budget(BUDGETS[tier]['discover']), 'discover_quizzes'):
+        all_quizzes = manager.discover_quizzes()
+    assert sum(len(files) for files in all_quizzes.values()) == len(layout)
+
+    with within(budget(BUDGETS[tier]['find']), 'find_quizzes_by_path'):
+        found = manager.find_quizzes_by_path('Domain1', all_quizzes=all_quizzes)
+        single = manager.find_quizzes_by_path('Quiz0_0', all_quizzes=all_quizzes)
+    assert len(found) == TIERS[tier][1]
+    assert single == ['Domain0/Topic0_0/Quiz0_0.yaml']
+
+
+def test_load_every_quiz(scaled_bank, budget):
+    tier, base, layout = scaled_bank
+    manager = make_manager(base)
+
+    with within(budget(BUDGETS[tier]['load']), 'load every quiz'):
+        questions = sum(manager.load_quiz(quiz_file).get_question_count() for quiz_file in layout)
+    assert questions == sum(layout.values())
+
+
+def test_global_stats(scaled_bank, budget):
+    tier, base, layout = scaled_bank
+
+    manager = make_manager(base)
+    with within(budget(BUDGETS[tier]['stats_cold']), 'global stats, cold'):
+        cold = manager.calculate_global_stats()
+    # A new run reads question ids from the mastery cache instead of the quizzes
+    manager = make_manager(base)
+    with within(budget(BUDGETS[tier]['stats_warm']), 'global stats, warm'):
+        warm = manager.calculate_global_stats()
+
+    answered = sum((count + 1) // 2 for count in layout.values())
+    assert cold['total_questions'] == warm['total_questions'] == sum(layout.values())
+    assert cold['questions_seen'] == warm['questions_seen'] == answered
+
+
+def test_progress_save_and_reload(scaled_bank, budget):
+    tier, base, layout = scaled_bank
+    manager = make_manager(base)
+    quiz_file = next(iter(layout))
+    apply_history(manager, [(quiz_file, 1, True, 0)])
+
+    with within(budget(BUDGETS[tier]['save']), 'save_progress'):
+        manager.save_progress()
+    with within(budget(BUDGETS[tier]['reload']), 'load progress'):
+        reloaded = make_manager(base)
+    assert reloaded.get_question_progress(quiz_file, question_id(1)).attempts == 1
+
+
+def test_answer_latency(scaled_bank, budget):
+    """Answers between progress writes don't pay for the write, however big the store"""
+    tier, base, layout = scaled_bank
+    manager = make_manager(base, progress_save_interval=60)
+    quiz = manager.load_quiz(next(iter(layout)))
+    session = QuizSession.from_quizzes(QuizEngine(manager.config, manager, seed=1), [quiz], 'shuffle')
+
+    writes = []
+    save_progress = manager.save_progress
+    manager.save_progress = lambda force=True: writes.append(save_progress(force)) or writes[-1]
+    session.submit('answer 1')  # Writes the snapshot and rotates the backups
+    assert writes == [True]
+
+    latencies = []
+    while not session.is_finished:
+        started = time.perf_counter()
+        session.submit('answer 1')
+        latencies.append(time.perf_counter() - started)
+    assert not any(writes[1:])
+    assert max(latencies) <= budget(BUDGETS[tier]['answer']), \
+        f"slowest answer took {max(latencies):.4f}s between writes"
+
+    with within(budget(BUDGETS[tier]['save']), 'write skipped answers at the end of the session'):
+        session.finish()
+    assert make_manager(base).get_quiz_progress(quiz.filepath) == manager.get_quiz_progress(quiz.filepath)
+
+
+def test_search(scaled_bank, budget):
+    tier, base, layout = scaled_bank
+    manager = make_manager(base)
+    index = SearchIndex(manager.config, manager)
+    try:
+        with within(budget(BUDGETS[tier]['search_build']), 'build the search index'):
+            index.update()
+    finally:
+        index.close()
+
+    manager = make_manager(base)
+    index = SearchIndex(manager.config, manager)
+    try:
+        with within(budget(BUDGETS[tier]['search_update']), 'search index update, nothing changed'):
+            counts = index.update()
+        assert counts['unchanged'] == len(layout)
+
+        with within(budget(BUDGETS[tier]['search']), 'search for one quiz'):
+            hits = index.search(['Quiz1_2'], limit=1000)
+        assert len(hits) == TIERS[tier][2]
+        assert {hit.quiz_filepath for hit in hits} == {'Domain1/Topic1_2/Quiz1_2.yaml'}
+
+        with within(budget(BUDGETS[tier]['search_all']), 'search matching every question'):
+            hits = index.search(['question'])
+        assert len(hits) == 20
+    finally:
+        index.close()
+
+
+def test_bundle_load(scaled_bank, budget, tmp_path):
+    tier, base, layout = scaled_bank
+    bundle_file = str(tmp_path / 'bank.qzb')
+    pack_quizzes(make_manager(base), bundle_file)
+    manager = make_manager(base, bundle_file=bundle_file)
+
+    with within(budget(BUDGETS[tier]['bundle_load']), 'load every quiz from the bundle'):
+        questions = sum(manager.load_quiz(quiz_file).get_question_count() for quiz_file in layout)
+    assert questions == sum(layout.values())
+
+
+@pytest.mark.parametrize('tier', TIER_PARAMS)
+def test_progress_export(tier, budget, tmp_path):
+    records, count = EXPORT_TIERS[tier]
+    stores = []
+    for position in range(count):
+        os.makedirs(tmp_path / f"learner{position}")
+        stores.append(str(tmp_path / f"learner{position}" / 'progress.yaml'))
+        write_progress_store(stores[-1], records)
+
+    with within(budget(EXPORT_BUDGETS[tier]), 'export-progress'):
+        counts = export_progress(stores, str(tmp_path / 'report.csv'))
+    assert counts['questions'] == records * count
+    assert not counts['errors']
+
+
+@pytest.mark.parametrize('tier', TIER_PARAMS)
+def test_dedupe(tier, budget):
+    count = DEDUPE_TIERS[tier]
+    questions = list(synthetic_questions(count))
+
+    with within(budget(DEDUPE_BUDGETS[tier]), 'dedupe'):
+        report = find_duplicates(questions)
+    assert report['questions'] == count
+    assert len(report['exact']) == count // 100
+    near = {(side['quiz'], side['id']) for pair in report['near'] for side in (pair['a'], pair['b'])}
+    variants = {(quiz_file, question) for quiz_file, question, _, _ in questions if question == question_id(75)}
+    assert variants <= near
+
+
+@pytest.mark.parametrize('tier', TIER_PARAMS)
+def test_import_export(tier, budget, tmp_path):
+    count = INTERCHANGE_TIERS[tier]
+    import_budget, export_budget = INTERCHANGE_BUDGETS[tier]
+    source = str(tmp_path / 'cards.csv')
+    with open(source, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['folder', 'quiz', 'prompt', 'answer'])
+        for quiz_file, _, prompt, answer in synthetic_questions(count):
+            writer.writerow(quiz_file[:-len('.yaml')].rsplit('/', 1) + [prompt, answer])
+
+    with within(budget(import_budget), 'import'):
+        counts = import_cards(make_config(str(tmp_path)), source)
+    assert counts['duplicates'] == count // 100  # The planted exact copies
+    assert counts['imported'] == count - counts['duplicates']
+
+    manager = make_manager(str(tmp_path))
+    quiz_files = [quiz_file for files in manager.discover_quizzes().values() for quiz_file in files]
+    with within(budget(export_budget), 'export'):
+        exported = export_cards(manager, str(tmp_path / 'export.csv'), quiz_files)
+    assert exported == counts['imported']
+
+
+@pytest.mark.parametrize('tier', TIER_PARAMS)
+def test_distractors(tier, budget, tmp_path):
+    count = DISTRACTOR_TIERS[tier]
+    build_budget, index_budget, pick_budget = DISTRACTOR_BUDGETS[tier]
+    quizzes = {}
+    for quiz_file, question, prompt, answer in synthetic_questions(count):
+        quizzes.setdefault('Bank/' + quiz_file.rsplit('/', 1)[1], []).append(
+            f"{question}:\n  prompt: \"{prompt}\"\n  answer: \"{answer}\"\n")
+    os.makedirs(tmp_path / 'Exercises' / 'Bank')
+    for quiz_file, entries in quizzes.items():
+        (tmp_path / 'Exercises' / quiz_file).write_text(''.join(entries), encoding='utf-8')
+
+    manager = make_manager(str(tmp_path))
+    engine = QuizEngine(manager.config, manager, seed=1)
+    with within(budget(build_budget), 'collect every answer'):
+        engine.distractors = DistractorIndex(manager.config, manager).build()
+
+    questions = list(manager.load_quiz('Bank/Quiz0.yaml').questions.values())
+    with within(budget(index_budget), 'index the folder and pick'):
+        engine.get_choices('Bank/Quiz0.yaml', questions[0])
+
+    started = time.perf_counter()
+    for question in questions:
+        choices = engine.get_choices('Bank/Quiz0.yaml', question)
+        assert len(choices) == 4 and choices.count(question.answer) == 1
+    per_pick = (time.perf_counter() - started) / len(questions)
+    assert per_pick <= budget(pick_budget), f"a pick took {per_pick:.4f}s, budget {budget(pick_budget):.4f}s"
+
+
+def proportional_set_size(pid):
+    """Get a process's proportional set size in kB: shared pages split among their users"""
+    with open(f"/proc/{pid}/smaps_rollup", 'r', encoding='utf-8') as file:
+        for line in file:
+            if line.startswith('Pss:'):
+                return int(line.split()[1])
+    raise ValueError(f"no Pss for process {pid}")
+
+
+def aggregate_pss(base, cache, sessions, domains):
+    """Run concurrent session processes and sum their memory once all have loaded"""
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    processes = [subprocess.Popen([sys.executable, '-c', SESSION_SCRIPT, base, cache, f"Domain{number % domains}"],
+                                  stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, env=env)
+                 for number in range(sessions)]
+    try:
+        questions = [int(process.stdout.readline()) for process in processes]
+        return sum(proportional_set_size(process.pid) for process in processes), questions
+    finally:
+        for process in processes:
+            process.communicate('\n')
+
+
+@pytest.mark.skipif(not os.path.exists('/proc/self/smaps_rollup'), reason="needs Linux /proc smaps_rollup")
+def test_shared_cache_memory(scaled_bank):
+    tier, base, layout = scaled_bank
+    domains, files, per_file = TIERS[tier]
+    ensure_shared_bundle(make_manager(base))  # Built once up front, as the first session would
+
+    yaml_pss, yaml_questions = aggregate_pss(base, 'yaml', SHARED_SESSIONS[tier], domains)
+    shared_pss, shared_questions = aggregate_pss(base, 'shared', SHARED_SESSIONS[tier], domains)
+    assert yaml_questions == shared_questions == [files * per_file] * SHARED_SESSIONS[tier]
+    assert shared_pss <= SHARED_PSS_RATIO * yaml_pss, (
+        f"{SHARED_SESSIONS[tier]} sessions: {shared_pss // 1024} MB PSS with the shared cache, "
+        f"{yaml_pss // 1024} MB parsing the YAML")
@@ -0,0 +1,98 @@
+"""
+Tests for the question search index and `quizr search`
+"""
+
+import os
+
+import pytest
+from click.testing import CliRunner
+
+from quizr.cli import main
+from quizr.search_index import SearchIndex
+
+from .bank import make_manager
+
+
+@pytest.mark.parametrize('mode', ['exam', 'leeches'])
+def test_search_only_starts_practice_sessions(mode):
+    result = CliRunner().invoke(main, ['search', 'ssh', '--start', mode])
+    assert result.exit_code == 2
+    assert "Invalid value for '--start'" in result.output
+    assert "'spaced', 'shuffle', 'quick', 'weak'" in result.output
+
+
+QUIZZES = {
+    'Network/Ports.yaml': {
+        101: ("Which port does SSH use? SSH replaced Telnet", "22"),
+        102: ("Which port does Telnet use, and is it encrypted like SSH, HTTPS, IMAPS or SFTP?", "23"),
+        103: ("Which port does SMTP use?", "25"),
+    },
+    'Security/Crypto.yaml': {
+        'q_001': ("What does symmetric encryption share?", "A single key"),
+        'q_002': ("What is an encrypted tunnel called?", "VPN"),
+    },
+}
+
+
+def write_quiz(base, quiz_file, questions):
+    path = os.path.join(base, 'Exercises', *quiz_file.split('/'))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write(''.join(f"{qid}:\n  prompt: \"{prompt}\"\n  answer: \"{answer}\"\n"
+                           for qid, (prompt, answer) in questions.items()))
+
+
+@pytest.fixture
+def index(tmp_path):
+    for quiz_file, questions in QUIZZES.items():
+        write_quiz(str(tmp_path), quiz_file, questions)
+    manager = make_manager(str(tmp_path))
+    try:
+        search_index = SearchIndex(manager.config, manager)
+    except RuntimeError as e:
+        pytest.skip(str(e))
+    yield search_index
+    search_index.close()
+
+
+def found(search_index, *terms):
+    return [(hit.quiz_filepath, hit.question_id) for hit in search_index.search(list(terms))]
+
+
+def test_hits_are_ranked_by_relevance(index):
+    assert index.update() == {'added': 2, 'updated': 0, 'removed': 0, 'unchanged': 0}
+    # Two mentions in a short prompt beat one in a long prompt
+    assert found(index, 'ssh') == [('Network/Ports.yaml', '101'), ('Network/Ports.yaml', '102')]
+    assert found(index, 'SSH', 'telnet', '23') == [('Network/Ports.yaml', '102')]
+    assert found(index, 'key') == [('Security/Crypto.yaml', 'q_001')]  # Answers are searched too
+
+
+def test_terms_match_as_prefixes(index):
+    index.update()
+    assert sorted(found(index, 'encrypt')) == [('Network/Ports.yaml', '102'), ('Security/Crypto.yaml', 'q_001'),
+                                               ('Security/Crypto.yaml', 'q_002')]
+    assert found(index, 'encryptions') == []
+    assert found(index, '"') == [] and index.search([' ']) == []
+
+
+def test_only_changed_files_are_reindexed(index, tmp_path):
+    index.update()
+    assert index.update() == {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 2}
+
+    write_quiz(str(tmp_path), 'Network/Ports.yaml', {101: ("Which port does SFTP use?", "22")})
+    assert index.update() == {'added': 0, 'updated': 1, 'removed': 0, 'unchanged': 1}
+    assert found(index, 'sftp') == [('Network/Ports.yaml', '101')]
+    assert found(index, 'telnet') == []
+
+    os.remove(os.path.join(str(tmp_path), 'Exercises', 'Security', 'Crypto.yaml'))
+    assert index.update() == {'added': 0, 'updated': 0, 'removed': 1, 'unchanged': 1}
+    assert found(index, 'encrypt') == []
+
+
+def test_hits_name_questions_by_their_yaml_ids(index):
+    index.update()
+    for hit in index.search(['port']):
+        quiz = index.data_manager.load_quiz(hit.quiz_filepath)
+        question = next(question for question in quiz.questions.values() if str(question.id) == hit.question_id)
+        assert isinstance(question.id, int)
+        assert (question.prompt, question.answer) == (hit.prompt, hit.answer)
@@ -0,0 +1,118 @@
+"""
+Tests for the headless JSON-lines server
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from quizr.server import QuizServer
+
+from .bank import make_config, write_bank
+
+
+LAYOUT = {'Network/Ports.yaml': 3, 'Basics.yaml': 2}
+
+
+@pytest.fixture
+def server(tmp_path):
+    write_bank(str(tmp_path), LAYOUT)
+    quiz_server = QuizServer(make_config(str(tmp_path), progress_save_interval=0))
+    yield quiz_server
+    quiz_server.close()
+
+
+def exchange(quiz_server, lines):
+    """Send raw request lines over one connection and decode the responses"""
+    async def run():
+        server = await quiz_server.start('127.0.0.1', 0)
+        host, port = server.sockets[0].getsockname()[:2]
+        reader, writer = await asyncio.open_connection(host, port)
+        responses = []
+        for line in lines:
+            writer.write(line.encode('utf-8') + b'\n')
+            await writer.drain()
+            responses.append(json.loads(await reader.readline()))
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return responses
+
+    return asyncio.run(run())
+
+
+def test_session_over_a_connection(server):
+    start, = exchange(server, ['{"op": "start", "target": "Ports", "mode": "shuffle", "id": 1}'])
+    assert start['ok'] and start['id'] == 1 and start['total'] == 3
+
+    session = json.dumps(start['session'])
+    question, answer, end = exchange(server, [
+        '{"op": "next", "session": %s}' % session,
+        '{"op": "answer", "session": %s, "answer": "answer 1"}' % session,
+        '{"op": "end", "session": %s}' % session,
+    ])
+    assert question['quiz'] == 'Network/Ports.yaml'
+    assert answer['remaining'] == 2
+    assert end['summary']['attempted'] == 1
+    assert server.data_manager.global_progress.total_reviews == 1
+
+
+@pytest.mark.parametrize('request_line, error', [
+    ('{"op": "start", "target": 5}', "Target must be a string"),
+    ('{"op": "start", "target": "Ports", "mode": ["quick"]}', "Mode must be a string"),
+    ('{"op": "start", "target": "Ports", "choices": "yes"}', "Choices must be a boolean"),
+    ('{"op": "next", "session": {"id": 1}}', "Session must be a string"),
+    ('{"op": "answer", "session": "nope"}', "Unknown session: nope"),
+    ('{"op": "progress", "target": 7}', "Target must be a string"),
+    ('{"op": "fly"}', "Unknown op: fly"),
+    ('[1, 2]', "Request must be a JSON object"),
+    ('not json', "Invalid JSON"),
+])
+def test_malformed_requests_get_an_error_response(server, request_line, error):
+    response, = exchange(server, [request_line])
+    assert response['ok'] is False
+    assert error in response['error']
+
+
+def test_handler_failures_are_reported(server, monkeypatch):
+    monkeypatch.setattr(server, 'op_list', lambda request: {}['missing'])
+    response, after = exchange(server, ['{"op": "list", "id": "a"}', '{"op": "progress"}'])
+    assert response == {'ok': False, 'error': "Internal error: KeyError: 'missing'", 'id': 'a'}
+    assert after['ok'] and after['total_questions'] == 5  # The connection stays open
+
+
+def test_an_over_long_line_is_discarded_with_an_error(server):
+    async def run():
+        tcp_server = await server.start('127.0.0.1', 0)
+        reader, writer = await asyncio.open_connection(*tcp_server.sockets[0].getsockname()[:2])
+        writer.write(b'{"op": "list", "pad": "' + b'x' * (2 * server.LINE_LIMIT) + b'"}\n')
+        writer.write(b'{"op": "list"}\n')
+        await writer.drain()
+        lines = [await reader.readline(), await reader.readline()]
+        writer.close()
+        tcp_server.close()
+        await tcp_server.wait_closed()
+        return lines
+
+    response, after = asyncio.run(run())
+    assert json.loads(response) == {'ok': False, 'error': f"Request line longer than {server.LINE_LIMIT} bytes"}
+    assert json.loads(after)['ok']  # The next request is served
+
+
+def test_idle_sessions_are_dropped(server, monkeypatch):
+    server.config.set('server_session_timeout', 60)
+    now = [1000.0]
+    monkeypatch.setattr('quizr.server.time.monotonic', lambda: now[0])
+    idle, = exchange(server, ['{"op": "start", "target": "Ports"}'])
+    active, = exchange(server, ['{"op": "start", "target": "Basics"}'])
+
+    now[0] += 45
+    assert exchange(server, ['{"op": "next", "session": "%s"}' % active['session']])[0]['ok']
+    now[0] += 45
+    response, = exchange(server, ['{"op": "next", "session": "%s"}' % active['session']])
+    assert response['ok']
+    assert list(server.sessions) == [active['session']]
+
+    response, = exchange(server, ['{"op": "next", "session": "%s"}' % idle['session']])
+    assert response == {'ok': False, 'error': f"Unknown session: {idle['session']}"}
@@ -0,0 +1,101 @@
+"""
+Tests for session checkpoints and `start --resume`
+"""
+
+import os
+
+import pytest
+
+from quizr.quiz_engine import QuizEngine
+from quizr.session import QuizSession, load_checkpoint
+
+from .bank import make_manager, write_bank
+
+
+LAYOUT = {'Ports/Common.yaml': 6, 'Ports/Rare.yaml': 4}
+
+
+@pytest.fixture
+def bank(tmp_path):
+    write_bank(str(tmp_path), LAYOUT)
+    return str(tmp_path)
+
+
+def start_session(base, mode='shuffle', seed=7):
+    manager = make_manager(base, progress_save_interval=0)
+    engine = QuizEngine(manager.config, manager, seed=seed)
+    quizzes = [manager.load_quiz(quiz_file) for quiz_file in LAYOUT]
+    session = QuizSession.from_quizzes(engine, quizzes, mode)
+    session.checkpoint_to(manager.config.get_checkpoint_file(), 'Ports')
+    return session
+
+
+def resume_session(base):
+    manager = make_manager(base, progress_save_interval=0)
+    engine = QuizEngine(manager.config, manager)
+    return QuizSession.from_checkpoint(engine, load_checkpoint(manager.config.get_checkpoint_file()))
+
+
+def queue(session):
+    return [(quiz_file, question.id) for quiz_file, question in session.questions[session.position:]]
+
+
+def test_resume_continues_the_same_queue(bank):
+    session = start_session(bank)
+    session.submit('answer 1')
+    session.submit('wrong')
+    session.abort()
+    session.finish()
+    expected = queue(session)
+    rng_state = session.engine.rng.getstate()
+
+    resumed = resume_session(bank)
+    assert queue(resumed) == expected
+    assert resumed.stats.mode == 'shuffle'
+    assert resumed.stats.questions_attempted == 2
+    assert resumed.engine.seed == 7
+    assert resumed.engine.rng.getstate() == rng_state
+
+
+def test_checkpoint_follows_progress_writes(bank):
+    session = start_session(bank)
+    session.submit('answer 1')
+    # Killed here: no abort, no finish
+    resumed = resume_session(bank)
+    assert queue(resumed) == queue(session)
+    assert resumed.stats.questions_attempted == 1
+
+
+def test_completed_session_removes_checkpoint(bank):
+    session = start_session(bank)
+    session.submit('answer 1')
+    checkpoint_file = session.checkpoint_path
+    assert os.path.exists(checkpoint_file)
+
+    session.replay(['x'] * session.remaining)
+    session.finish()
+    assert not os.path.exists(checkpoint_file)
+
+
+def test_resume_skips_removed_questions(bank):
+    session = start_session(bank, mode='spaced')
+    session.abort()
+    session.finish()
+
+    write_bank(bank, {'Ports/Rare.yaml': 2})  # Rare loses two questions
+    resumed = resume_session(bank)
+    assert resumed.remaining == sum(LAYOUT.values()) - 2
+    assert all(question.id in ('q_001', 'q_002') for quiz_file, question in resumed.questions
+               if quiz_file == 'Ports/Rare.yaml')
+
+
+def test_resume_loads_only_queued_quizzes(bank, monkeypatch):
+    session = start_session(bank)
+    session.abort()
+    session.finish()
+
+    manager = make_manager(bank)
+    monkeypatch.setattr(manager, 'discover_quizzes', lambda: pytest.fail("resume rediscovered the bank"))
+    engine = QuizEngine(manager.config, manager)
+    resumed = QuizSession.from_checkpoint(engine, load_checkpoint(manager.config.get_checkpoint_file()))
+    assert resumed.remaining == sum(LAYOUT.values())
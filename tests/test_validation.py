@@ -0,0 +1,105 @@
+"""
+Tests for quiz file validation and its result cache
+"""
+
+import os
+
+import pytest
+
+from quizr import validation
+from quizr.validation import QuizValidator, ValidationIssue, check_quiz_text
+
+from .bank import make_manager, quiz_yaml, write_bank
+
+
+LAYOUT = {'Network/Ports.yaml': 3, 'Legacy/Ports.yaml': 2, 'Basics.yaml': 2}
+
+BROKEN = {
+    'Broken/Duplicate.yaml': "q_001:\n  prompt: \"A\"\n  answer: \"a\"\nq_001:\n  prompt: \"B\"\n  answer: \"b\"\n",
+    'Broken/Schema.yaml': "q_001:\n  prompt: \"A\"\nq_002:\n  prompt: \"B\"\n  answer: \"b\"\n  strict: maybe\n",
+    'Broken/Syntax.yaml': "q_001: [unclosed\n",
+}
+
+
+@pytest.fixture
+def bank(tmp_path):
+    write_bank(str(tmp_path), LAYOUT)
+    for quiz_file, text in BROKEN.items():
+        path = tmp_path / 'Exercises' / quiz_file
+        os.makedirs(path.parent, exist_ok=True)
+        path.write_text(text, encoding='utf-8')
+    return str(tmp_path)
+
+
+def messages(issues):
+    return sorted((issue.quiz_filepath, issue.question_id, issue.level, issue.message) for issue in issues)
+
+
+def test_duplicate_question_ids_are_errors():
+    issues, _ = check_quiz_text(BROKEN['Broken/Duplicate.yaml'])
+    assert len(issues) == 1
+    level, question_id, message = issues[0]
+    assert level == 'error' and "duplicate question id 'q_001'" in message and 'line 4' in message
+
+
+@pytest.mark.parametrize('text, issue', [
+    ("q_001:\n  prompt: \"A\"\n", ('error', 'q_001', "Missing required 'answer'")),
+    ("q_001:\n  prompt: \"  \"\n  answer: \"a\"\n", ('error', 'q_001', "Missing required 'prompt'")),
+    ("q_001:\n  prompt: \"A\"\n  answer: 80\n", ('warning', 'q_001', "'answer' should be a string, got int")),
+    ("q_001:\n  prompt: \"A\"\n  answer: \"a\"\n  strict: maybe\n",
+     ('error', 'q_001', "'strict' must be true or false, got 'maybe'")),
+    ("q_001:\n  prompt: \"A\"\n  answer: \"a\"\n  alternatives: {b: c}\n",
+     ('error', 'q_001', "'alternatives' must be a list of answers")),
+    ("q_001:\n  prompt: \"A\"\n  answer: \"a\"\n  hint: \"b\"\n", ('warning', 'q_001', "Unknown key 'hint'")),
+    ("7:\n  prompt: \"A\"\n  answer: \"a\"\n", ('warning', '7', "Question id should be a string, got int")),
+    ("q_001: \"A\"\n", ('error', 'q_001', "Question must be a mapping with 'prompt' and 'answer'")),
+    ("- q_001\n", ('error', None, "Top level must be a mapping of question ids to questions")),
+    ("", ('warning', None, "File has no questions")),
+])
+def test_schema_problems_are_reported(text, issue):
+    issues, _ = check_quiz_text(text)
+    assert issues == [issue]
+
+
+def test_quiz_names_used_twice_are_warned_about(bank):
+    manager = make_manager(bank)
+    issues, _ = QuizValidator(manager.config, manager).validate()
+    warnings = [issue for issue in issues if 'is also used by' in issue.message]
+    assert messages(warnings) == [
+        ('Legacy/Ports.yaml', None, 'warning', "Quiz name 'Ports' is also used by Network/Ports.yaml"),
+        ('Network/Ports.yaml', None, 'warning', "Quiz name 'Ports' is also used by Legacy/Ports.yaml"),
+    ]
+
+
+def test_unchanged_files_are_not_checked_again(bank, monkeypatch):
+    manager = make_manager(bank)
+    first, counts = QuizValidator(manager.config, manager).validate()
+    assert counts == {'files': 6, 'checked': 6, 'cached': 0}
+
+    def fail(full_path):
+        raise AssertionError(f"{full_path} checked again")
+    monkeypatch.setattr(validation, '_check_file', fail)
+    second, counts = QuizValidator(manager.config, manager).validate()
+    assert counts == {'files': 6, 'checked': 0, 'cached': 6}
+    assert messages(second) == messages(first)
+
+    monkeypatch.undo()
+    with open(os.path.join(bank, 'Exercises', 'Basics.yaml'), 'w', encoding='utf-8') as file:
+        file.write(quiz_yaml('Basics.yaml', 3))
+    _, counts = QuizValidator(manager.config, manager).validate()
+    assert counts == {'files': 6, 'checked': 1, 'cached': 5}
+
+
+def test_parallel_checks_match_checking_each_file_alone(bank):
+    manager = make_manager(bank, check_workers=2)
+    issues, counts = QuizValidator(manager.config, manager).validate()
+    assert counts['checked'] == 6  # More than one file, so checked in worker processes
+
+    expected = []
+    for quiz_file in list(LAYOUT) + list(BROKEN):
+        with open(os.path.join(bank, 'Exercises', *quiz_file.split('/')), 'r', encoding='utf-8') as file:
+            expected.extend(ValidationIssue(level, quiz_file, question_id, message)
+                            for level, question_id, message in check_quiz_text(file.read())[0])
+    checked = [issue for issue in issues if 'is also used by' not in issue.message]
+    assert messages(checked) == messages(expected)
+    assert {issue.quiz_filepath for issue in checked} == set(BROKEN)
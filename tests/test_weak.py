@@ -0,0 +1,68 @@
+"""
+Tests for weak mode's weighted sampling
+"""
+
+from datetime import timedelta
+
+import pytest
+
+from quizr.quiz_engine import QuizEngine
+
+from .bank import EPOCH, apply_history, make_manager, write_bank
+
+
+QUIZ = 'Ports/Common.yaml'
+WEAK = range(10)  # Always missed
+STRONG = range(10, 40)  # Always right
+
+
+@pytest.fixture
+def manager(tmp_path):
+    write_bank(str(tmp_path), {QUIZ: 40})
+    data_manager = make_manager(str(tmp_path), quick_mode_count=10)
+    apply_history(data_manager, [(QUIZ, index, index not in WEAK, attempt) for attempt in range(3) for index in range(40)])
+    return data_manager
+
+
+def questions(manager):
+    return [(QUIZ, question) for question in manager.load_quiz(QUIZ).questions.values()]
+
+
+def engine(manager, seed):
+    # Just after the answers, so staleness hardly counts
+    return QuizEngine(manager.config, manager, seed=seed, clock=lambda: EPOCH + timedelta(minutes=5))
+
+
+def weak_count(sample):
+    return sum(int(question.id[2:]) - 1 in WEAK for _, question in sample)
+
+
+def test_the_same_seed_draws_the_same_sample(manager):
+    first, second = (engine(manager, 11).order_questions(questions(manager), 'weak') for _ in range(2))
+    assert [question.id for _, question in first] == [question.id for _, question in second]
+
+
+@pytest.mark.parametrize('count', [1, 10, 40])
+def test_sample_has_the_requested_size_without_repeats(manager, count):
+    manager.config.set('quick_mode_count', count)
+    for seed in range(20):
+        sample = engine(manager, seed).order_questions(questions(manager), 'weak')
+        assert len(sample) == count
+        assert len({question.id for _, question in sample}) == count
+
+
+def test_missed_questions_are_drawn_in_proportion_to_their_weight(manager):
+    pool = questions(manager)
+    quiz_engine = engine(manager, 3)
+    weights = dict(zip((question.id for _, question in pool), quiz_engine._weakness_weights(pool)))
+    weak_weight = sum(weight for qid, weight in weights.items() if int(qid[2:]) - 1 in WEAK)
+    expected = weak_weight / sum(weights.values())
+
+    trials = 2000
+    drawn = sum(weak_count(quiz_engine._sample_by_weakness(pool, 1)) for _ in range(trials))
+    assert expected > 0.9
+    assert abs(drawn / trials - expected) < 0.03  # About five standard deviations
+
+    # Larger samples still lean on the missed questions, far beyond their quarter of the pool
+    samples = [quiz_engine.order_questions(pool, 'weak') for _ in range(200)]
+    assert sum(map(weak_count, samples)) / len(samples) > 7